@@ -3,6 +3,7 @@ from matplotlib import pyplot as plt
 from .plotting import (
     clear_matplotlib_ticks,
     plot,
+    plot_trajectories,
     resize_drawing_canvas,
     scatter,
 )
@@ -16,9 +17,20 @@ from .lines import (
     right_parallel_line,
 )
 
-from .helpers import project_point
+from .helpers import project_point, unproject_points, dict_to_lattice, lattice_to_dict
 from .colormapping import get_cmap
 from .heatmapping import heatmap, heatmapf, svg_heatmap
+from .contouring import contour, contourf
 from .ternary_axes_subplot import figure, TernaryAxesSubplot
+from .batch import render_batch, render_spec
+from .async_render import AsyncRenderer, render_async
+from .binning import bin_points, LatticeHistogram, LatticeStatistics
+from .kde import simplex_kde
+from .interpolation import interpolate, resample
+from .tiles import export_tiles
+from .html_export import export_html
+from .evaluation import LatticeEvaluator
+from .cache import RenderCache
+from .chrome import ChromeTemplate
 
 __version__ = "1.0.8"
@@ -0,0 +1,146 @@
+"""
+Rendering of plot specs (see `batch`) to PNG or SVG bytes from asyncio code,
+e.g. a web service, without blocking the event loop.
+
+    renderer = AsyncRenderer(max_concurrency=4)
+
+    async def handler(request):
+        png = await renderer.render(spec)
+        # or, chunk by chunk
+        async for chunk in renderer.stream(spec, format="svg"):
+            await response.write(chunk)
+
+Figures are built with `batch.render_spec`, on figures not managed by
+pyplot and cached per thread, so concurrent renders do not share state.
+"""
+
+import asyncio
+import functools
+
+from .batch import render_spec
+
+
+# Size of the chunks of encoded bytes yielded by AsyncRenderer.stream
+CHUNK_SIZE = 64 * 1024
+
+
+def _render_bytes(spec, format=None):
+    """Renders a spec to bytes in the executor."""
+    spec = dict(spec)
+    if spec.get("filename"):
+        raise ValueError("Specs rendered to bytes must not have a filename.")
+    if format is not None:
+        savefig_kwargs = dict(spec.get("savefig") or {})
+        savefig_kwargs["format"] = format
+        spec["savefig"] = savefig_kwargs
+    return render_spec(spec)
+
+
+class AsyncRenderer(object):
+    """
+    Renders plot specs to bytes in an executor, with at most
+    `max_concurrency` renders running (or queued in the executor) at once.
+
+    Parameters
+    ----------
+    executor: concurrent.futures.Executor, None
+        The executor rendering the specs, the default executor of the event
+        loop (a thread pool) if None. With a ProcessPoolExecutor the specs
+        must be picklable (e.g. no lambda functions for heatmapf).
+    max_concurrency: int, 4
+        The maximum number of renders at once, further calls wait.
+    chunk_size: int, CHUNK_SIZE
+        The size of the chunks yielded by `stream`.
+    """
+
+    def __init__(self, executor=None, max_concurrency=4, chunk_size=CHUNK_SIZE):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive.")
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.chunk_size = chunk_size
+        # Semaphores are bound to an event loop, so one is made per loop
+        self._semaphores = dict()
+
+    def __repr__(self):
+        return "AsyncRenderer(max_concurrency=%d)" % self.max_concurrency
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores = dict((l, s) for l, s in self._semaphores.items()
+                                    if not l.is_closed())
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def render(self, spec, format=None):
+        """
+        Renders a plot spec to bytes.
+
+        Cancelling the coroutine while it waits for the concurrency limit
+        cancels the render; once submitted to the executor, the render
+        completes in the background, keeping its place within the limit
+        until it finishes, and its result is discarded.
+
+        Parameters
+        ----------
+        spec: dict
+            The plot spec, without filename, see `batch`.
+        format: string, None
+            The image format, e.g. "png" or "svg", overriding the savefig
+            kwargs of the spec. PNG by default.
+
+        Returns
+        -------
+        bytes, the encoded image
+        """
+
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore()
+        await semaphore.acquire()
+        try:
+            future = loop.run_in_executor(
+                self.executor, functools.partial(_render_bytes, spec, format=format))
+        except BaseException:
+            semaphore.release()
+            raise
+        # Released when the executor is done, not when the caller stops waiting
+        future.add_done_callback(lambda f: semaphore.release())
+        return await asyncio.shield(future)
+
+    async def stream(self, spec, format=None):
+        """
+        Renders a plot spec and yields the encoded bytes in chunks of
+        `chunk_size`, giving control back to the event loop between chunks.
+        The whole image is rendered before the first chunk is yielded, so
+        this bounds the size of the writes, not the time to the first byte
+        or the memory used. See `render` for the parameters.
+        """
+
+        data = await self.render(spec, format=format)
+        view = memoryview(data)
+        for start in range(0, len(data), self.chunk_size):
+            yield bytes(view[start:start + self.chunk_size])
+            await asyncio.sleep(0)
+
+    async def render_many(self, specs, format=None):
+        """
+        Renders plot specs concurrently, within the concurrency limit.
+
+        Returns
+        -------
+        list of bytes, in the order of the specs
+        """
+
+        return await asyncio.gather(*[self.render(spec, format=format)
+                                      for spec in specs])
+
+
+async def render_async(spec, format=None, executor=None):
+    """
+    Renders a plot spec to bytes in an executor, see `AsyncRenderer.render`.
+    """
+
+    return await AsyncRenderer(executor=executor).render(spec, format=format)
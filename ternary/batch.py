@@ -0,0 +1,308 @@
+"""
+Batch rendering of many ternary figures across a process pool.
+
+A plot spec is a dictionary describing a single figure:
+
+    spec = {
+        "scale": 30,
+        "permutation": None,
+        "figsize": (8, 6),
+        "chrome": [("boundary", {"linewidth": 2.0}),
+                   ("gridlines", {"multiple": 5, "color": "blue"})],
+        "plots": [("heatmap", {"data": data, "style": "h"}),
+                  ("scatter", {"points": points, "color": "red"})],
+        "savefig": {"dpi": 100, "format": "png"},
+        "filename": "figure.png",
+    }
+
+`chrome` and `plots` are sequences of calls to `TernaryAxesSubplot` methods,
+each given as (name, kwargs) or (name, args, kwargs); a dict mapping method
+names to kwargs is also accepted. The chrome (boundary, gridlines, ticks,
+labels, ...) is drawn first and is kept between consecutive jobs that share
+it, so that each worker only draws the data artists of every job. If no
+filename is given the encoded image is returned as bytes.
+"""
+
+from collections import OrderedDict
+import hashlib
+import io
+import multiprocessing
+import pickle
+import threading
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .cache import scene_hash
+from .ternary_axes_subplot import TernaryAxesSubplot
+
+
+# Maximum number of figures (with distinct chrome) each worker keeps around
+MAX_CACHED_FIGURES = 4
+
+# Locations of the titles of matplotlib axes
+TITLE_LOCATIONS = ("left", "center", "right")
+
+# Per-thread cache of reusable figures, keyed on a hash of their chrome, so
+# that concurrent renders in threads never share a figure
+_local = threading.local()
+
+
+def _figure_cache():
+    if not hasattr(_local, "figures"):
+        _local.figures = OrderedDict()
+    return _local.figures
+
+
+## Spec Helpers ##
+
+def normalize_calls(calls):
+    """
+    Normalizes a sequence of calls to a list of (name, args, kwargs) tuples.
+
+    Parameters
+    ----------
+    calls: dict, list, ChromeTemplate or None
+        A dict mapping method names to kwargs (or to a list of kwargs), or
+        a sequence of (name, kwargs) or (name, args, kwargs) tuples. Names
+        may be dotted to reach the matplotlib objects, e.g. "ax.axis".
+
+    Returns
+    -------
+    list of (name, args, kwargs) tuples
+    """
+
+    if not calls:
+        return []
+    if isinstance(calls, dict):
+        items = []
+        for name, kwargs in calls.items():
+            if isinstance(kwargs, (list, tuple)):
+                items.extend((name, k) for k in kwargs)
+            else:
+                items.append((name, kwargs))
+        calls = items
+    normalized = []
+    for call in calls:
+        if len(call) == 2:
+            name, kwargs = call
+            args = ()
+        elif len(call) == 3:
+            name, args, kwargs = call
+        else:
+            raise ValueError("Calls must be (name, kwargs) or (name, args, kwargs) tuples.")
+        normalized.append((name, tuple(args), dict(kwargs or {})))
+    return normalized
+
+
+def apply_calls(tax, calls):
+    """
+    Applies a sequence of calls (see `normalize_calls`) to a
+    TernaryAxesSubplot.
+    """
+
+    for name, args, kwargs in normalize_calls(calls):
+        method = tax
+        for attribute in name.split('.'):
+            method = getattr(method, attribute, None)
+            if method is None:
+                raise ValueError("TernaryAxesSubplot has no method %s" % name)
+        method(*args, **kwargs)
+
+
+def chrome_key(spec):
+    """Computes a hash identifying the reusable part of a plot spec."""
+
+    context = (spec.get("scale"), spec.get("permutation"), spec.get("figsize"))
+    calls = normalize_calls(spec.get("chrome"))
+    try:
+        return hashlib.sha1(pickle.dumps((context, calls))).hexdigest()
+    except Exception:
+        # e.g. lambda tick formatters, hashed on their code and closure
+        return scene_hash(calls, context=context)
+
+
+## Figures ##
+
+def new_figure(scale=None, permutation=None, figsize=None):
+    """
+    Creates a TernaryAxesSubplot on a figure that is not managed by pyplot,
+    so that it is safe to use in worker processes and threads.
+
+    Returns
+    -------
+    tax: TernaryAxesSubplot
+    """
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    return TernaryAxesSubplot(ax=ax, scale=scale, permutation=permutation)
+
+
+class _ReusableFigure(object):
+    """A figure with its chrome drawn, which can be reset between jobs."""
+
+    def __init__(self, spec):
+        self.tax = new_figure(scale=spec.get("scale"),
+                              permutation=spec.get("permutation"),
+                              figsize=spec.get("figsize"))
+        apply_calls(self.tax, spec.get("chrome"))
+        ax = self.tax.get_axes()
+        # Every job starts from the beginning of the color cycle
+        ax.set_prop_cycle(None)
+        self._artists = set(ax.get_children())
+        self._subplotspec = ax.get_subplotspec()
+        self._position = ax.get_position(original=True)
+        self._boundary_scale = self.tax._boundary_scale
+        self._scene_length = len(self.tax._scene)
+        self._scene_complete = self.tax._scene_complete
+        # State of the chrome that the plots of a job may change
+        self._state = self._get_state()
+
+    def _get_state(self):
+        tax = self.tax
+        ax = tax.get_axes()
+        return {
+            "_scale": tax._scale,
+            "_labels": dict(tax._labels),
+            "_corner_labels": dict(tax._corner_labels),
+            "_ticks": dict(tax._ticks),
+            "_axis_limits": tax._axis_limits,
+            "_background_parameters": tax._background_parameters,
+            "_background_triangle": tax._background_triangle,
+            "titles": dict((loc, ax.get_title(loc)) for loc in TITLE_LOCATIONS),
+        }
+
+    def reset(self):
+        """Removes everything drawn since the chrome, e.g. data and colorbars."""
+        tax = self.tax
+        ax = tax.get_axes()
+        fig = tax.get_figure()
+        labels = set(tax._to_remove)
+        for artist in ax.get_children():
+            if artist not in self._artists and artist not in labels:
+                try:
+                    artist.remove()
+                except (NotImplementedError, ValueError):
+                    pass
+        # Colorbars live on their own axes and shrink the ternary axes
+        for other in fig.axes:
+            if other is not ax:
+                other.remove()
+        if self._subplotspec is not None:
+            ax.set_subplotspec(self._subplotspec)
+        ax.set_position(self._position)
+        ax.set_prop_cycle(None)
+        del tax._scene[self._scene_length:]
+        tax._scene_complete = self._scene_complete
+        tax._boundary_scale = self._boundary_scale
+        state = self._state
+        for loc, title in state["titles"].items():
+            if ax.get_title(loc) != title:
+                ax.set_title(title, loc=loc)
+        for name in ("_scale", "_axis_limits", "_background_parameters"):
+            setattr(tax, name, state[name])
+        for name in ("_labels", "_corner_labels", "_ticks"):
+            setattr(tax, name, dict(state[name]))
+        if tax._background_triangle is not state["_background_triangle"]:
+            # The chrome background was replaced, and removed above
+            tax._background_triangle = None
+            tax._draw_background()
+            self._artists.discard(state["_background_triangle"])
+            self._artists.add(tax._background_triangle)
+            state["_background_triangle"] = tax._background_triangle
+        tax.resize_drawing_canvas()
+        tax._redraw_labels()
+
+
+def _get_figure(spec):
+    """Returns a reusable figure for the spec from the per-thread cache."""
+
+    key = chrome_key(spec)
+    figures = _figure_cache()
+    reusable = figures.pop(key, None)
+    if reusable is None:
+        reusable = _ReusableFigure(spec)
+    else:
+        reusable.reset()
+    figures[key] = reusable
+    while len(figures) > MAX_CACHED_FIGURES:
+        figures.popitem(last=False)
+    return reusable
+
+
+## Rendering ##
+
+def render_spec(spec, reuse=True):
+    """
+    Renders a single plot spec.
+
+    Parameters
+    ----------
+    spec: dict
+        The plot spec, see the module documentation.
+    reuse: bool, True
+        Reuse a cached figure with the same chrome if available.
+
+    Returns
+    -------
+    The filename if the spec has one, otherwise the encoded image as bytes.
+    """
+
+    if reuse:
+        reusable = _get_figure(spec)
+    else:
+        reusable = _ReusableFigure(spec)
+    tax = reusable.tax
+    apply_calls(tax, spec.get("plots"))
+
+    savefig_kwargs = dict(spec.get("savefig") or {})
+    filename = spec.get("filename")
+    if filename:
+        tax.savefig(filename, **savefig_kwargs)
+        result = filename
+    else:
+        savefig_kwargs.setdefault("format", "png")
+        buffer = io.BytesIO()
+        tax.savefig(buffer, **savefig_kwargs)
+        result = buffer.getvalue()
+    if reuse:
+        # Release the data as soon as possible rather than at the next job
+        reusable.reset()
+    return result
+
+
+def render_batch(specs, processes=None, chunksize=1):
+    """
+    Renders a list of plot specs across a pool of worker processes. Each
+    worker reuses its figures (and their chrome) from one job to the next.
+    The specs are sent to the workers with pickle, so unless processes is 1
+    they must be picklable: functions must be defined at the top level of a
+    module, not lambdas or local functions (e.g. for heatmapf).
+
+    Parameters
+    ----------
+    specs: iterable of dicts
+        The plot specs, see the module documentation.
+    processes: int, None
+        The number of worker processes, defaults to the number of CPUs. If
+        1, the specs are rendered in the current process.
+    chunksize: int, 1
+        The number of specs sent to a worker at a time. Grouping specs with
+        the same chrome into chunks improves reuse.
+
+    Returns
+    -------
+    list of filenames or bytes, in the order of the specs
+    """
+
+    if processes == 1:
+        return [render_spec(spec) for spec in specs]
+    pool = multiprocessing.Pool(processes=processes)
+    try:
+        results = pool.map(render_spec, specs, chunksize=chunksize)
+    finally:
+        pool.close()
+        pool.join()
+    return results
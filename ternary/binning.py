@@ -0,0 +1,459 @@
+"""
+Binning of (large numbers of) points on the simplex to the heatmap lattice.
+"""
+
+import warnings
+
+import numpy as np
+
+from .helpers import lattice_to_dict
+
+
+## Lattice Cells ##
+
+def normalize_points(points):
+    """
+    Normalizes an array of points so that the coordinates of each point sum
+    to one. Points with a zero sum are returned as NaN.
+
+    Parameters
+    ----------
+    points: array-like, shape (N, 3)
+
+    Returns
+    -------
+    numpy array of shape (N, 3)
+    """
+
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    sums = points.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized = points / sums
+    normalized[sums[:, 0] == 0] = np.nan
+    return normalized
+
+
+def lattice_indices(points, scale):
+    """
+    Finds the nearest lattice point (i, j, scale - i - j) of each point,
+    i.e. the hexagonal heatmap cell containing it, with floor arithmetic.
+    Points are normalized first, so both compositions and points plotted
+    at any scale may be given.
+
+    Parameters
+    ----------
+    points: array-like, shape (N, 3)
+        The points to locate.
+    scale: Int
+        The scale of the lattice.
+
+    Returns
+    -------
+    i, j: integer numpy arrays of length N. Points that cannot be normalized
+    get the index -1.
+    """
+
+    normalized = normalize_points(points)
+    valid = ~np.isnan(normalized).any(axis=1)
+    u = np.where(valid, normalized[:, 0], 0) * scale
+    v = np.where(valid, normalized[:, 1], 0) * scale
+    i = np.floor(u)
+    j = np.floor(v)
+    fu = u - i
+    fv = v - j
+    # The points lie in the upright triangle (i, j), (i + 1, j), (i, j + 1)
+    # or in the inverted triangle (i + 1, j + 1), (i + 1, j), (i, j + 1).
+    # In an equilateral triangle the nearest vertex is the one with the
+    # largest barycentric coordinate.
+    upright = fu + fv < 1
+    weights = np.where(upright[:, np.newaxis],
+                       np.column_stack([1 - fu - fv, fu, fv]),
+                       np.column_stack([fu + fv - 1, 1 - fv, 1 - fu]))
+    nearest = np.argmax(weights, axis=1)
+    di = (nearest == 1) | ((nearest == 0) & ~upright)
+    dj = (nearest == 2) | ((nearest == 0) & ~upright)
+    i = (i + di).astype(int)
+    j = (j + dj).astype(int)
+    # Guard against points slightly outside of the simplex
+    i = np.clip(i, 0, scale)
+    j = np.clip(j, 0, scale - i)
+    i[~valid] = -1
+    j[~valid] = -1
+    return i, j
+
+
+def locate_points(points, scale):
+    """
+    Locates each point in its triangle of the lattice, the upright triangle
+    (i, j), (i + 1, j), (i, j + 1) or the upside-down triangle (i + 1, j + 1),
+    (i + 1, j), (i, j + 1), with floor arithmetic, and computes its
+    barycentric coordinates in that triangle. Points are normalized first,
+    so both compositions and points plotted at any scale may be given.
+
+    Parameters
+    ----------
+    points: array-like, shape (N, 3)
+        The points to locate.
+    scale: Int
+        The scale of the lattice.
+
+    Returns
+    -------
+    cells: integer numpy array of length N, the index of the triangle in
+        `heatmapping.lattice_triangulation(scale).triangles`, -1 for points
+        that cannot be normalized
+    vertices: integer numpy array of shape (N, 3, 2), the (i, j) of the
+        vertices of the triangles
+    weights: numpy array of shape (N, 3), the barycentric coordinates of the
+        points with respect to the vertices. Points outside of the simplex
+        are located in the nearest triangle and get negative weights.
+    """
+
+    normalized = normalize_points(points)
+    valid = ~np.isnan(normalized).any(axis=1)
+    u = np.where(valid, normalized[:, 0], 0) * scale
+    v = np.where(valid, normalized[:, 1], 0) * scale
+    i = np.clip(np.floor(u), 0, scale - 1)
+    j = np.clip(np.floor(v), 0, scale - 1 - i)
+    fu = u - i
+    fv = v - j
+    # Points beyond the edge k = 0 stay in the last upright triangle
+    upright = (fu + fv <= 1) | (i + j == scale - 1)
+    weights = np.where(upright[:, np.newaxis],
+                       np.column_stack([1 - fu - fv, fu, fv]),
+                       np.column_stack([fu + fv - 1, 1 - fv, 1 - fu]))
+    i = i.astype(int)
+    j = j.astype(int)
+    offsets = np.where(upright[:, np.newaxis, np.newaxis],
+                       np.array([[0, 0], [1, 0], [0, 1]]),
+                       np.array([[1, 1], [1, 0], [0, 1]]))
+    vertices = np.stack([i, j], axis=1)[:, np.newaxis, :] + offsets
+
+    # Triangles are numbered row-major over (i, j), upright triangles first
+    skipped = i * (i - 1) // 2
+    cells = np.where(upright, i * scale - skipped + j,
+                     scale * (scale + 1) // 2 + i * (scale - 1) - skipped + j)
+    cells[~valid] = -1
+    vertices[~valid] = -1
+    weights[~valid] = np.nan
+    return cells, vertices, weights
+
+
+def read_chunks(filename, chunk_size=100000, **kwargs):
+    """
+    Reads the rows of a text file of points in chunks, for streaming binning.
+
+    Parameters
+    ----------
+    filename: string or file-like
+        The file to read.
+    chunk_size: int, 100000
+        The number of rows per chunk.
+    kwargs:
+        Any kwargs to pass through to numpy.loadtxt, e.g. delimiter or
+        usecols.
+
+    Yields
+    ------
+    numpy arrays of at most chunk_size rows
+    """
+
+    if hasattr(filename, 'read'):
+        handle = filename
+        close = False
+    else:
+        handle = open(filename)
+        close = True
+    try:
+        while True:
+            with warnings.catch_warnings():
+                # Reading past the last row, when the number of rows is a
+                # multiple of chunk_size, is how the end of file is found
+                warnings.filterwarnings("ignore", message=".*input contained no data",
+                                        category=UserWarning)
+                chunk = np.loadtxt(handle, max_rows=chunk_size, ndmin=2, **kwargs)
+            if len(chunk) == 0:
+                break
+            yield chunk
+            if len(chunk) < chunk_size:
+                break
+    finally:
+        if close:
+            handle.close()
+
+
+## Histograms ##
+
+class LatticeHistogram(object):
+    """
+    Streaming histogram of points over the lattice points of the simplex.
+    Each point is counted at its nearest lattice point (see
+    `lattice_indices`), so the result is exact for hexagonal heatmaps.
+
+    > histogram = LatticeHistogram(scale=50)
+    > for chunk in read_chunks("points.txt"):
+    >     histogram.add(chunk)
+    > tax.heatmap(histogram.data(), style="hexagonal")
+    """
+
+    def __init__(self, scale):
+        self.scale = int(scale)
+        size = (self.scale + 1) ** 2
+        self.counts = np.zeros(size)
+        self.total = 0.
+
+    def __repr__(self):
+        return "LatticeHistogram(scale=%d, total=%s)" % (self.scale, self.total)
+
+    def add(self, points, weights=None):
+        """
+        Adds a chunk of points.
+
+        Parameters
+        ----------
+        points: array-like, shape (N, 3)
+            The points to bin.
+        weights: array-like of length N, None
+            Weights of the points, one each by default.
+        """
+        i, j = lattice_indices(points, self.scale)
+        valid = i >= 0
+        flat = i[valid] * (self.scale + 1) + j[valid]
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float)[valid]
+        counts = np.bincount(flat, weights=weights, minlength=len(self.counts))
+        self.counts += counts
+        self.total += counts.sum()
+        return self
+
+    def add_chunks(self, chunks):
+        """Adds the chunks of points of an iterable, e.g. `read_chunks`."""
+        for chunk in chunks:
+            self.add(chunk)
+        return self
+
+    def merge(self, other):
+        """Adds the counts of another histogram of the same scale."""
+        if other.scale != self.scale:
+            raise ValueError("Histograms must have the same scale to merge.")
+        self.counts += other.counts
+        self.total += other.total
+        return self
+
+    def array(self, density=False):
+        """
+        Returns the counts as a lattice array (see helpers.dict_to_lattice).
+
+        Parameters
+        ----------
+        density: bool, False
+            Divide the counts by the total count.
+        """
+        array = self.counts.reshape(self.scale + 1, self.scale + 1).copy()
+        if density and self.total > 0:
+            array /= self.total
+        i, j = np.indices(array.shape)
+        array[i + j > self.scale] = np.nan
+        return array
+
+    def data(self, density=False, boundary=True):
+        """
+        Returns the counts as heatmap data, a dictionary mapping (i, j) to
+        counts, for all the lattice points.
+
+        Parameters
+        ----------
+        density: bool, False
+            Divide the counts by the total count.
+        boundary: bool, True
+            Include the boundary points.
+        """
+        return lattice_to_dict(self.array(density=density), boundary=boundary)
+
+
+def histogram(points, scale, weights=None):
+    """
+    Bins points, or an iterable of chunks of points, to a LatticeHistogram.
+
+    Parameters
+    ----------
+    points: array-like of shape (N, 3), an iterable of such arrays or a
+            LatticeHistogram
+        The points to bin. A histogram is returned as it is.
+    scale: Int
+        The scale of the lattice.
+    weights: array-like of length N, None
+        Weights of the points, only if points is a single array.
+
+    Returns
+    -------
+    LatticeHistogram
+    """
+
+    if isinstance(points, LatticeHistogram):
+        if points.scale != scale:
+            raise ValueError("The histogram must have the same scale.")
+        return points
+    result = LatticeHistogram(scale)
+    if isinstance(points, np.ndarray) or (
+            isinstance(points, (list, tuple)) and len(points) > 0 and
+            np.ndim(points[0]) == 1):
+        result.add(points, weights=weights)
+    else:
+        result.add_chunks(points)
+    return result
+
+
+def bin_points(points, scale, weights=None, density=False):
+    """
+    Bins points, or an iterable of chunks of points, to heatmap data.
+
+    Parameters
+    ----------
+    points: array-like of shape (N, 3) or an iterable of such arrays
+        The points to bin.
+    scale: Int
+        The scale of the lattice.
+    weights: array-like of length N, None
+        Weights of the points, only if points is a single array.
+    density: bool, False
+        Divide the counts by the total count.
+
+    Returns
+    -------
+    dict mapping (i, j) to counts, for use with heatmap
+    """
+
+    return histogram(points, scale, weights=weights).data(density=density)
+
+
+## Per-cell Statistics ##
+
+class LatticeStatistics(object):
+    """
+    Streaming per-cell statistics (count, mean, variance, min, max) of a
+    measured quantity over the lattice points of the simplex, with points
+    assigned to their nearest lattice point as in `LatticeHistogram`.
+
+    Chunks are combined with the parallel form of Welford's algorithm, so
+    accumulators filled in separate processes or jobs can be merged:
+
+    > partials = pool.map(compute_statistics, filenames)
+    > statistics = functools.reduce(LatticeStatistics.merge, partials)
+    > tax.heatmap(statistics.data("mean"))
+    """
+
+    STATISTICS = ("count", "sum", "mean", "variance", "std", "min", "max")
+
+    def __init__(self, scale):
+        self.scale = int(scale)
+        size = (self.scale + 1) ** 2
+        self.count = np.zeros(size)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+
+    def __repr__(self):
+        return "LatticeStatistics(scale=%d, total=%s)" % (self.scale, self.count.sum())
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        """Combines per-cell partial statistics into the accumulator."""
+        total = self.count + count
+        delta = mean - self.mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(total > 0, count / total, 0)
+        self.mean = self.mean + delta * ratio
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * ratio
+        self.count = total
+        self.min = np.minimum(self.min, minimum)
+        self.max = np.maximum(self.max, maximum)
+
+    def add(self, points, values):
+        """
+        Adds a chunk of points with the measured values at those points.
+
+        Parameters
+        ----------
+        points: array-like, shape (N, 3)
+            The points to bin.
+        values: array-like of length N
+            The measured quantity. NaN values are ignored.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        i, j = lattice_indices(points, self.scale)
+        valid = (i >= 0) & ~np.isnan(values)
+        flat = i[valid] * (self.scale + 1) + j[valid]
+        values = values[valid]
+        size = len(self.count)
+
+        count = np.bincount(flat, minlength=size).astype(float)
+        sums = np.bincount(flat, weights=values, minlength=size)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, sums / count, 0)
+        m2 = np.bincount(flat, weights=(values - mean[flat]) ** 2, minlength=size)
+        minimum = np.full(size, np.inf)
+        maximum = np.full(size, -np.inf)
+        np.minimum.at(minimum, flat, values)
+        np.maximum.at(maximum, flat, values)
+        self._combine(count, mean, m2, minimum, maximum)
+        return self
+
+    def add_chunks(self, chunks):
+        """Adds an iterable of (points, values) chunks."""
+        for points, values in chunks:
+            self.add(points, values)
+        return self
+
+    def merge(self, other):
+        """Merges the statistics of another accumulator of the same scale."""
+        if other.scale != self.scale:
+            raise ValueError("Statistics must have the same scale to merge.")
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def array(self, statistic="mean", ddof=0):
+        """
+        Returns a statistic as a lattice array (see helpers.dict_to_lattice),
+        NaN for cells without data.
+
+        Parameters
+        ----------
+        statistic: string, "mean"
+            One of "count", "sum", "mean", "variance", "std", "min", "max".
+        ddof: int, 0
+            Delta degrees of freedom of the variance and standard deviation.
+        """
+        if statistic not in self.STATISTICS:
+            raise ValueError("statistic must be one of %s" % ", ".join(self.STATISTICS))
+        count = self.count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if statistic == "count":
+                values = count.copy()
+            elif statistic == "sum":
+                values = self.mean * count
+            elif statistic == "mean":
+                values = self.mean.copy()
+            elif statistic in ("variance", "std"):
+                values = self.m2 / (count - ddof)
+                values[count - ddof <= 0] = np.nan
+                if statistic == "std":
+                    values = np.sqrt(values)
+            elif statistic == "min":
+                values = self.min.copy()
+            else:
+                values = self.max.copy()
+        if statistic != "count":
+            values[count == 0] = np.nan
+        array = values.reshape(self.scale + 1, self.scale + 1)
+        i, j = np.indices(array.shape)
+        array[i + j > self.scale] = np.nan
+        return array
+
+    def data(self, statistic="mean", ddof=0, boundary=True):
+        """
+        Returns a statistic as heatmap data, a dictionary mapping (i, j) to
+        values, for the lattice points with data.
+        """
+        array = self.array(statistic=statistic, ddof=ddof)
+        return lattice_to_dict(array, boundary=boundary)
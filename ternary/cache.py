@@ -0,0 +1,213 @@
+"""
+Content-addressed cache of rendered figures.
+"""
+
+import hashlib
+import numbers
+import os
+import pickle
+import tempfile
+import types
+
+import numpy as np
+
+
+## Scene Hashing ##
+
+# Globals of functions that are not hashed with them: their code or
+# contents are not part of the function
+GLOBAL_TYPES_SKIPPED = (types.ModuleType, type, types.FunctionType,
+                        types.BuiltinFunctionType)
+
+
+def _global_names(code):
+    """The names read by a code object and its nested code objects."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.update(_global_names(const))
+    return names
+
+
+def _update_hash(h, obj):
+    """Feeds a canonical representation of obj into the hash object h."""
+
+    if obj is None or isinstance(obj, (bool, numbers.Number, str, bytes)):
+        h.update(repr((type(obj).__name__, obj)).encode())
+    elif isinstance(obj, np.ndarray):
+        array = np.ascontiguousarray(obj)
+        h.update(repr(("ndarray", array.dtype.str, array.shape)).encode())
+        if array.dtype.hasobject:
+            for x in array.flat:
+                _update_hash(h, x)
+        else:
+            h.update(array.tobytes())
+    elif isinstance(obj, dict):
+        h.update(b"dict%d" % len(obj))
+        # Sort on the hashes of the keys since keys may not be comparable
+        items = []
+        for key, value in obj.items():
+            key_hash = hashlib.sha256()
+            _update_hash(key_hash, key)
+            items.append((key_hash.digest(), value))
+        items.sort(key=lambda item: item[0])
+        for key_digest, value in items:
+            h.update(key_digest)
+            _update_hash(h, value)
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"%s%d" % (type(obj).__name__.encode(), len(obj)))
+        try:
+            # Fast path for sequences of numbers, e.g. lists of points
+            array = np.asarray(obj)
+        except (TypeError, ValueError):
+            array = None
+        if array is not None and array.dtype.kind in "biuf":
+            _update_hash(h, array)
+        else:
+            for x in obj:
+                _update_hash(h, x)
+    elif isinstance(obj, types.CodeType):
+        # Nested code objects (lambdas, comprehensions) are hashed by content,
+        # their repr holds their memory address.
+        _update_hash(h, ("code", obj.co_name, obj.co_code, obj.co_names,
+                         obj.co_varnames, obj.co_freevars))
+        _update_hash(h, obj.co_consts)
+    elif isinstance(obj, (types.FunctionType, types.MethodType)):
+        # Functions are identified by their code, defaults and closure,
+        # not by any global state they may read.
+        function = getattr(obj, "__func__", obj)
+        _update_hash(h, ("function", function.__module__, function.__qualname__))
+        _update_hash(h, function.__code__)
+        _update_hash(h, function.__defaults__)
+        if function.__closure__:
+            for cell in function.__closure__:
+                _update_hash(h, cell.cell_contents)
+        # Module level values read by the function, e.g. arrays of weights
+        for name in sorted(_global_names(function.__code__)):
+            if name in function.__globals__:
+                value = function.__globals__[name]
+                if not isinstance(value, GLOBAL_TYPES_SKIPPED):
+                    _update_hash(h, (name, value))
+    else:
+        try:
+            h.update(pickle.dumps(obj))
+        except Exception:
+            h.update(repr(obj).encode())
+
+
+def scene_hash(scene, context=None):
+    """
+    Hashes a recorded scene, a sequence of (name, args, kwargs) calls,
+    including the contents of any arrays passed.
+
+    Parameters
+    ----------
+    scene: list
+        The recorded calls.
+    context: dict, None
+        Anything else that determines the rendered output, e.g. the figure
+        size and the savefig parameters.
+
+    Returns
+    -------
+    string, the hexadecimal digest
+    """
+
+    h = hashlib.sha256()
+    _update_hash(h, context)
+    for name, args, kwargs in scene:
+        _update_hash(h, name)
+        _update_hash(h, tuple(args))
+        _update_hash(h, dict(kwargs))
+    return h.hexdigest()
+
+
+## Cache Store ##
+
+class RenderCache(object):
+    """
+    A directory of rendered images keyed on scene hashes. The least recently
+    used entries are evicted when the total size exceeds `max_size` bytes.
+    """
+
+    def __init__(self, directory, max_size=256 * 2 ** 20):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self):
+        return "RenderCache(%r, max_size=%d)" % (self.directory, self.max_size)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def key(self, scene, context=None):
+        """Computes the cache key of a scene, see `scene_hash`."""
+        return scene_hash(scene, context=context)
+
+    def get(self, key):
+        """Returns the cached bytes for key or None."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except (IOError, OSError):
+            return None
+        # Mark the entry as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        """Stores the bytes for key and evicts old entries if necessary."""
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def entries(self):
+        """Returns a list of (mtime, size, path) for the cached entries."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                continue
+            path = self._path(name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        """Total size of the cached entries in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Removes least recently used entries until within max_size."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Removes all cached entries."""
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
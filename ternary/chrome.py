@@ -0,0 +1,204 @@
+"""
+Reusable chrome (boundary, gridlines, ticks, labels, background) templates.
+"""
+
+import io
+
+import numpy as np
+from matplotlib import image as mpl_image
+
+from .batch import apply_calls, new_figure, normalize_calls
+from .ternary_axes_subplot import TernaryAxesSubplot
+
+
+# TernaryAxesSubplot methods that can be recorded by a ChromeTemplate
+CHROME_METHODS = (
+    "annotate",
+    "boundary",
+    "bottom_axis_label",
+    "clear_matplotlib_ticks",
+    "get_ticks_from_axis_limits",
+    "gridlines",
+    "horizontal_line",
+    "left_axis_label",
+    "left_corner_label",
+    "left_parallel_line",
+    "line",
+    "right_axis_label",
+    "right_corner_label",
+    "right_parallel_line",
+    "set_axis_limits",
+    "set_background_color",
+    "set_custom_ticks",
+    "set_title",
+    "ticks",
+    "top_corner_label",
+)
+
+
+def _recorder(name):
+    """Makes a ChromeTemplate method recording a call to `name`."""
+
+    def record(self, *args, **kwargs):
+        self._calls.append((name, args, kwargs))
+        return self
+    record.__name__ = name
+    record.__doc__ = "Records a call to TernaryAxesSubplot.%s." % name
+    return record
+
+
+class ChromeTemplate(object):
+    """
+    Captures the layout of a TernaryAxesSubplot (boundary, gridlines, ticks,
+    labels, background, ...) once so that it can be stamped onto many
+    figures. The recording methods have the same names and parameters as
+    those of TernaryAxesSubplot and can be chained:
+
+    > template = ChromeTemplate(scale=30)
+    > template.boundary(linewidth=2).gridlines(multiple=5)
+    > fig, tax = template.figure()
+
+    A template is also a sequence of (name, args, kwargs) calls, so it can be
+    used as the chrome of a `ternary.batch` plot spec.
+    """
+
+    def __init__(self, scale=None, permutation=None, calls=None):
+        self.scale = scale
+        self.permutation = permutation
+        self._calls = normalize_calls(calls)
+
+    def __iter__(self):
+        return iter(self._calls)
+
+    def __len__(self):
+        return len(self._calls)
+
+    def __repr__(self):
+        names = ", ".join(name for name, _, _ in self._calls)
+        return "ChromeTemplate(%s)" % names
+
+    def axes_call(self, name, *args, **kwargs):
+        """
+        Records a call to a method of the underlying matplotlib AxesSubplot,
+        e.g. template.axes_call("axis", "off").
+        """
+        self._calls.append(("ax." + name, args, kwargs))
+        return self
+
+    def apply(self, tax):
+        """Draws the recorded chrome on a TernaryAxesSubplot."""
+        apply_calls(tax, self._calls)
+        return tax
+
+    def figure(self, ax=None, figsize=None):
+        """
+        Creates a new figure with the chrome drawn. If no axis is given the
+        figure is not managed by pyplot.
+
+        Parameters
+        ----------
+        ax: AxesSubplot, None
+            The matplotlib AxesSubplot to draw on
+        figsize: 2-tuple, None
+            The size of a new figure in inches
+
+        Returns
+        -------
+        fig, tax: the matplotlib figure and the TernaryAxesSubplot
+        """
+        if ax is None:
+            tax = new_figure(scale=self.scale, permutation=self.permutation,
+                             figsize=figsize)
+        else:
+            tax = TernaryAxesSubplot(ax=ax, scale=self.scale,
+                                     permutation=self.permutation)
+        self.apply(tax)
+        return tax.get_figure(), tax
+
+    def blitter(self, figsize=None, dpi=100):
+        """
+        Renders the chrome once and returns a ChromeBlitter that draws only
+        the data artists of each plot on top of the cached image.
+        """
+        return ChromeBlitter(self, figsize=figsize, dpi=dpi)
+
+
+for _name in CHROME_METHODS:
+    setattr(ChromeTemplate, _name, _recorder(_name))
+
+
+class ChromeBlitter(object):
+    """
+    Raster renderer holding a ChromeTemplate drawn once as a cached
+    background. For each plot the background is restored and only the new
+    data artists are drawn on top of it, as in matplotlib blitting. Data
+    artists are therefore always drawn above the chrome, and artists on
+    other axes (such as colorbars) are not supported.
+    """
+
+    def __init__(self, template, figsize=None, dpi=100):
+        self.template = template
+        fig, tax = template.figure(figsize=figsize)
+        fig.set_dpi(dpi)
+        self.tax = tax
+        self.dpi = dpi
+        tax._redraw_labels()
+        canvas = fig.canvas
+        canvas.draw()
+        self._background = canvas.copy_from_bbox(fig.bbox)
+        ax = tax.get_axes()
+        ax.set_prop_cycle(None)
+        self._artists = set(ax.get_children())
+        self._scene_length = len(tax._scene)
+        self._scene_complete = tax._scene_complete
+
+    def render(self, draw, filename=None, format="png"):
+        """
+        Draws the data of one plot over the chrome.
+
+        Parameters
+        ----------
+        draw: callable or sequence of calls
+            Either a function taking the TernaryAxesSubplot, or calls as
+            accepted by `ternary.batch.apply_calls`, e.g.
+            [("scatter", {"points": points})]
+        filename: string or file-like, None
+            Where to write the image. If None, the image is returned as bytes.
+        format: string, "png"
+            Any raster format supported by matplotlib.
+
+        Returns
+        -------
+        The filename if given, otherwise the encoded image as bytes.
+        """
+        tax = self.tax
+        ax = tax.get_axes()
+        canvas = tax.get_figure().canvas
+        if callable(draw):
+            draw(tax)
+        else:
+            apply_calls(tax, draw)
+        labels = set(tax._to_remove)
+        artists = [a for a in ax.get_children()
+                   if a not in self._artists and a not in labels]
+        artists.sort(key=lambda a: a.get_zorder())
+
+        canvas.restore_region(self._background)
+        for artist in artists:
+            ax.draw_artist(artist)
+        rgba = np.asarray(canvas.buffer_rgba())
+
+        if filename is None:
+            output = io.BytesIO()
+        else:
+            output = filename
+        mpl_image.imsave(output, rgba, format=format, dpi=self.dpi)
+
+        for artist in artists:
+            artist.remove()
+        ax.set_prop_cycle(None)
+        del tax._scene[self._scene_length:]
+        tax._scene_complete = self._scene_complete
+        if filename is None:
+            return output.getvalue()
+        return filename
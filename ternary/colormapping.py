@@ -92,7 +92,9 @@ def colorbar_hack(ax, vmin, vmax, cmap, scientific=False, cbarlabel=None, norm=N
         norm = plt.Normalize(vmin=vmin, vmax=vmax)
     sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
     sm._A = []
-    cb = plt.colorbar(sm, ax=ax, **kwargs)
+    # Use the figure of the axis rather than pyplot's current figure so that
+    # figures created without pyplot (e.g. in batch rendering) work as well.
+    cb = ax.get_figure().colorbar(sm, ax=ax, **kwargs)
     if cbarlabel is not None:
         cb.set_label(cbarlabel)
     if scientific:
@@ -0,0 +1,66 @@
+"""
+Contour lines and filled contours computed on the triangular lattice.
+"""
+
+from matplotlib import pyplot as plt
+
+from .heatmapping import lattice_triangulation, lattice_values, masked_triangulation
+
+
+def contour(data, scale, levels=None, ax=None, permutation=None,
+            boundary=True, filled=False, **kwargs):
+    """
+    Draws contour lines of lattice data or of a function on the simplex. The
+    contours are computed on the triangulation of the lattice points (see
+    `heatmapping.lattice_triangulation`), so a function is only evaluated at
+    the lattice points, and drawn as a single collection.
+
+    Parameters
+    ----------
+    data: dictionary or function
+        A dictionary mapping (i, j) to values, where i + j + k = scale, or a
+        function of 3-tuples evaluated at the normalized lattice points as in
+        heatmapf.
+    scale: Integer
+        The scale used to partition the simplex.
+    levels: int or array-like, None
+        The number of contour levels or the values of the levels.
+    ax: Matplotlib AxesSubplot, None
+        The subplot to draw on.
+    permutation: string, None
+        A permutation of the coordinates
+    boundary: bool, True
+        Evaluate a function on the boundary points too.
+    filled: bool, False
+        Draw filled contours.
+    kwargs:
+        Any kwargs to pass through to matplotlib's tricontour or tricontourf,
+        e.g. colors, cmap or linewidths.
+
+    Returns
+    -------
+    The matplotlib TriContourSet
+    """
+
+    if not ax:
+        fig, ax = plt.subplots()
+    scale = int(scale)
+    values = lattice_values(data, scale, boundary=boundary)
+    triangulation = masked_triangulation(
+        lattice_triangulation(scale, permutation), values)
+    if levels is not None:
+        kwargs["levels"] = levels
+    if filled:
+        return ax.tricontourf(triangulation, values, **kwargs)
+    return ax.tricontour(triangulation, values, **kwargs)
+
+
+def contourf(data, scale, levels=None, ax=None, permutation=None,
+             boundary=True, **kwargs):
+    """
+    Draws filled contours of lattice data or of a function on the simplex.
+    See `contour` for the parameters.
+    """
+
+    return contour(data, scale, levels=levels, ax=ax, permutation=permutation,
+                   boundary=boundary, filled=True, **kwargs)
@@ -0,0 +1,287 @@
+"""
+Evaluation of functions at the lattice points of the simplex, e.g. for
+heatmapf, using symmetries of the function to skip equivalent points.
+"""
+
+import itertools
+
+import numpy as np
+
+from .helpers import dict_to_lattice, normalize, simplex_iterator
+from .interpolation import interpolate
+
+
+## Symmetries ##
+
+# Permutations of the coordinates, as in helpers.permute_point
+SYMMETRIES = {
+    "full": ["012", "021", "102", "120", "201", "210"],
+    "cyclic": ["012", "120", "201"],
+}
+SYMMETRIES["s3"] = SYMMETRIES["full"]
+SYMMETRIES["c3"] = SYMMETRIES["cyclic"]
+
+
+def _compose(p, q):
+    """The permutation applying q then p, in permute_point order."""
+    return tuple(q[p[i]] for i in range(3))
+
+
+def symmetry_group(symmetry):
+    """
+    Computes the group of permutations of the coordinates under which a
+    function is invariant.
+
+    Parameters
+    ----------
+    symmetry: string, sequence of strings or None
+        "full" (or "S3") for functions invariant under all permutations,
+        "cyclic" (or "C3") for rotations of the coordinates, two digits such
+        as "01" for the transposition of two coordinates, a permutation
+        string such as "120", or a list of these generating the group. None
+        means no symmetry.
+
+    Returns
+    -------
+    integer numpy array of shape (G, 3), one permutation per row, the first
+    row being the identity
+    """
+
+    if symmetry is None:
+        symmetry = []
+    elif isinstance(symmetry, str):
+        symmetry = [symmetry]
+    permutations = []
+    for generator in symmetry:
+        name = generator.lower()
+        if name in SYMMETRIES:
+            generators = SYMMETRIES[name]
+        elif len(name) == 2 and set(name) <= set("012") and name[0] != name[1]:
+            # A transposition of two coordinates
+            transposition = ["0", "1", "2"]
+            transposition[int(name[0])], transposition[int(name[1])] = name[1], name[0]
+            generators = ["".join(transposition)]
+        else:
+            generators = [name]
+        for permutation in generators:
+            permutation = tuple(int(c) for c in permutation if c.isdigit())
+            if sorted(permutation) != [0, 1, 2]:
+                raise ValueError("Invalid symmetry: %r" % (generator,))
+            permutations.append(permutation)
+
+    # Close the generators under composition
+    group = [(0, 1, 2)]
+    new = list(group)
+    while new:
+        found = []
+        for p, q in itertools.product(new, permutations):
+            r = _compose(p, q)
+            if r not in group and r not in found:
+                found.append(r)
+        group.extend(found)
+        new = found
+    return np.array(group)
+
+
+def canonical_points(points, symmetry=None):
+    """
+    Maps each lattice point to the representative of its orbit under the
+    symmetry group, the lexicographically largest of its permutations. The
+    representatives form the fundamental domain of the lattice, e.g. the
+    points with i >= j >= k for the full symmetry.
+
+    Parameters
+    ----------
+    points: integer array-like, shape (N, 3)
+        The lattice points.
+    symmetry: see `symmetry_group`
+
+    Returns
+    -------
+    integer numpy array of shape (N, 3)
+    """
+
+    points = np.asarray(points).reshape(-1, 3)
+    group = symmetry_group(symmetry)
+    if len(group) == 1 or not len(points):
+        return points
+    # All the images of the points, shape (N, G, 3), compared with one key
+    images = points[:, group]
+    base = points.max() + 1
+    keys = (images[..., 0] * base + images[..., 1]) * base + images[..., 2]
+    best = keys.argmax(axis=1)
+    return images[np.arange(len(points)), best]
+
+
+## Evaluation ##
+
+def evaluate_lattice(func, scale, boundary=True, symmetry=None):
+    """
+    Evaluates a function at the normalized lattice points of the simplex.
+    With a symmetry, the function is only evaluated at one point of each
+    orbit (the fundamental domain) and the other points take its value,
+    which for the full symmetry saves close to 6 times the evaluations.
+
+    Parameters
+    ----------
+    func: Function or LatticeEvaluator
+        A function of normalized 3-tuples, or an evaluator reusing the
+        values it has already computed (with its own symmetry).
+    scale: Integer
+        The scale of the lattice.
+    boundary: bool, True
+        Include the boundary points.
+    symmetry: see `symmetry_group`
+        The permutations of the coordinates leaving the function invariant.
+        This is not checked.
+
+    Returns
+    -------
+    dict mapping (i, j) to values, in the order of simplex_iterator
+    """
+
+    if isinstance(func, LatticeEvaluator):
+        return func.evaluate(scale, boundary=boundary)
+    points = list(simplex_iterator(scale=scale, boundary=boundary))
+    if symmetry is None:
+        return dict(((i, j), func(normalize([i, j, k]))) for i, j, k in points)
+    canonical = canonical_points(points, symmetry).tolist()
+    values = dict()
+    data = dict()
+    for (i, j, k), representative in zip(points, canonical):
+        representative = tuple(representative)
+        if representative not in values:
+            values[representative] = func(normalize(list(representative)))
+        data[(i, j)] = values[representative]
+    return data
+
+
+class LatticeEvaluator(object):
+    """
+    Evaluates a function on lattices of several scales, remembering the
+    values at the normalized points computed so far. The lattice of scale n
+    contains the lattices of the divisors of n, so refining a heatmap from
+    scale 50 to 100 only evaluates the 3825 new points of the 5151, and a
+    coarser lattice can be read from the values already computed.
+
+    Points are identified by the reduced fraction (i, j, k) / gcd(i, j, k)
+    of their coordinates, which is exact, after mapping them to their
+    representative under the symmetry of the function if any.
+
+    Evaluators can be passed to heatmapf (or contour) in place of the
+    function.
+    """
+
+    def __init__(self, func, symmetry=None):
+        self.func = func
+        self.symmetry = symmetry
+        # Values keyed by reduced canonical points
+        self._values = dict()
+        # Scales evaluated, with or without the boundary
+        self._scales = dict()
+        self.evaluations = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return "LatticeEvaluator(%d points, scales %s)" % (
+            len(self), sorted(self._scales))
+
+    def _points(self, scale, boundary=True):
+        points = list(simplex_iterator(scale=scale, boundary=boundary))
+        canonical = canonical_points(points, self.symmetry)
+        divisors = np.gcd.reduce(np.asarray(canonical).reshape(-1, 3), axis=1)
+        reduced = np.asarray(canonical) // divisors[:, np.newaxis]
+        return points, [tuple(key) for key in reduced.tolist()]
+
+    def missing(self, scale, boundary=True):
+        """Returns the number of evaluations needed for the given scale."""
+        points, keys = self._points(int(scale), boundary=boundary)
+        return len(set(keys).difference(self._values))
+
+    def evaluate(self, scale, boundary=True, stop=None):
+        """
+        Computes the values at the lattice points of the given scale,
+        evaluating the function only at the points not yet computed.
+
+        Parameters
+        ----------
+        scale: Integer
+            The scale of the lattice.
+        boundary: bool, True
+            Include the boundary points.
+        stop: threading.Event, None
+            Stop evaluating when set, e.g. from another thread. The values
+            computed so far are kept.
+
+        Returns
+        -------
+        dict mapping (i, j) to values, in the order of simplex_iterator, or
+        None if stopped
+        """
+
+        scale = int(scale)
+        points, keys = self._points(scale, boundary=boundary)
+        data = dict()
+        for (i, j, k), key in zip(points, keys):
+            if key not in self._values:
+                if stop is not None and stop.is_set():
+                    return None
+                self._values[key] = self.func(normalize(list(key)))
+                self.evaluations += 1
+            data[(i, j)] = self._values[key]
+        self._scales[scale] = self._scales.get(scale, False) or boundary
+        return data
+
+    def cached(self, scale, boundary=True):
+        """
+        Returns the values already computed at the lattice points of the
+        given scale, without evaluating the function.
+
+        Returns
+        -------
+        dict mapping (i, j) to values for the points with a value
+        """
+
+        points, keys = self._points(int(scale), boundary=boundary)
+        return dict(((i, j), self._values[key])
+                    for (i, j, k), key in zip(points, keys) if key in self._values)
+
+    def downsample(self, scale, boundary=True):
+        """
+        Computes the values at the lattice points of a scale without
+        evaluating the function: the points already computed keep their
+        value (all of them if scale divides an evaluated scale) and the
+        others are interpolated linearly in the finest evaluated lattice.
+
+        Parameters
+        ----------
+        scale: Integer
+            The scale of the lattice.
+        boundary: bool, True
+            Include the boundary points.
+
+        Returns
+        -------
+        dict mapping (i, j) to values for the points with a value
+        """
+
+        scale = int(scale)
+        if not self._scales:
+            raise ValueError("No lattice has been evaluated yet.")
+        data = self.cached(scale, boundary=boundary)
+        points = [(i, j, k) for i, j, k in simplex_iterator(scale=scale, boundary=boundary)
+                  if (i, j) not in data]
+        if points:
+            finest = max(self._scales)
+            lattice = dict_to_lattice(self.cached(finest), finest)
+            values = interpolate(np.array(points, dtype=float) / scale, lattice)
+            for (i, j, k), value in zip(points, values.tolist()):
+                if not np.isnan(value):
+                    data[(i, j)] = value
+            # Keep the order of simplex_iterator
+            data = dict(((i, j), data[(i, j)])
+                        for i, j, k in simplex_iterator(scale=scale, boundary=boundary)
+                        if (i, j) in data)
+        return data
@@ -5,9 +5,16 @@ Various Heatmaps.
 import functools
 import numpy as np
 from matplotlib import pyplot as plt
-
-from .helpers import unzip, normalize, simplex_iterator, permute_point, project_point
+from matplotlib.collections import PatchCollection, PolyCollection
+from matplotlib.colors import rgb2hex
+from matplotlib.patches import PathPatch, Polygon
+from matplotlib.path import Path
+from matplotlib.tri import Triangulation
+
+from .helpers import (unzip, permute_point, project_point, project_points,
+                      dict_to_lattice, SQRT3OVER2)
 from .colormapping import get_cmap, colormapper, colorbar_hack
+from .evaluation import evaluate_lattice
 
 ### Heatmap Triangulation Coordinates
 
@@ -135,6 +142,208 @@ def hexagon_coordinates(i, j, k):
     return np.array([center + x for x in deltas])
 
 
+## Lattice Triangulation ##
+
+@functools.lru_cache(maxsize=16)
+def lattice_triangulation(scale, permutation=None):
+    """
+    Computes the triangulation of the lattice points of the simplex, in the
+    order of `simplex_iterator` (with the boundary), into the upright and
+    upside-down triangles of the triangular heatmaps. Triangulations are
+    cached per scale and permutation and shared, so they must not be
+    modified (e.g. masked); see `masked_triangulation`.
+
+    Parameters
+    ----------
+    scale: Integer
+        The scale of the lattice.
+    permutation: string, None
+        A permutation of the coordinates
+
+    Returns
+    -------
+    matplotlib.tri.Triangulation of the projected lattice points
+    """
+
+    i, j = np.indices((scale + 1, scale + 1))
+    inside = i + j <= scale
+    # Vertex number of each lattice point, row-major as in simplex_iterator
+    index = np.full((scale + 1, scale + 1), -1)
+    index[inside] = np.arange(np.count_nonzero(inside))
+    points = np.column_stack([i[inside], j[inside], scale - i[inside] - j[inside]])
+    xy = project_points(points, permutation=permutation)
+
+    i, j = i[:-1, :-1], j[:-1, :-1]
+    up = i + j < scale
+    down = i + j < scale - 1
+    upright = np.column_stack([index[i[up], j[up]], index[i[up] + 1, j[up]],
+                               index[i[up], j[up] + 1]])
+    upside_down = np.column_stack([index[i[down] + 1, j[down]],
+                                   index[i[down] + 1, j[down] + 1],
+                                   index[i[down], j[down] + 1]])
+    triangles = np.concatenate([upright, upside_down])
+    return Triangulation(xy[:, 0], xy[:, 1], triangles)
+
+
+def lattice_values(data, scale, boundary=True):
+    """
+    Computes the values at the vertices of `lattice_triangulation`.
+
+    Parameters
+    ----------
+    data: dictionary, function or evaluation.LatticeEvaluator
+        A dictionary mapping (i, j) to values, or a function of normalized
+        3-tuples evaluated at the lattice points as in heatmapf.
+    scale: Integer
+        The scale of the lattice.
+    boundary: bool, True
+        Evaluate a function on the boundary points too. Otherwise their
+        values are NaN.
+
+    Returns
+    -------
+    numpy array of the values, NaN where there is no data
+    """
+
+    if not isinstance(data, dict):
+        data = evaluate_lattice(data, scale, boundary=boundary)
+    array = dict_to_lattice(data, scale)
+    i, j = np.indices(array.shape)
+    return array[i + j <= scale]
+
+
+def masked_triangulation(triangulation, values):
+    """
+    Returns the triangulation with the triangles touching a NaN value
+    masked out, or the triangulation itself if all values are finite.
+    """
+
+    invalid = ~np.isfinite(values)
+    if not invalid.any():
+        return triangulation
+    mask = invalid[triangulation.triangles].any(axis=1)
+    return Triangulation(triangulation.x, triangulation.y,
+                         triangulation.triangles, mask=mask)
+
+
+## Coalescing ##
+
+def _vertex_key(vertex):
+    """
+    Snaps a projected polygon vertex to integer coordinates. The vertices
+    of the heatmap polygons are at multiples of a third (triangles and
+    interior hexagons) or of a half (boundary hexagons) in lattice
+    coordinates, so at multiples of a sixth, and x = a + b / 2 and
+    y / (sqrt(3) / 2) = b are multiples of 1 / 12 and 1 / 6: (12 x,
+    6 y / (sqrt(3) / 2)) are integers.
+    """
+    return (int(round(12 * vertex[0])), int(round(6 * vertex[1] / SQRT3OVER2)))
+
+
+def _find(parents, n):
+    root = n
+    while parents[root] != root:
+        root = parents[root]
+    # Path compression
+    while parents[n] != root:
+        parents[n], n = root, parents[n]
+    return root
+
+
+def _trace_loops(edges):
+    """
+    Chains directed edges (u, v) into closed loops, dropping the vertices in
+    the middle of straight runs.
+    """
+
+    following = dict()
+    for u, v in edges:
+        following.setdefault(u, []).append(v)
+    loops = []
+    for start in list(following):
+        while following.get(start):
+            loop = [start]
+            vertex = following[start].pop()
+            while vertex != start:
+                loop.append(vertex)
+                vertex = following[vertex].pop()
+            # Remove collinear vertices, exactly on the integer keys
+            simplified = []
+            for n, (x, y) in enumerate(loop):
+                px, py = loop[n - 1]
+                nx, ny = loop[(n + 1) % len(loop)]
+                if (x - px) * (ny - y) - (y - py) * (nx - x) != 0:
+                    simplified.append((x, y))
+            loops.append(simplified)
+    return loops
+
+
+def coalesce_polygons(polygons, colors):
+    """
+    Merges adjacent polygons of the same color into larger polygons, with
+    union-find over the edges shared by the polygons of a heatmap. The
+    outline of each merged region is made of the edges of its polygons not
+    shared within the region, traced into loops: counterclockwise for the
+    outside and clockwise around holes, so that regions with holes fill
+    correctly with the nonzero rule.
+
+    Parameters
+    ----------
+    polygons: list of array-like, shape (M, 2)
+        The projected vertices of the heatmap polygons, e.g. from
+        polygon_generator.
+    colors: list of hashable colors
+        The color of each polygon, e.g. hex strings.
+
+    Returns
+    -------
+    list of (color, loops) regions, loops being lists of numpy arrays of
+    shape (M, 2) of projected vertices
+    """
+
+    cells = []
+    for vertices in polygons:
+        keys = [_vertex_key(vertex) for vertex in vertices]
+        # Orient every polygon counterclockwise
+        area = sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1)
+                   in zip(keys, keys[1:] + keys[:1]))
+        if area < 0:
+            keys.reverse()
+        cells.append(keys)
+
+    parents = list(range(len(cells)))
+    first = dict()
+    for n, keys in enumerate(cells):
+        for u, v in zip(keys, keys[1:] + keys[:1]):
+            edge = (u, v) if u < v else (v, u)
+            other = first.setdefault(edge, n)
+            if other != n and colors[other] == colors[n]:
+                parents[_find(parents, n)] = _find(parents, other)
+
+    # Directed edges of each region, where shared edges cancel out
+    regions = dict()
+    for n, keys in enumerate(cells):
+        edges = regions.setdefault(_find(parents, n), set())
+        for u, v in zip(keys, keys[1:] + keys[:1]):
+            if (v, u) in edges:
+                edges.remove((v, u))
+            else:
+                edges.add((u, v))
+
+    coalesced = []
+    scale = np.array([1. / 12, SQRT3OVER2 / 6.])
+    for root, edges in regions.items():
+        loops = [np.array(loop) * scale for loop in _trace_loops(edges)]
+        coalesced.append((colors[root], loops))
+    return coalesced
+
+
+def region_path(loops):
+    """Makes a compound matplotlib Path of the loops of a region."""
+    paths = [Path(np.vstack([loop, loop[:1]]), closed=True) for loop in loops]
+    return Path.make_compound_path(*paths)
+
+
 ## Heatmaps ##
 
 def polygon_generator(data, scale, style, permutation=None):
@@ -186,9 +395,27 @@ def polygon_generator(data, scale, style, permutation=None):
                 yield map(project, vertices), value
 
 
+def gouraud_heatmap(data, scale, vmin, vmax, cmap, ax, permutation=None):
+    """
+    Draws the lattice values as the vertex values of `lattice_triangulation`
+    with a single Gouraud-shaded tripcolor, so that the colors are
+    interpolated smoothly between the lattice points. Called by heatmap.
+    """
+
+    scale = int(scale)
+    values = lattice_values(data, scale)
+    triangulation = masked_triangulation(
+        lattice_triangulation(scale, permutation), values)
+    # Masked vertices are not drawn but must still be finite
+    values = np.where(np.isfinite(values), values, vmin)
+    return ax.tripcolor(triangulation, values, shading='gouraud', cmap=cmap,
+                        vmin=vmin, vmax=vmax)
+
+
 def heatmap(data, scale, vmin=None, vmax=None, cmap=None, ax=None,
             scientific=False, style='triangular', colorbar=True,
-            permutation=None, use_rgba=False, cbarlabel=None, cb_kwargs=None):
+            permutation=None, use_rgba=False, cbarlabel=None, cb_kwargs=None,
+            collection=False, coalesce=False, rasterized=False):
     """
     Plots heatmap of given color values.
 
@@ -210,7 +437,9 @@ def heatmap(data, scale, vmin=None, vmax=None, cmap=None, ax=None,
     scientific: Bool, False
         Whether to use scientific notation for colorbar numbers.
     style: String, "triangular"
-        The style of the heatmap, "triangular", "dual-triangular" or "hexagonal"
+        The style of the heatmap, "triangular", "dual-triangular",
+        "hexagonal" or "gouraud". The gouraud style interpolates the colors
+        smoothly between the lattice points.
     colorbar: bool, True
         Show colorbar.
     permutation: string, None
@@ -221,6 +450,17 @@ def heatmap(data, scale, vmin=None, vmax=None, cmap=None, ax=None,
         Text label for the colorbar
     cb_kwargs: dict
         dict of kwargs to pass to colorbar
+    collection: bool, False
+        Draw all the polygons as a single PolyCollection rather than one
+        patch each, which is much faster for large heatmaps.
+    coalesce: bool, False
+        Merge adjacent polygons of the same color into larger polygons (see
+        `coalesce_polygons`), drawn as a single collection. This shrinks
+        vector output for discrete colormaps.
+    rasterized: bool, False
+        Draw the heatmap as a single collection clipped to the simplex and
+        embedded as an image in vector output (PDF, SVG, EPS), at the dpi
+        of savefig, while the axes, labels and colorbar stay vector.
 
     Returns
     -------
@@ -241,23 +481,61 @@ def heatmap(data, scale, vmin=None, vmax=None, cmap=None, ax=None,
         if vmax is None:
             vmax = max(data.values())
     style = style.lower()[0]
-    if style not in ["t", "h", 'd']:
-        raise ValueError("Heatmap style must be 'triangular', 'dual-triangular', or 'hexagonal'")
-
-    vertices_values = polygon_generator(data, scale, style,
-                                        permutation=permutation)
+    if style not in ["t", "h", 'd', 'g']:
+        raise ValueError("Heatmap style must be 'triangular', 'dual-triangular', 'hexagonal' or 'gouraud'")
+
+    if style == 'g':
+        if use_rgba:
+            raise ValueError("The gouraud heatmap style does not support rgba values")
+        if coalesce:
+            raise ValueError("The gouraud heatmap style cannot be coalesced")
+        artist = gouraud_heatmap(data, scale, vmin, vmax, cmap, ax,
+                                 permutation=permutation)
+        vertices_values = []
+    else:
+        vertices_values = polygon_generator(data, scale, style,
+                                            permutation=permutation)
 
     # Draw the polygons and color them
+    if coalesce or rasterized:
+        # Rasterized as a single image rather than one per polygon
+        collection = True
+    polygons = []
+    colors = []
     for vertices, value in vertices_values:
         if value is None:
             continue
         if not use_rgba:
             color = colormapper(value, vmin, vmax, cmap=cmap)
+        elif coalesce:
+            color = rgb2hex(value, keep_alpha=True)
         else:
             color = value  # rgba tuple (r,g,b,a) all in [0,1]
+        if collection:
+            polygons.append(np.array(list(vertices)))
+            colors.append(color)
+            continue
         # Matplotlib wants a list of xs and a list of ys
         xs, ys = unzip(vertices)
         ax.fill(xs, ys, facecolor=color, edgecolor=color)
+    if coalesce:
+        regions = coalesce_polygons(polygons, colors)
+        patches = [PathPatch(region_path(loops)) for color, loops in regions]
+        colors = [color for color, loops in regions]
+        artist = ax.add_collection(PatchCollection(patches, facecolors=colors,
+                                                   edgecolors=colors))
+        ax.autoscale_view()
+    elif polygons:
+        artist = ax.add_collection(PolyCollection(polygons, facecolors=colors,
+                                                  edgecolors=colors))
+        ax.autoscale_view()
+    if rasterized and (style == 'g' or polygons):
+        # Dual-triangular heatmaps cover the simplex of side scale + 1
+        side = scale + 1 if style == 'd' else scale
+        corners = [project_point(p, permutation=permutation) for p in
+                   [(side, 0, 0), (0, side, 0), (0, 0, side)]]
+        artist.set_clip_path(Polygon(corners, closed=True, transform=ax.transData))
+        artist.set_rasterized(True)
 
     if not cb_kwargs:
         cb_kwargs = dict()
@@ -273,7 +551,8 @@ def heatmap(data, scale, vmin=None, vmax=None, cmap=None, ax=None,
 def heatmapf(func, scale=10, boundary=True, cmap=None, ax=None,
              scientific=False, style='triangular', colorbar=True,
              permutation=None, vmin=None, vmax=None, cbarlabel=None,
-             cb_kwargs=None):
+             cb_kwargs=None, collection=False, symmetry=None, coalesce=False,
+             rasterized=False):
     """
     Computes func on heatmap partition coordinates and plots heatmap. In other
     words, computes the function on lattice points of the simplex (normalized
@@ -281,8 +560,9 @@ def heatmapf(func, scale=10, boundary=True, cmap=None, ax=None,
 
     Parameters
     ----------
-    func: Function
-        A function of 3-tuples to be heatmapped
+    func: Function or evaluation.LatticeEvaluator
+        A function of 3-tuples to be heatmapped, or an evaluator reusing
+        the values computed at other scales
     scale: Integer
         The scale used to partition the simplex
     boundary: Bool, True
@@ -292,7 +572,8 @@ def heatmapf(func, scale=10, boundary=True, cmap=None, ax=None,
     ax: Matplotlib axis object, None
         The axis to draw the colormap on
     style: String, "triangular"
-        The style of the heatmap, "triangular", "dual-triangular" or "hexagonal"
+        The style of the heatmap, "triangular", "dual-triangular",
+        "hexagonal" or "gouraud"
     scientific: Bool, False
         Whether to use scientific notation for colorbar numbers.
     colorbar: bool, True
@@ -305,6 +586,17 @@ def heatmapf(func, scale=10, boundary=True, cmap=None, ax=None,
         The maximum color value, used to normalize colors.
     cb_kwargs: dict
         dict of kwargs to pass to colorbar
+    collection: bool, False
+        Draw all the polygons as a single PolyCollection.
+    symmetry: string, None
+        The permutations of the coordinates leaving func invariant, "full",
+        "cyclic" or a transposition such as "01", so that func is only
+        evaluated on the fundamental domain (see
+        `evaluation.evaluate_lattice`).
+    coalesce: bool, False
+        Merge adjacent polygons of the same color, see heatmap.
+    rasterized: bool, False
+        Embed the heatmap as an image in vector output, see heatmap.
 
     Returns
     -------
@@ -312,14 +604,14 @@ def heatmapf(func, scale=10, boundary=True, cmap=None, ax=None,
     """
 
     # Apply the function to a simplex partition
-    data = dict()
-    for i, j, k in simplex_iterator(scale=scale, boundary=boundary):
-        data[(i, j)] = func(normalize([i, j, k]))
+    data = evaluate_lattice(func, scale, boundary=boundary, symmetry=symmetry)
     # Pass everything to the heatmapper
     ax = heatmap(data, scale, cmap=cmap, ax=ax, style=style,
                  scientific=scientific, colorbar=colorbar,
                  permutation=permutation, vmin=vmin, vmax=vmax, 
-                 cbarlabel=cbarlabel, cb_kwargs=cb_kwargs)
+                 cbarlabel=cbarlabel, cb_kwargs=cb_kwargs,
+                 collection=collection, coalesce=coalesce,
+                 rasterized=rasterized)
     return ax
 
 
@@ -347,8 +639,32 @@ def svg_polygon(coordinates, color):
     return polygon
 
 
+def svg_region(loops, css_class):
+    """
+    Create an svg path for a region of coalesced polygons, see
+    `coalesce_polygons`.
+
+    Parameters
+    ----------
+    loops: list
+        The loops of coordinates outlining the region
+    css_class: string
+        The CSS class giving the color of the region
+
+    Returns
+    -------
+    string, the svg string for the path
+    """
+
+    commands = []
+    for loop in loops:
+        coords = " ".join(",".join(map(str, c)) for c in loop.tolist())
+        commands.append("M%sZ" % coords)
+    return '<path class="%s" d="%s"/>\n' % (css_class, "".join(commands))
+
+
 def svg_heatmap(data, scale, filename, vmax=None, vmin=None, style='h',
-                permutation=None, cmap=None):
+                permutation=None, cmap=None, coalesce=False):
     """
     Create a heatmap in SVG format. Intended for use with very large datasets,
     which would require large amounts of RAM using matplotlib. You can convert
@@ -376,6 +692,10 @@ def svg_heatmap(data, scale, filename, vmax=None, vmin=None, style='h',
         The style of the heatmap, "triangular", "dual-triangular" or "hexagonal"
     permutation: string, None
         A permutation of the coordinates
+    coalesce: bool, False
+        Merge adjacent polygons of the same color into one path per region
+        (see `coalesce_polygons`), with each color written once as a CSS
+        class. This shrinks the file for discrete colormaps.
     """
 
     style = style.lower()[0]
@@ -403,10 +723,27 @@ def svg_heatmap(data, scale, filename, vmax=None, vmin=None, style='h',
     vertices_values = polygon_generator(data, scale, style,
                                         permutation=permutation)
 
-    # Draw the polygons and color them
-    for vertices, value in vertices_values:
-        color = colormapper(value, vmin, vmax, cmap=cmap)
-        output_file.write(svg_polygon(vertices, color))
+    if coalesce:
+        polygons = []
+        colors = []
+        for vertices, value in vertices_values:
+            polygons.append(list(vertices))
+            colors.append(colormapper(value, vmin, vmax, cmap=cmap))
+        regions = coalesce_polygons(polygons, colors)
+        # Each color is written once, as a CSS class
+        classes = dict()
+        output_file.write('<style>\n')
+        for n, color in enumerate(sorted(set(colors))):
+            classes[color] = "c%d" % n
+            output_file.write('.c%d{fill:%s;stroke:none}\n' % (n, color))
+        output_file.write('</style>\n')
+        for color, loops in regions:
+            output_file.write(svg_region(loops, classes[color]))
+    else:
+        # Draw the polygons and color them
+        for vertices, value in vertices_values:
+            color = colormapper(value, vmin, vmax, cmap=cmap)
+            output_file.write(svg_polygon(vertices, color))
 
     output_file.write('</svg>\n')
 
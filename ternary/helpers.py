@@ -71,6 +71,61 @@ def simplex_iterator(scale, boundary=True):
             yield (i, j, k)
 
 
+def dict_to_lattice(data, scale):
+    """
+    Converts heatmap data, a dictionary mapping (i, j) or (i, j, k) to
+    values, to a lattice array.
+
+    Parameters
+    ----------
+    data: dict
+        The heatmap data.
+    scale: Int
+        The scale of the lattice.
+
+    Returns
+    -------
+    numpy array of shape (scale + 1, scale + 1) with A[i, j] the value at
+    (i, j, scale - i - j) and NaN where there is no data (including i + j >
+    scale)
+    """
+
+    array = np.full((scale + 1, scale + 1), np.nan)
+    for key, value in data.items():
+        if value is not None:
+            array[key[0], key[1]] = value
+    return array
+
+
+def lattice_to_dict(array, boundary=True):
+    """
+    Converts a lattice array (see `dict_to_lattice`) to heatmap data,
+    skipping NaN values.
+
+    Parameters
+    ----------
+    array: numpy array of shape (scale + 1, scale + 1)
+        The lattice values.
+    boundary: bool, True
+        Include the boundary points.
+
+    Returns
+    -------
+    dict mapping (i, j) to values
+    """
+
+    array = np.asarray(array, dtype=float)
+    scale = array.shape[0] - 1
+    i, j = np.indices(array.shape)
+    mask = (i + j <= scale) & ~np.isnan(array)
+    if not boundary:
+        mask &= (i > 0) & (j > 0) & (i + j < scale)
+    # Row-major order, the same order as simplex_iterator
+    i, j = np.nonzero(mask)
+    keys = zip(i.tolist(), j.tolist())
+    return dict(zip(keys, array[i, j].tolist()))
+
+
 ## Ternary Projections ##
 
 def permute_point(p, permutation=None):
@@ -143,6 +198,120 @@ def project_sequence(s, permutation=None):
     return xs, ys
 
 
+def project_points(points, permutation=None):
+    """
+    Vectorized version of `project_point` for many points at once.
+
+    Parameters
+    ----------
+    points: array-like, shape (N, 3)
+        The points to be projected.
+    permutation: string, None, equivalent to "012"
+        The order of the coordinates, counterclockwise from the origin
+
+    Returns
+    -------
+    numpy array of shape (N, 2) of the projected points
+    """
+
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    if permutation:
+        points = points[:, [int(i) for i in permutation]]
+    xy = np.empty((len(points), 2))
+    xy[:, 0] = points[:, 0] + points[:, 1] / 2.
+    xy[:, 1] = SQRT3OVER2 * points[:, 1]
+    return xy
+
+
+def unproject_points(xy, scale, permutation=None, limits=None, axisorder='blr'):
+    """
+    Vectorized inverse of `project_points`: maps planar points back to
+    ternary coordinates, undoing the permutation and, if given, the axis
+    limits conversion of `get_conversion`.
+
+    Parameters
+    ----------
+    xy: array-like, shape (N, 2)
+        The planar (data) points.
+    scale: Int
+        The scale of the simplex, giving the third coordinate.
+    permutation: string, None, equivalent to "012"
+        The order of the coordinates, counterclockwise from the origin
+    limits: dict, None
+        The axis limits as in `get_conversion`, to return data coordinates.
+    axisorder: String, 'blr'
+        The order of the axes for the coordinate tuples, if limits are given.
+
+    Returns
+    -------
+    numpy array of shape (N, 3) of the points
+    """
+
+    xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+    permuted = np.empty((len(xy), 3))
+    permuted[:, 1] = xy[:, 1] / SQRT3OVER2
+    permuted[:, 0] = xy[:, 0] - permuted[:, 1] / 2.
+    permuted[:, 2] = scale - permuted[:, 0] - permuted[:, 1]
+    if permutation:
+        points = np.empty_like(permuted)
+        points[:, [int(i) for i in permutation]] = permuted
+    else:
+        points = permuted
+    if limits:
+        for k, axis in enumerate(axisorder):
+            low, high = limits[axis]
+            points[:, k] = points[:, k] * (float(high - low) / scale) + low
+    return points
+
+
+def douglas_peucker(xy, tolerance):
+    """
+    Simplifies a planar polyline with the Douglas-Peucker algorithm, keeping
+    the points needed to stay within `tolerance` of the original curve.
+
+    Parameters
+    ----------
+    xy: array-like, shape (N, 2)
+        The (projected) points of the polyline.
+    tolerance: float
+        The maximum distance of any removed point to the simplified curve,
+        in the units of xy.
+
+    Returns
+    -------
+    numpy array of the indices of the points to keep, including both ends
+    """
+
+    xy = np.asarray(xy, dtype=float)
+    n = len(xy)
+    if n < 3 or not tolerance or tolerance <= 0:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        p0 = xy[start]
+        d = xy[end] - p0
+        inner = xy[start + 1:end] - p0
+        # Distance to the segment rather than to the line, so that curves
+        # doubling back on themselves are preserved
+        length2 = d.dot(d)
+        if length2 > 0:
+            t = np.clip(inner.dot(d) / length2, 0, 1)
+            inner = inner - t[:, np.newaxis] * d
+        distances = np.hypot(inner[:, 0], inner[:, 1])
+        i = np.argmax(distances)
+        if distances[i] > tolerance:
+            index = start + 1 + i
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return np.flatnonzero(keep)
+
+
 # Convert coordinates for custom plots with limits
 
 def convert_coordinates(q, conversion, axisorder):
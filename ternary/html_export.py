@@ -0,0 +1,274 @@
+"""
+Export of heatmaps and scatter plots as self-contained interactive HTML
+files, viewable offline in any browser.
+
+The lattice values and point coordinates are embedded as base64 encoded
+Float32 arrays, along with the scale, style, permutation and a 256 color
+lookup table of the colormap, and drawn on a canvas by a small inline
+script: the heatmap is rasterized pixel by pixel (locating each pixel in the
+lattice as `binning.locate_points` does), so the file size is proportional
+to the number of values and the drawing time to the number of pixels.
+Hovering shows the coordinates and the value under the cursor.
+"""
+
+import base64
+import html
+import json
+from string import Template
+
+import numpy as np
+
+from .binning import normalize_points
+from .colormapping import get_cmap
+from .helpers import dict_to_lattice
+
+
+HTML_STYLES = ("triangular", "hexagonal", "linear")
+
+_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>
+body { font-family: sans-serif; margin: 1em; }
+#readout { height: 1.5em; color: #333; }
+</style>
+</head>
+<body>
+<h3>$title</h3>
+<canvas id="ternary"></canvas>
+<div id="readout"></div>
+<script>
+var PLOT = $plot;
+(function () {
+  function decode(text, Type) {
+    if (!text) { return null; }
+    var raw = atob(text), bytes = new Uint8Array(raw.length);
+    for (var n = 0; n < raw.length; n++) { bytes[n] = raw.charCodeAt(n); }
+    return new Type(bytes.buffer);
+  }
+  var values = decode(PLOT.values, Float32Array);
+  var points = decode(PLOT.points, Float32Array);
+  var pointValues = decode(PLOT.point_values, Float32Array);
+  var lut = decode(PLOT.lut, Uint8Array);
+  var scale = PLOT.scale, perm = PLOT.permutation, H = Math.sqrt(3) / 2;
+  var width = PLOT.width, margin = PLOT.margin, side = width - 2 * margin;
+  var height = Math.ceil(side * H + 2 * margin);
+  var ratio = window.devicePixelRatio || 1;
+  var canvas = document.getElementById("ternary");
+  canvas.width = Math.round(width * ratio);
+  canvas.height = Math.round(height * ratio);
+  canvas.style.width = width + "px";
+  canvas.style.height = height + "px";
+  var ctx = canvas.getContext("2d");
+
+  // Index of (i, j) in the flat lattice values, row-major for i + j <= scale
+  var rows = new Int32Array(scale + 2);
+  for (var i = 1; i <= scale + 1; i++) { rows[i] = rows[i - 1] + scale + 2 - i; }
+  function value(i, j) { return values[rows[i] + j]; }
+
+  // Planar (canvas pixel) coordinates to normalized ternary coordinates
+  function unproject(px, py) {
+    var x = (px - margin) / side, y = (height - margin - py) / side;
+    var q = [0, 0, 0];
+    q[1] = y / H; q[0] = x - q[1] / 2; q[2] = 1 - q[0] - q[1];
+    var p = [0, 0, 0];
+    for (var k = 0; k < 3; k++) { p[perm[k]] = q[k]; }
+    return p;
+  }
+  function project(a, b, c) {
+    var p = [a, b, c], q = [p[perm[0]], p[perm[1]], p[perm[2]]];
+    return [margin + (q[0] + q[1] / 2) * side, height - margin - q[1] * H * side];
+  }
+  // The value of the heatmap at a point, as binning.locate_points
+  function lookup(p) {
+    if (p[0] < -1e-9 || p[1] < -1e-9 || p[2] < -1e-9) { return NaN; }
+    var u = p[0] * scale, v = p[1] * scale;
+    var i = Math.min(Math.max(Math.floor(u), 0), scale - 1);
+    var j = Math.min(Math.max(Math.floor(v), 0), scale - 1 - i);
+    var fu = u - i, fv = v - j, w, c;
+    if (fu + fv <= 1 || i + j == scale - 1) {
+      w = [1 - fu - fv, fu, fv];
+      c = [value(i, j), value(i + 1, j), value(i, j + 1)];
+    } else {
+      w = [fu + fv - 1, 1 - fv, 1 - fu];
+      c = [value(i + 1, j + 1), value(i + 1, j), value(i, j + 1)];
+    }
+    if (PLOT.style == "hexagonal") {
+      var best = w[0] >= w[1] ? (w[0] >= w[2] ? 0 : 2) : (w[1] >= w[2] ? 1 : 2);
+      return c[best];
+    }
+    if (PLOT.style == "linear") { return w[0] * c[0] + w[1] * c[1] + w[2] * c[2]; }
+    return (c[0] + c[1] + c[2]) / 3;
+  }
+  function color(v) {
+    var t = (v - PLOT.vmin) / ((PLOT.vmax - PLOT.vmin) || 1);
+    return 4 * Math.min(Math.max(Math.floor(t * 255.999), 0), 255);
+  }
+
+  ctx.scale(ratio, ratio);
+  if (values) {
+    var image = ctx.createImageData(canvas.width, canvas.height), data = image.data;
+    for (var py = 0; py < canvas.height; py++) {
+      for (var px = 0; px < canvas.width; px++) {
+        var v = lookup(unproject((px + 0.5) / ratio, (py + 0.5) / ratio));
+        if (isNaN(v)) { continue; }
+        var o = 4 * (py * canvas.width + px), l = color(v);
+        data[o] = lut[l]; data[o + 1] = lut[l + 1];
+        data[o + 2] = lut[l + 2]; data[o + 3] = lut[l + 3];
+      }
+    }
+    ctx.putImageData(image, 0, 0);
+  }
+  if (points) {
+    for (var n = 0; n < points.length / 2; n++) {
+      var a = points[2 * n], b = points[2 * n + 1], xy = project(a, b, 1 - a - b);
+      if (pointValues) {
+        var l = color(pointValues[n]);
+        ctx.fillStyle = "rgba(" + lut[l] + "," + lut[l + 1] + "," + lut[l + 2] + "," + lut[l + 3] / 255 + ")";
+      } else {
+        ctx.fillStyle = PLOT.color;
+      }
+      ctx.beginPath();
+      ctx.arc(xy[0], xy[1], PLOT.point_size, 0, 2 * Math.PI);
+      ctx.fill();
+    }
+  }
+  ctx.strokeStyle = "black";
+  ctx.beginPath();
+  var corners = [project(1, 0, 0), project(0, 1, 0), project(0, 0, 1)];
+  ctx.moveTo(corners[0][0], corners[0][1]);
+  ctx.lineTo(corners[1][0], corners[1][1]);
+  ctx.lineTo(corners[2][0], corners[2][1]);
+  ctx.closePath();
+  ctx.stroke();
+
+  var readout = document.getElementById("readout");
+  canvas.addEventListener("mousemove", function (event) {
+    var rect = canvas.getBoundingClientRect();
+    var p = unproject(event.clientX - rect.left, event.clientY - rect.top);
+    if (p[0] < 0 || p[1] < 0 || p[2] < 0) { readout.textContent = ""; return; }
+    var text = p.map(function (x) { return (x * PLOT.axis_scale).toFixed(3); }).join(", ");
+    if (values) { text += " : " + lookup(p).toPrecision(4); }
+    readout.textContent = text;
+  });
+})();
+</script>
+</body>
+</html>
+""")
+
+
+def _encode(array, dtype):
+    """Encodes an array as base64 text of its raw little-endian bytes."""
+    array = np.ascontiguousarray(array, dtype=np.dtype(dtype).newbyteorder("<"))
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+
+def color_lut(cmap=None, size=256):
+    """Computes a lookup table of the colormap, as uint8 RGBA rows."""
+    return get_cmap(cmap)(np.linspace(0, 1, size), bytes=True)
+
+
+def export_html(filename=None, data=None, scale=None, points=None,
+                values=None, style="triangular", permutation=None, cmap=None,
+                vmin=None, vmax=None, title="", width=600, point_size=3,
+                color="black"):
+    """
+    Exports a heatmap and / or a scatter plot as a self-contained HTML page,
+    see the module documentation.
+
+    Parameters
+    ----------
+    filename: string, None
+        The file to write. The page is returned in any case.
+    data: dictionary or numpy array, None
+        Heatmap data mapping (i, j) to values, or a lattice array of shape
+        (scale + 1, scale + 1) as from `helpers.dict_to_lattice`.
+    scale: Int, None
+        The scale of the lattice, required for dictionary data, and of the
+        coordinates shown for the cursor (1 by default).
+    points: array-like, shape (N, 3), None
+        Points of a scatter plot, normalized or at any scale.
+    values: array-like of length N, None
+        Values of the points, colored with the colormap.
+    style: string, "triangular"
+        "triangular" colors the triangles of the lattice with the average
+        of their vertices, "hexagonal" with the nearest lattice point and
+        "linear" interpolates linearly.
+    permutation: string, None
+        A permutation of the coordinates
+    cmap: String or matplotlib.colors.Colormap, None
+        The name of the Matplotlib colormap to use.
+    vmin: float, None
+        The minimum color value, the minimum of the values by default.
+    vmax: float, None
+        The maximum color value, the maximum of the values by default.
+    title: string, ""
+        The title of the page.
+    width: int, 600
+        The width of the canvas in CSS pixels.
+    point_size: float, 3
+        The radius of the points in CSS pixels.
+    color: string, "black"
+        The CSS color of points without values.
+
+    Returns
+    -------
+    string, the HTML page
+    """
+
+    if style not in HTML_STYLES:
+        raise ValueError("style must be one of %s" % ", ".join(HTML_STYLES))
+    if data is None and points is None:
+        raise ValueError("There is nothing to export.")
+    plot = {"style": style, "width": int(width), "margin": 10,
+            "permutation": [int(c) for c in (permutation or "012")],
+            "lut": _encode(color_lut(cmap), np.uint8), "values": None,
+            "points": None, "point_values": None, "point_size": point_size,
+            "color": color, "scale": 1, "axis_scale": scale or 1}
+    ranges = []
+    if data is not None:
+        if isinstance(data, dict):
+            if scale is None:
+                raise ValueError("The scale must be given for dictionary data.")
+            array = dict_to_lattice(data, int(scale))
+        else:
+            array = np.asarray(data, dtype=float)
+            if array.ndim != 2 or array.shape[0] != array.shape[1]:
+                raise ValueError("Lattice arrays must have shape (scale + 1, scale + 1).")
+        lattice_scale = array.shape[0] - 1
+        if lattice_scale < 1:
+            raise ValueError("The scale must be at least 1.")
+        i, j = np.indices(array.shape)
+        lattice = array[i + j <= lattice_scale]
+        plot["scale"] = lattice_scale
+        plot["axis_scale"] = scale or lattice_scale
+        plot["values"] = _encode(lattice, np.float32)
+        ranges.append(lattice)
+    if points is not None:
+        normalized = normalize_points(points)
+        plot["points"] = _encode(normalized[:, :2], np.float32)
+        if values is not None:
+            values = np.asarray(values, dtype=float).ravel()
+            if len(values) != len(normalized):
+                raise ValueError("There must be one value per point.")
+            plot["point_values"] = _encode(values, np.float32)
+            ranges.append(values)
+    if ranges:
+        ranges = np.concatenate(ranges)
+        finite = ranges[np.isfinite(ranges)]
+        if vmin is None:
+            vmin = float(finite.min()) if len(finite) else 0.
+        if vmax is None:
+            vmax = float(finite.max()) if len(finite) else 1.
+    plot["vmin"] = vmin or 0.
+    plot["vmax"] = 1. if vmax is None else vmax
+
+    page = _TEMPLATE.substitute(title=html.escape(title),
+                               plot=json.dumps(plot).replace("</", "<\\/"))
+    if filename:
+        with open(filename, 'w') as output_file:
+            output_file.write(page)
+    return page
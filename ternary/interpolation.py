@@ -0,0 +1,204 @@
+"""
+Interpolation between lattice data and arbitrary points on the simplex.
+"""
+
+import numpy as np
+from matplotlib.tri import Triangulation
+
+from .binning import locate_points, normalize_points
+from .helpers import dict_to_lattice, lattice_to_dict, project_points
+from .spatial import GridIndex
+
+
+RESAMPLE_METHODS = ("nearest", "linear", "idw")
+
+
+def _lattice_array(data, scale=None):
+    """Returns heatmap data or a lattice array as a lattice array."""
+    if isinstance(data, dict):
+        if scale is None:
+            raise ValueError("The scale must be given for dictionary data.")
+        return dict_to_lattice(data, int(scale))
+    array = np.asarray(data, dtype=float)
+    if array.ndim != 2 or array.shape[0] != array.shape[1]:
+        raise ValueError("Lattice arrays must have shape (scale + 1, scale + 1).")
+    if scale is not None and array.shape[0] != int(scale) + 1:
+        raise ValueError("The lattice array does not match the scale.")
+    return array
+
+
+def interpolate(points, data, scale=None, return_cells=False):
+    """
+    Interpolates lattice data at arbitrary points with barycentric (linear)
+    interpolation in the triangles of the lattice. Points are located with
+    `binning.locate_points` in a single vectorized pass.
+
+    Parameters
+    ----------
+    points: array-like, shape (N, 3)
+        The points, normalized or at any scale.
+    data: dictionary or numpy array
+        Heatmap data mapping (i, j) to values, or a lattice array of shape
+        (scale + 1, scale + 1) as from `helpers.dict_to_lattice`.
+    scale: Int, None
+        The scale of the lattice, required for dictionary data.
+    return_cells: bool, False
+        Also return the index of the triangle containing each point, e.g. to
+        pick heatmap cells (see `binning.locate_points`).
+
+    Returns
+    -------
+    values: numpy array of length N, NaN for points outside of the simplex
+    or in triangles with missing data
+    cells: integer numpy array of length N, if return_cells
+    """
+
+    array = _lattice_array(data, scale)
+    scale = array.shape[0] - 1
+    cells, vertices, weights = locate_points(points, scale)
+    valid = cells >= 0
+    # Points outside of the simplex get negative weights
+    outside = ~(weights >= -1e-9).all(axis=1)
+    cells[outside] = -1
+    vertices[~valid] = 0
+    values = (weights * array[vertices[..., 0], vertices[..., 1]]).sum(axis=1)
+    values[outside] = np.nan
+    if return_cells:
+        return values, cells
+    return values
+
+
+## Scattered Data ##
+
+def _unique_samples(points, values):
+    """Averages the values of samples at the same position."""
+    order = np.lexsort(points.T[::-1])
+    points = points[order]
+    new = np.ones(len(points), dtype=bool)
+    new[1:] = (np.diff(points, axis=0) != 0).any(axis=1)
+    groups = np.cumsum(new) - 1
+    values = np.bincount(groups, weights=values[order]) / np.bincount(groups)
+    return points[new], values
+
+
+def _rasterize_triangles(uv, triangles, scale):
+    """
+    Finds the lattice points inside each triangle of points given in
+    lattice coordinates (u, v) = (i, j), by testing the lattice points in
+    the bounding box of each triangle.
+
+    Returns
+    -------
+    triangle, i, j, weights: the triangle index, the lattice point and its
+    barycentric coordinates for each lattice point in a triangle. Lattice
+    points on shared edges may be listed more than once.
+    """
+
+    corners = uv[triangles]
+    low = np.maximum(np.ceil(corners.min(axis=1) - 1e-9), 0).astype(int)
+    high = np.minimum(np.floor(corners.max(axis=1) + 1e-9), scale).astype(int)
+    sizes = np.maximum(high - low + 1, 0)
+    counts = sizes[:, 0] * sizes[:, 1]
+    owners = np.repeat(np.arange(len(triangles)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    i = low[owners, 0] + offsets // sizes[owners, 1]
+    j = low[owners, 1] + offsets % sizes[owners, 1]
+
+    # Barycentric coordinates of the lattice points
+    a, b, c = corners[owners, 0], corners[owners, 1], corners[owners, 2]
+    v0 = b - a
+    v1 = c - a
+    v2 = np.column_stack([i, j]) - a
+    det = v0[:, 0] * v1[:, 1] - v0[:, 1] * v1[:, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wb = (v2[:, 0] * v1[:, 1] - v2[:, 1] * v1[:, 0]) / det
+        wc = (v0[:, 0] * v2[:, 1] - v0[:, 1] * v2[:, 0]) / det
+    weights = np.column_stack([1 - wb - wc, wb, wc])
+    inside = (weights >= -1e-9).all(axis=1) & (i + j <= scale)
+    return owners[inside], i[inside], j[inside], weights[inside]
+
+
+def resample(points, values, scale, method="linear", k=8, power=2.,
+             max_distance=None, boundary=True):
+    """
+    Interpolates values measured at scattered points of the simplex to the
+    lattice points, e.g. to make a heatmap of irregular data. Points are
+    compared in the projected plane of the normalized simplex, where the
+    side of the triangle is 1.
+
+    Parameters
+    ----------
+    points: array-like, shape (N, 3)
+        The sample points, normalized or at any scale.
+    values: array-like of length N
+        The values at the sample points. NaN values are ignored.
+    scale: Int
+        The scale of the lattice.
+    method: string, "linear"
+        "nearest" takes the value of the nearest sample, "linear"
+        interpolates linearly in the Delaunay triangulation of the samples
+        (so only within their convex hull) and "idw" averages the k nearest
+        samples weighted by the inverse distance to the given power.
+    k: int, 8
+        The number of neighbours for "idw".
+    power: float, 2.
+        The power of the inverse distance weights for "idw".
+    max_distance: float, None
+        For "nearest" and "idw", only use samples within this distance.
+    boundary: bool, True
+        Include the boundary points.
+
+    Returns
+    -------
+    dict mapping (i, j) to values for the lattice points with a value, for
+    use with heatmap
+    """
+
+    if method not in RESAMPLE_METHODS:
+        raise ValueError("method must be one of %s" % ", ".join(RESAMPLE_METHODS))
+    scale = int(scale)
+    values = np.asarray(values, dtype=float).ravel()
+    points = normalize_points(points)
+    if len(points) != len(values):
+        raise ValueError("There must be one value per point.")
+    valid = ~np.isnan(points).any(axis=1) & ~np.isnan(values)
+    points, values = _unique_samples(points[valid], values[valid])
+    xy = project_points(points)
+
+    array = np.full((scale + 1, scale + 1), np.nan)
+    i, j = np.indices(array.shape)
+    inside = i + j <= scale
+    lattice = np.column_stack([i[inside], j[inside], scale - i[inside] - j[inside]])
+    targets = project_points(lattice / float(scale))
+    if len(values) == 0:
+        return dict()
+    if method == "linear":
+        if len(values) < 3:
+            raise ValueError("Linear interpolation needs at least 3 points.")
+        # Delaunay triangulation in the plane, but barycentric coordinates
+        # are affine invariant so the lattice points are found in lattice
+        # coordinates
+        triangles = Triangulation(xy[:, 0], xy[:, 1]).triangles
+        owners, i, j, weights = _rasterize_triangles(points[:, :2] * scale,
+                                                      triangles, scale)
+        array[i, j] = (weights * values[triangles[owners]]).sum(axis=1)
+    else:
+        if max_distance is None:
+            max_distance = np.inf
+        index = GridIndex(xy)
+        if method == "nearest":
+            k = 1
+        distances, indices = index.nearest(targets, k=k, max_distance=max_distance)
+        found = indices >= 0
+        neighbours = np.where(found, values[np.maximum(indices, 0)], 0)
+        if method == "nearest":
+            result = np.where(found[:, 0], neighbours[:, 0], np.nan)
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                weights = np.where(found, distances ** -float(power), 0)
+                result = (weights * neighbours).sum(axis=1) / weights.sum(axis=1)
+            # Lattice points on a sample take its value
+            exact = found[:, 0] & (distances[:, 0] == 0)
+            result[exact] = neighbours[exact, 0]
+        array[inside] = result
+    return lattice_to_dict(array, boundary=boundary)
@@ -0,0 +1,162 @@
+"""
+Kernel density estimation on the simplex, evaluated on the heatmap lattice.
+"""
+
+import numpy as np
+
+from .binning import histogram
+from .helpers import lattice_to_dict
+
+
+def lattice_kernel(bandwidth, scale, truncate=4.):
+    """
+    Computes a Gaussian kernel on the triangular lattice.
+
+    Parameters
+    ----------
+    bandwidth: float
+        The standard deviation of the kernel, relative to the side of the
+        simplex.
+    scale: Int
+        The scale of the lattice.
+    truncate: float, 4.
+        The kernel is truncated at this many standard deviations.
+
+    Returns
+    -------
+    numpy array of shape (2R + 1, 2R + 1) with K[R + di, R + dj] the kernel
+    density (per unit area of the normalized simplex) at lattice offset
+    (di, dj, -di - dj)
+    """
+
+    h = bandwidth * scale
+    radius = int(np.ceil(truncate * h))
+    di, dj = np.indices((2 * radius + 1, 2 * radius + 1)) - radius
+    # Squared planar distance between lattice points, in lattice units
+    d2 = di ** 2 + di * dj + dj ** 2
+    return np.exp(-d2 / (2. * h * h)) / (2 * np.pi * bandwidth ** 2)
+
+
+def _fold(scale, radius):
+    """
+    Computes where each point of a lattice extended by radius on all sides
+    lands after repeated reflection in the edges of the simplex.
+
+    Returns
+    -------
+    flat indices into the (scale + 1) x (scale + 1) lattice, -1 if the point
+    is still outside after a few reflections (far beyond a corner)
+    """
+
+    size = scale + 1 + 2 * radius
+    i, j = np.indices((size, size)) - radius
+    k = scale - i - j
+    for _ in range(6):
+        # Reflection in the edge i = 0 maps (i, j, k) to (-i, j + i, k + i)
+        outside = i < 0
+        i, j, k = (np.where(outside, -i, i), np.where(outside, j + i, j),
+                   np.where(outside, k + i, k))
+        outside = j < 0
+        i, j, k = (np.where(outside, i + j, i), np.where(outside, -j, j),
+                   np.where(outside, k + j, k))
+        outside = k < 0
+        i, j, k = (np.where(outside, i + k, i), np.where(outside, j + k, j),
+                   np.where(outside, -k, k))
+    inside = (i >= 0) & (j >= 0) & (k >= 0)
+    return np.where(inside, i * (scale + 1) + j, -1)
+
+
+def smooth_lattice(counts, bandwidth, reflect=True, truncate=4.):
+    """
+    Convolves a lattice array of (weighted) sample counts with a Gaussian
+    kernel using FFTs.
+
+    Parameters
+    ----------
+    counts: numpy array of shape (scale + 1, scale + 1)
+        Counts at the lattice points, e.g. from `LatticeHistogram.array`.
+        NaN entries (outside the simplex) are ignored.
+    bandwidth: float
+        The standard deviation of the kernel, relative to the side of the
+        simplex.
+    reflect: bool, True
+        Reflect the kernel mass falling outside of the simplex at its edges,
+        to avoid the bias towards zero of the density at the boundary.
+    truncate: float, 4.
+        The kernel is truncated at this many standard deviations.
+
+    Returns
+    -------
+    numpy array of shape (scale + 1, scale + 1) of the smoothed counts
+    times the kernel density, NaN outside of the simplex
+    """
+
+    counts = np.nan_to_num(np.asarray(counts, dtype=float))
+    n = counts.shape[0]
+    scale = n - 1
+    i, j = np.indices(counts.shape)
+    counts[i + j > scale] = 0
+    kernel = lattice_kernel(bandwidth, scale, truncate=truncate)
+    radius = (kernel.shape[0] - 1) // 2
+
+    # Linear convolution of the counts with the kernel. Entry (R + i, R + j)
+    # of the full convolution is the density at lattice point (i, j).
+    size = n + 2 * radius
+    fft_shape = (size, size)
+    convolved = np.fft.irfft2(np.fft.rfft2(counts, fft_shape) *
+                              np.fft.rfft2(kernel, fft_shape), fft_shape)
+
+    if reflect:
+        # Fold the density outside of the simplex back inside. This adds
+        # the density of the reflected samples to each lattice point.
+        targets = _fold(scale, radius).ravel()
+        valid = targets >= 0
+        smoothed = np.bincount(targets[valid], weights=convolved.ravel()[valid],
+                               minlength=n * n).reshape(n, n)
+        # Points on the edges are their own reflections: the density at an
+        # edge is twice the unreflected density, six times at a corner.
+        k = scale - i - j
+        on_edges = (i == 0).astype(int) + (j == 0) + (k == 0)
+        smoothed *= np.choose(np.minimum(on_edges, 2), [1, 2, 6])
+    else:
+        smoothed = convolved[radius:radius + n, radius:radius + n]
+    smoothed[i + j > scale] = np.nan
+    return smoothed
+
+
+def simplex_kde(points, scale, bandwidth=0.05, weights=None, reflect=True,
+                boundary=True):
+    """
+    Estimates the density of samples on the simplex with a Gaussian kernel,
+    evaluated at the lattice points for use with heatmap. The samples are
+    binned to the lattice and convolved with the kernel by FFT, so the cost
+    is linear in the number of samples plus O(scale^2 log(scale)).
+
+    Parameters
+    ----------
+    points: array-like of shape (N, 3), an iterable of such arrays or a
+            LatticeHistogram
+        The samples (normalized, so compositions or points at any scale).
+    scale: Int
+        The scale of the lattice. The samples are binned at this scale, which
+        should be fine compared to the bandwidth.
+    bandwidth: float, 0.05
+        The standard deviation of the kernel, relative to the side of the
+        simplex.
+    weights: array-like of length N, None
+        Weights of the samples, if points is a single array.
+    reflect: bool, True
+        Reflect the kernel at the edges of the simplex.
+    boundary: bool, True
+        Include the boundary points in the result.
+
+    Returns
+    -------
+    dict mapping (i, j) to the density (per unit area of the simplex with
+    unit sides) at lattice point (i, j, scale - i - j)
+    """
+
+    lattice_histogram = histogram(points, scale, weights=weights)
+    counts = lattice_histogram.array(density=True)
+    density = smooth_lattice(counts, bandwidth, reflect=reflect)
+    return lattice_to_dict(density, boundary=boundary)
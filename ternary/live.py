@@ -0,0 +1,231 @@
+"""
+Live scatter plots and trajectories of streaming points, with a fixed memory
+footprint and redrawn by blitting.
+"""
+
+import numpy as np
+
+from .helpers import project_points
+
+
+class RingBuffer(object):
+    """
+    Fixed capacity buffer of rows keeping the most recent ones. Appending is
+    vectorized and writes into a preallocated array.
+    """
+
+    def __init__(self, capacity, width=2):
+        self.capacity = int(capacity)
+        if self.capacity < 1:
+            raise ValueError("The capacity must be positive.")
+        self._data = np.zeros((self.capacity, width))
+        # Position of the next row to write and number of rows stored
+        self._end = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return "RingBuffer(%d / %d)" % (self._size, self.capacity)
+
+    def append(self, rows):
+        """Appends rows, dropping the oldest ones if the buffer is full."""
+        rows = np.asarray(rows, dtype=float).reshape(-1, self._data.shape[1])
+        rows = rows[-self.capacity:]
+        n = len(rows)
+        first = min(n, self.capacity - self._end)
+        self._data[self._end:self._end + first] = rows[:first]
+        self._data[:n - first] = rows[first:]
+        self._end = (self._end + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+
+    def clear(self):
+        self._end = 0
+        self._size = 0
+
+    def array(self):
+        """Returns the stored rows, oldest first."""
+        if self._size < self.capacity:
+            return self._data[:self._size].copy()
+        return np.concatenate([self._data[self._end:], self._data[:self._end]])
+
+
+class LiveDisplay(object):
+    """
+    Redraws the live artists of a TernaryAxesSubplot by blitting: everything
+    else (boundary, gridlines, labels, static data) is cached as the
+    background on each full draw of the figure, and updates only restore
+    the background and draw the live artists on top.
+    """
+
+    def __init__(self, tax):
+        self.tax = tax
+        self.artists = []
+        self._background = None
+        canvas = tax.get_figure().canvas
+        self._connection = canvas.mpl_connect('draw_event', self._on_draw)
+
+    def __repr__(self):
+        return "LiveDisplay(%d artists)" % len(self.artists)
+
+    def add(self, artist):
+        """Adds an animated artist, drawn on every update."""
+        artist.set_animated(True)
+        self.artists.append(artist)
+
+    def _on_draw(self, event):
+        # Vector backends (PDF, SVG, ...) used by savefig cannot blit, and
+        # draw the animated artists themselves
+        canvas = event.canvas
+        if not getattr(canvas, "supports_blit", False) or not hasattr(canvas, "copy_from_bbox"):
+            return
+        figure = self.tax.get_figure()
+        self._background = canvas.copy_from_bbox(figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        ax = self.tax.get_axes()
+        for artist in sorted(self.artists, key=lambda a: a.get_zorder()):
+            ax.draw_artist(artist)
+
+    def update(self):
+        """Redraws the live artists over the cached background."""
+        figure = self.tax.get_figure()
+        canvas = figure.canvas
+        if not canvas.supports_blit:
+            canvas.draw_idle()
+            return
+        if self._background is None:
+            # The full draw caches the background and draws the artists
+            canvas.draw()
+        else:
+            canvas.restore_region(self._background)
+            self._draw_artists()
+        canvas.blit(figure.bbox)
+        canvas.flush_events()
+
+    def disconnect(self):
+        """Stops caching the background."""
+        self.tax.get_figure().canvas.mpl_disconnect(self._connection)
+
+
+class LiveScatter(object):
+    """
+    Scatter plot of the most recent points of a stream, see
+    `TernaryAxesSubplot.live_scatter`.
+    """
+
+    def __init__(self, display, artist, capacity, permutation=None):
+        self.display = display
+        self.artist = artist
+        self.permutation = permutation
+        self._points = RingBuffer(capacity, width=3)
+        self._xy = RingBuffer(capacity, width=2)
+        self._values = None
+
+    def __len__(self):
+        return len(self._points)
+
+    def __repr__(self):
+        return "LiveScatter(%d / %d points)" % (len(self), self._points.capacity)
+
+    def points(self):
+        """Returns the points shown, oldest first."""
+        return self._points.array()
+
+    def append(self, points, values=None, update=True):
+        """
+        Appends points, dropping the oldest ones beyond the capacity.
+
+        Parameters
+        ----------
+        points: array-like, shape (N, 3)
+            The new points.
+        values: array-like of length N, None
+            Values mapped to colors with the colormap of the plot.
+        update: bool, True
+            Redraw the live artists now.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if values is not None:
+            values = np.asarray(values, dtype=float).ravel()
+            if len(values) != len(points):
+                raise ValueError("There must be one value per point.")
+            if self._values is None:
+                # The points shown so far have no value
+                self._values = RingBuffer(self._points.capacity, width=1)
+                self._values.append(np.full(len(self._points), np.nan))
+            self._values.append(values)
+        elif self._values is not None:
+            self._values.append(np.full(len(points), np.nan))
+        self._points.append(points)
+        self._xy.append(project_points(points, permutation=self.permutation))
+        self.artist.set_offsets(self._xy.array())
+        if self._values is not None:
+            self.artist.set_array(self._values.array().ravel())
+        if update:
+            self.display.update()
+
+    def clear(self, update=True):
+        """Removes all the points."""
+        self._points.clear()
+        self._xy.clear()
+        if self._values is not None:
+            self._values.clear()
+            self.artist.set_array(np.zeros(0))
+        self.artist.set_offsets(np.zeros((0, 2)))
+        if update:
+            self.display.update()
+
+
+class LiveTrajectory(object):
+    """
+    Line through the most recent points of a stream, see
+    `TernaryAxesSubplot.live_plot`.
+    """
+
+    def __init__(self, display, artist, capacity, permutation=None):
+        self.display = display
+        self.artist = artist
+        self.permutation = permutation
+        self._points = RingBuffer(capacity, width=3)
+        self._xy = RingBuffer(capacity, width=2)
+
+    def __len__(self):
+        return len(self._points)
+
+    def __repr__(self):
+        return "LiveTrajectory(%d / %d points)" % (len(self), self._points.capacity)
+
+    def points(self):
+        """Returns the points shown, oldest first."""
+        return self._points.array()
+
+    def append(self, points, update=True):
+        """
+        Appends points to the trajectory, dropping the oldest ones beyond
+        the capacity.
+
+        Parameters
+        ----------
+        points: array-like, shape (N, 3)
+            The new points.
+        update: bool, True
+            Redraw the live artists now.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self._points.append(points)
+        self._xy.append(project_points(points, permutation=self.permutation))
+        xy = self._xy.array()
+        self.artist.set_data(xy[:, 0], xy[:, 1])
+        if update:
+            self.display.update()
+
+    def clear(self, update=True):
+        """Removes all the points."""
+        self._points.clear()
+        self._xy.clear()
+        self.artist.set_data([], [])
+        if update:
+            self.display.update()
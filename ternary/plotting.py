@@ -6,7 +6,7 @@ import matplotlib
 from matplotlib import pyplot as plt
 import numpy as np
 
-from .helpers import project_sequence
+from .helpers import douglas_peucker, project_points
 from .colormapping import get_cmap, colorbar_hack
 
 
@@ -50,7 +50,7 @@ def clear_matplotlib_ticks(ax=None, axis="both"):
 
 ## Curve Plotting ##
 
-def plot(points, ax=None, permutation=None, **kwargs):
+def plot(points, ax=None, permutation=None, tolerance=None, **kwargs):
     """
     Analogous to maplotlib.plot. Plots trajectory points where each point is a
     tuple (x,y,z) satisfying x + y + z = scale (not checked). The tuples are
@@ -62,18 +62,27 @@ def plot(points, ax=None, permutation=None, **kwargs):
         The list of tuples to be plotted as a connected curve.
     ax: Matplotlib AxesSubplot, None
         The subplot to draw on.
+    tolerance: float, None
+        If given, the curve is simplified (Douglas-Peucker) so that no
+        removed point is further than tolerance from the plotted curve, in
+        projected units of the scale.
     kwargs:
         Any kwargs to pass through to matplotlib.
     """
     if not ax:
         fig, ax = plt.subplots()
-    xs, ys = project_sequence(points, permutation=permutation)
-    ax.plot(xs, ys, **kwargs)
+    if not isinstance(points, np.ndarray):
+        # Generators and other iterators of points
+        points = list(points)
+    xy = project_points(points, permutation=permutation)
+    if tolerance:
+        xy = xy[douglas_peucker(xy, tolerance)]
+    ax.plot(xy[:, 0], xy[:, 1], **kwargs)
     return ax
 
 
 def plot_colored_trajectory(points, cmap=None, ax=None, permutation=None,
-                            **kwargs):
+                            tolerance=None, **kwargs):
     """
     Plots trajectories with changing color, simlar to `plot`. Trajectory points
     are tuples (x,y,z) satisfying x + y + z = scale (not checked). The tuples are
@@ -87,35 +96,180 @@ def plot_colored_trajectory(points, cmap=None, ax=None, permutation=None,
         The subplot to draw on.
     cmap: String or matplotlib.colors.Colormap, None
         The name of the Matplotlib colormap to use.
+    tolerance: float, None
+        If given, the curve is simplified (Douglas-Peucker) so that no
+        removed point is further than tolerance from the plotted curve, in
+        projected units of the scale. Colors still follow the original steps.
     kwargs:
         Any kwargs to pass through to matplotlib.
     """
     if not ax:
         fig, ax = plt.subplots()
     cmap = get_cmap(cmap)
-    xs, ys = project_sequence(points, permutation=permutation)
-
-    # We want to color each segment independently...which is annoying.
-    segments = []
-    for i in range(len(xs) - 1):
-        cur_line = []
-        x_before = xs[i]
-        y_before = ys[i]
-        x_after = xs[i+1]
-        y_after = ys[i+1]
-
-        cur_line.append([x_before, y_before])
-        cur_line.append([x_after, y_after])
-        segments.append(cur_line)
-    segments = np.array(segments)
+    if not isinstance(points, np.ndarray):
+        # Generators and other iterators of points
+        points = list(points)
+    xy = project_points(points, permutation=permutation)
+    steps = np.arange(len(xy))
+    if tolerance:
+        steps = douglas_peucker(xy, tolerance)
+        xy = xy[steps]
+
+    # We want to color each segment independently: segment i joins points i
+    # and i + 1, so pair the points with the points shifted by one.
+    segments = np.stack([xy[:-1], xy[1:]], axis=1)
 
     line_segments = matplotlib.collections.LineCollection(segments, cmap=cmap, **kwargs)
-    line_segments.set_array(np.arange(len(segments)))
+    line_segments.set_array(steps[:-1])
     ax.add_collection(line_segments)
 
     return ax
 
 
+def trajectory_offsets(trajectories, offsets=None):
+    """
+    Concatenates trajectories given as a ragged collection of point arrays,
+    or as one array with offsets.
+
+    Parameters
+    ----------
+    trajectories: list of arrays of shape (n_i, 3), or an array of shape (N, 3)
+        The trajectories, or all their points one after the other.
+    offsets: array-like of ints, None
+        Required if trajectories is a single array: the index of the first
+        point of each trajectory, optionally followed by N.
+
+    Returns
+    -------
+    points, bounds: the (N, 3) array of all points and the M + 1 indices
+    delimiting the M trajectories
+    """
+
+    if offsets is None:
+        arrays = [np.asarray(t, dtype=float).reshape(-1, 3) for t in trajectories]
+        lengths = [len(a) for a in arrays]
+        points = np.concatenate(arrays) if arrays else np.empty((0, 3))
+        bounds = np.concatenate([[0], np.cumsum(lengths)]).astype(int)
+        return points, bounds
+    points = np.asarray(trajectories, dtype=float).reshape(-1, 3)
+    bounds = np.asarray(offsets, dtype=int)
+    if len(bounds) == 0 or bounds[-1] != len(points):
+        bounds = np.append(bounds, len(points))
+    if np.any(np.diff(bounds) < 0) or bounds[0] < 0:
+        raise ValueError("Trajectory offsets must be increasing and within the points.")
+    return points, bounds
+
+
+def plot_trajectories(trajectories, offsets=None, ax=None, permutation=None,
+                      colors=None, values=None, cmap=None, tolerance=None,
+                      **kwargs):
+    """
+    Plots many trajectories as a single LineCollection, projecting all the
+    points at once. Points are tuples (x,y,z) satisfying x + y + z = scale
+    (not checked).
+
+    Parameters
+    ----------
+    trajectories: list of arrays of shape (n_i, 3), or an array of shape (N, 3)
+        The trajectories, or all their points one after the other with
+        `offsets` giving the start of each trajectory.
+    offsets: array-like of ints, None
+        The index of the first point of each trajectory if trajectories is a
+        single array.
+    ax: Matplotlib AxesSubplot, None
+        The subplot to draw on.
+    colors: color or list of colors, None
+        A color for all the trajectories or one color per trajectory.
+    values: array-like or "step", None
+        Values mapped to colors with cmap: one per trajectory, one per
+        segment (in the order of the points, N - M in total without empty
+        trajectories) or "step" to color each segment by its step along its
+        trajectory. Values that could be either raise a ValueError.
+    cmap: String or matplotlib.colors.Colormap, None
+        The name of the Matplotlib colormap to use with values.
+    tolerance: float, None
+        If given, each trajectory is simplified (Douglas-Peucker) so that no
+        removed point is further than tolerance from the plotted curve, in
+        projected units of the scale. Per-segment values are not supported
+        together with tolerance.
+    kwargs:
+        Any kwargs to pass through to matplotlib.collections.LineCollection.
+
+    Returns
+    -------
+    ax: The matplotlib axis
+    """
+    if not ax:
+        fig, ax = plt.subplots()
+    points, bounds = trajectory_offsets(trajectories, offsets=offsets)
+    xy = project_points(points, permutation=permutation)
+    lengths = np.diff(bounds)
+    num_trajectories = len(lengths)
+    num_segments = int(np.maximum(lengths - 1, 0).sum())
+    # Empty trajectories draw nothing but keep their values and colors
+    trajectory_ids = np.flatnonzero(lengths)
+    lengths = lengths[trajectory_ids]
+    bounds = np.concatenate([[0], np.cumsum(lengths)]).astype(int)
+    # Step of every point along its trajectory
+    steps = np.arange(len(xy)) - np.repeat(bounds[:-1], lengths)
+
+    step_colors = isinstance(values, str)
+    if step_colors and values != "step":
+        raise ValueError("values must be an array or 'step'")
+    if values is not None and not step_colors:
+        values = np.asarray(values, dtype=float)
+        if (len(values) == num_trajectories == num_segments
+                and not np.all(lengths == 2)):
+            raise ValueError("values is ambiguous: there are as many "
+                             "trajectories as segments.")
+        if len(values) == num_trajectories:
+            per_segment = False
+        elif len(values) == num_segments:
+            per_segment = True
+            if tolerance:
+                raise ValueError("Per-segment values cannot be used with tolerance.")
+        else:
+            raise ValueError("values must have one entry per trajectory or per segment.")
+    else:
+        per_segment = step_colors
+
+    if tolerance:
+        kept = [bounds[i] + douglas_peucker(xy[bounds[i]:bounds[i + 1]], tolerance)
+                for i in range(len(trajectory_ids))]
+        lengths = np.array([len(k) for k in kept], dtype=int)
+        kept = np.concatenate(kept) if kept else np.empty(0, dtype=int)
+        xy = xy[kept]
+        steps = steps[kept]
+        bounds = np.concatenate([[0], np.cumsum(lengths)]).astype(int)
+
+    if per_segment:
+        # Segment i joins points i and i + 1, except across trajectories
+        valid = np.ones(max(len(xy) - 1, 0), dtype=bool)
+        valid[bounds[1:-1] - 1] = False
+        lines = np.stack([xy[:-1][valid], xy[1:][valid]], axis=1)
+    else:
+        # One polyline per trajectory is much cheaper than one per segment
+        lines = np.split(xy, bounds[1:-1])
+
+    collection = matplotlib.collections.LineCollection(lines, **kwargs)
+    if values is not None:
+        collection.set_cmap(get_cmap(cmap))
+        if step_colors:
+            collection.set_array(steps[:-1][valid])
+        elif per_segment:
+            collection.set_array(values)
+        else:
+            collection.set_array(values[trajectory_ids])
+    elif colors is not None:
+        if not matplotlib.colors.is_color_like(colors):
+            # One color per trajectory
+            colors = matplotlib.colors.to_rgba_array(colors)[trajectory_ids]
+        collection.set_color(colors)
+    ax.add_collection(collection)
+
+    return ax
+
+
 def scatter(points, ax=None, permutation=None, colorbar=False, colormap=None,
             vmin=0, vmax=1, scientific=False, cbarlabel=None, cb_kwargs=None,
             **kwargs):
@@ -144,8 +298,11 @@ def scatter(points, ax=None, permutation=None, colorbar=False, colormap=None,
     """
     if not ax:
         fig, ax = plt.subplots()
-    xs, ys = project_sequence(points, permutation=permutation)
-    ax.scatter(xs, ys, vmin=vmin, vmax=vmax, cmap=colormap, **kwargs)
+    if not isinstance(points, np.ndarray):
+        # Generators and other iterators of points
+        points = list(points)
+    xy = project_points(points, permutation=permutation)
+    ax.scatter(xy[:, 0], xy[:, 1], vmin=vmin, vmax=vmax, cmap=colormap, **kwargs)
 
     if colorbar and (colormap != None):
         if cb_kwargs != None:
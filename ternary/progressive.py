@@ -0,0 +1,190 @@
+"""
+Progressive heatmaps of slow functions, evaluated coarse to fine in the
+background and redrawn in place after each level.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import numpy as np
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import Normalize
+
+from .colormapping import get_cmap
+from .evaluation import LatticeEvaluator
+from .heatmapping import polygon_generator
+
+
+def _largest_divisor(scale, bound):
+    """Returns the largest divisor of scale not greater than bound."""
+    for divisor in range(min(int(bound), scale), 0, -1):
+        if scale % divisor == 0:
+            return divisor
+    return 0
+
+
+def refinement_levels(scale, levels=4):
+    """
+    Computes the scales of a coarse to fine evaluation, roughly halving the
+    scale from the full scale. Each level is the largest divisor of the scale
+    not greater than scale / 2 ** n, so that its lattice points are points of
+    the final lattice and their values are reused, e.g. 10, 25, 50, 100 for
+    4 levels of 100. If that divisor is less than half of scale / 2 ** n,
+    e.g. for prime scales, the level is scale // 2 ** n instead, whose few
+    points are not reused: 12, 25, 50, 101 for 4 levels of 101. Levels
+    coarser than scale 1 are skipped.
+
+    Parameters
+    ----------
+    scale: Integer
+        The final scale.
+    levels: int or list of Integers, 4
+        The number of levels, or the scales themselves.
+
+    Returns
+    -------
+    sorted list of the distinct scales, ending with the final scale
+    """
+
+    scale = int(scale)
+    if isinstance(levels, int):
+        if levels < 1:
+            raise ValueError("There must be at least one level.")
+        targets = [scale / 2. ** n for n in range(levels)]
+        levels = [_largest_divisor(scale, target) for target in targets]
+        # Divisors too sparse for a useful preview
+        levels = [level if 2 * level >= target else int(target)
+                  for level, target in zip(levels, targets)]
+    scales = sorted(set(int(level) for level in levels if 0 < level <= scale))
+    if not scales or scales[-1] != scale:
+        scales.append(scale)
+    return scales
+
+
+class ProgressiveHeatmap(object):
+    """
+    Heatmap of a function evaluated at increasing scales in a background
+    thread, see `TernaryAxesSubplot.progressive_heatmapf`. The values of the
+    coarser levels are reused by the finer ones (see
+    `evaluation.LatticeEvaluator`). The heatmap is a single PolyCollection
+    updated in place with the finest level computed, by `update` from the
+    main thread (called periodically by a timer of the canvas if the backend
+    supports it).
+    """
+
+    def __init__(self, func, scale, ax, levels=4, boundary=True,
+                 style='triangular', cmap=None, vmin=None, vmax=None,
+                 permutation=None, symmetry=None, colorbar=True,
+                 executor=None, interval=200):
+        style = style.lower()[0]
+        if style not in ["t", "h", "d"]:
+            raise ValueError("Progressive heatmap style must be 'triangular', 'dual-triangular' or 'hexagonal'")
+        self.scale = int(scale)
+        self.levels = refinement_levels(self.scale, levels)
+        self.ax = ax
+        self.boundary = boundary
+        self.style = style
+        self.permutation = permutation
+        self._limits = (vmin, vmax)
+        if isinstance(func, LatticeEvaluator):
+            self.evaluator = func
+        else:
+            self.evaluator = LatticeEvaluator(func, symmetry=symmetry)
+
+        self.collection = PolyCollection([], cmap=get_cmap(cmap),
+                                         norm=Normalize(vmin, vmax),
+                                         edgecolors='face')
+        ax.add_collection(self.collection)
+        self.colorbar = None
+        if colorbar:
+            self.colorbar = ax.get_figure().colorbar(self.collection, ax=ax)
+
+        # Scale shown, and finest level computed with its values
+        self.shown = None
+        self._result = None
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1)
+            self.future = executor.submit(self._run)
+            executor.shutdown(wait=False)
+        else:
+            self.future = executor.submit(self._run)
+        self._timer = None
+        if interval:
+            self._timer = ax.get_figure().canvas.new_timer(interval=interval)
+            self._timer.add_callback(self._poll)
+            self._timer.start()
+
+    def __repr__(self):
+        return "ProgressiveHeatmap(scale %s of %s)" % (self.shown, self.levels)
+
+    def _run(self):
+        for level in self.levels:
+            data = self.evaluator.evaluate(level, boundary=self.boundary,
+                                           stop=self._cancelled)
+            if data is None:
+                return False
+            with self._lock:
+                self._result = (level, data)
+        return True
+
+    def cancel(self):
+        """Stops the evaluation after the current point."""
+        self._cancelled.set()
+        if self._timer is not None:
+            self._timer.stop()
+
+    def done(self):
+        """Returns whether the evaluation has finished or was cancelled."""
+        return self.future.done()
+
+    def wait(self, timeout=None):
+        """
+        Waits for the evaluation to finish and returns True if all the
+        levels were computed. Exceptions of the function are raised here.
+        """
+        return self.future.result(timeout=timeout)
+
+    def _poll(self):
+        done = self.done()
+        self.update()
+        if done:
+            self._timer.stop()
+
+    def update(self, draw=True):
+        """
+        Shows the finest level computed if it is not shown yet.
+
+        Returns
+        -------
+        The scale shown, None if no level has been computed
+        """
+
+        with self._lock:
+            result = self._result
+        if result is None or result[0] == self.shown:
+            return self.shown
+        level, data = result
+        data = dict((key, value) for key, value in data.items() if value is not None)
+        # Polygons of the coarse lattice, stretched to the full scale
+        stretch = self.scale / float(level)
+        polygons = []
+        values = []
+        for vertices, value in polygon_generator(data, level, self.style,
+                                                 permutation=self.permutation):
+            if value is None:
+                continue
+            polygons.append(np.array(list(vertices)) * stretch)
+            values.append(value)
+        self.collection.set_verts(polygons)
+        self.collection.set_array(np.array(values, dtype=float))
+        # Color limits of the lattice values, as in heatmap
+        vmin, vmax = self._limits
+        if data:
+            self.collection.set_clim(min(data.values()) if vmin is None else vmin,
+                                     max(data.values()) if vmax is None else vmax)
+        self.shown = level
+        if draw:
+            self.ax.get_figure().canvas.draw_idle()
+        return level
@@ -0,0 +1,251 @@
+"""
+Merging of deferred TernaryAxesSubplot calls into as few matplotlib artists
+as possible.
+"""
+
+import inspect
+
+import matplotlib
+from matplotlib.collections import LineCollection
+import numpy as np
+
+from .helpers import douglas_peucker, project_points
+from .lines import merge_dicts
+
+
+# Style kwargs of lines that a LineCollection can reproduce
+LINE_STYLE_ALIASES = {
+    "c": "color",
+    "lw": "linewidth",
+    "ls": "linestyle",
+    "aa": "antialiased",
+}
+LINE_STYLE_KEYS = ("color", "linewidth", "linestyle", "alpha", "zorder",
+                   "antialiased")
+
+# Scatter kwargs that may hold one value per point
+SCATTER_ARRAY_KEYS = ("c", "s")
+# One of these must be given so that merging does not change the colors
+# taken from the color cycle
+SCATTER_COLOR_KEYS = ("c", "color", "facecolor", "facecolors")
+
+
+def _freeze(kwargs):
+    """Returns the sorted items of kwargs, or None if not all hashable."""
+    items = tuple(sorted(kwargs.items()))
+    try:
+        hash(items)
+    except TypeError:
+        return None
+    return items
+
+
+def _bind(tax, method, args, kwargs):
+    """Binds a call to the parameters of the TernaryAxesSubplot method."""
+    bound = inspect.signature(method).bind(tax, *args, **kwargs)
+    arguments = dict(bound.arguments)
+    arguments.pop("self", None)
+    extra = dict(arguments.pop("kwargs", {}))
+    return arguments, extra
+
+
+def line_call(tax, method, args, kwargs):
+    """
+    Computes the projected polyline and the style of a line-like call
+    (line, horizontal_line, left_parallel_line, right_parallel_line, plot).
+
+    Returns
+    -------
+    (style, xy) or None if the call cannot be merged
+    """
+
+    name = method.__name__
+    arguments, style = _bind(tax, method, args, kwargs)
+    tolerance = style.pop("tolerance", None)
+    style = dict((LINE_STYLE_ALIASES.get(k, k), v) for k, v in style.items())
+    if not set(style).issubset(LINE_STYLE_KEYS):
+        # e.g. markers or labels
+        return None
+    scale = tax.get_scale()
+    permutation = None
+    if name == "line":
+        points = [arguments["p1"], arguments["p2"]]
+    elif name == "horizontal_line":
+        i = arguments["i"]
+        points = [(0, i, scale - i), (scale - i, i, 0)]
+    elif name == "left_parallel_line":
+        i = arguments["i"]
+        points = [(i, scale - i, 0), (i, 0, scale - i)]
+    elif name == "right_parallel_line":
+        i = arguments["i"]
+        points = [(0, scale - i, i), (scale - i, 0, i)]
+    elif name == "plot":
+        # Lines drawn by plot take their color from the color cycle
+        if "color" not in style:
+            return None
+        points = arguments["points"]
+        permutation = tax._permutation
+    else:
+        return None
+    if "color" not in style:
+        style["color"] = matplotlib.rcParams["lines.color"]
+    style = _freeze(style)
+    if style is None:
+        return None
+    xy = project_points(points, permutation=permutation)
+    if tolerance:
+        xy = xy[douglas_peucker(xy, tolerance)]
+    return style, xy
+
+
+def gridlines_call(tax, method, args, kwargs):
+    """
+    Computes the projected lines and their styles for a gridlines call, as
+    drawn by `lines.gridlines`.
+
+    Returns
+    -------
+    list of (style, xy) or None if the call cannot be merged
+    """
+
+    arguments, extra = _bind(tax, method, args, kwargs)
+    if "linewidth" not in extra:
+        extra["linewidth"] = 0.5
+    if "linestyle" not in extra:
+        extra["linestyle"] = ':'
+    multiple = arguments.get("multiple") or 1.
+    scale = tax.get_scale()
+    calls = []
+    for name, indices in [("horizontal_line", np.arange(0, scale, multiple)),
+                          ("left_parallel_line", np.arange(0, scale + multiple, multiple)),
+                          ("right_parallel_line", np.arange(0, scale + multiple, multiple))]:
+        style = merge_dicts(extra, arguments.get(name.split('_')[0] + "_kwargs"))
+        line_method = getattr(type(tax), name)
+        for i in indices:
+            merged = line_call(tax, inspect.unwrap(line_method), (i,), style)
+            if merged is None:
+                return None
+            calls.append(merged)
+    return calls
+
+
+def scatter_call(tax, method, args, kwargs):
+    """
+    Splits a scatter call into a grouping key, its points and its per-point
+    arrays.
+
+    Returns
+    -------
+    (key, points, arrays) or None if the call cannot be merged
+    """
+
+    arguments, extra = _bind(tax, method, args, kwargs)
+    if arguments.get("colorbar") or arguments.get("index"):
+        return None
+    if not any(k in extra for k in SCATTER_COLOR_KEYS) or "label" in extra:
+        return None
+    points = np.asarray(arguments["points"], dtype=float).reshape(-1, 3)
+    c = extra.get("c")
+    if (c is not None and not isinstance(c, str) and np.ndim(c) == 1
+            and np.asarray(c).dtype.kind in "biuf" and "norm" not in extra):
+        # Values mapped to colors, which must not depend on the values of the
+        # other calls of the group (the defaults of plotting.scatter are fixed)
+        if None in (extra.get("vmin", 0), extra.get("vmax", 1)):
+            return None
+    arrays = dict()
+    for k in SCATTER_ARRAY_KEYS:
+        value = extra.get(k)
+        if value is not None and not isinstance(value, str) and np.ndim(value) > 0:
+            value = np.asarray(value)
+            if len(value) != len(points) or value.ndim != 1:
+                return None
+            arrays[k] = extra.pop(k)
+    del arguments["points"]
+    arguments.update(extra)
+    key = _freeze(arguments)
+    if key is None:
+        return None
+    return (key, tuple(sorted(arrays))), points, arrays
+
+
+def draw_lines(ax, style, polylines):
+    """Draws polylines with a single LineCollection."""
+    kwargs = dict(style)
+    collection = LineCollection(
+        polylines,
+        colors=kwargs.pop("color"),
+        linewidths=kwargs.pop("linewidth", None),
+        linestyles=kwargs.pop("linestyle", "solid"),
+        antialiaseds=kwargs.pop("antialiased", None),
+        capstyle=matplotlib.rcParams["lines.solid_capstyle"],
+        joinstyle=matplotlib.rcParams["lines.solid_joinstyle"],
+        # The default zorder of Line2D
+        zorder=kwargs.pop("zorder", 2),
+        **kwargs)
+    ax.add_collection(collection)
+    return collection
+
+
+def flush_calls(tax, calls):
+    """
+    Executes deferred TernaryAxesSubplot calls. Lines and scatters with
+    compatible styles are merged into a single collection each, drawn at the
+    position of the first call of the group; heatmaps are drawn as a single
+    PolyCollection; other calls are executed as they are.
+
+    Parameters
+    ----------
+    tax: TernaryAxesSubplot
+    calls: list of (method, args, kwargs)
+    """
+
+    # Ordered list of groups: ("call", (method, args, kwargs)),
+    # ("lines", style, polylines) or ("scatter", key, points, arrays)
+    groups = []
+    lines = dict()
+    scatters = dict()
+    for method, args, kwargs in calls:
+        name = method.__name__
+        merged = None
+        if name in ("line", "horizontal_line", "left_parallel_line",
+                    "right_parallel_line", "plot", "gridlines"):
+            if name == "gridlines":
+                merged = gridlines_call(tax, method, args, kwargs)
+            else:
+                merged = line_call(tax, method, args, kwargs)
+                if merged is not None:
+                    merged = [merged]
+            for style, xy in merged or []:
+                if style not in lines:
+                    lines[style] = ["lines", style, []]
+                    groups.append(lines[style])
+                lines[style][2].append(xy)
+        elif name == "scatter":
+            merged = scatter_call(tax, method, args, kwargs)
+            if merged is not None:
+                key, points, arrays = merged
+                if key not in scatters:
+                    scatters[key] = ["scatter", key, [], []]
+                    groups.append(scatters[key])
+                scatters[key][2].append(points)
+                scatters[key][3].append(arrays)
+        elif name in ("heatmap", "heatmapf"):
+            kwargs = dict(kwargs)
+            kwargs.setdefault("collection", True)
+        if merged is None:
+            groups.append(["call", (method, args, kwargs)])
+
+    ax = tax.get_axes()
+    for group in groups:
+        if group[0] == "call":
+            method, args, kwargs = group[1]
+            tax._execute(method, args, kwargs)
+        elif group[0] == "lines":
+            draw_lines(ax, group[1], group[2])
+        else:
+            (key, array_keys), points, arrays = group[1:]
+            kwargs = dict(key)
+            for k in array_keys:
+                kwargs[k] = np.concatenate([a[k] for a in arrays])
+            method = type(tax).scatter
+            tax._execute(method, (np.concatenate(points),), kwargs)
@@ -0,0 +1,201 @@
+"""
+Selection of plotted points by lasso (polygon) or by linear inequality
+constraints on their ternary coordinates.
+"""
+
+import ast
+from collections import namedtuple
+import operator
+
+import numpy as np
+
+from .helpers import project_points
+
+
+ScatterSelection = namedtuple('ScatterSelection', ['artist', 'indices', 'points'])
+
+# Names of the coordinates in constraints
+COORDINATE_NAMES = ("a", "b", "c")
+
+_COMPARISONS = {
+    ast.Lt: (1, True),
+    ast.LtE: (1, False),
+    ast.Gt: (-1, True),
+    ast.GtE: (-1, False),
+}
+
+
+## Constraints ##
+
+def _linear(node):
+    """
+    Evaluates a linear expression of the coordinates.
+
+    Returns
+    -------
+    (coefficients, constant): the expression is coefficients . (a, b, c) +
+    constant
+    """
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return np.zeros(3), float(node.value)
+    if isinstance(node, ast.Name) and node.id in COORDINATE_NAMES:
+        coefficients = np.zeros(3)
+        coefficients[COORDINATE_NAMES.index(node.id)] = 1.
+        return coefficients, 0.
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        coefficients, constant = _linear(node.operand)
+        sign = -1. if isinstance(node.op, ast.USub) else 1.
+        return sign * coefficients, sign * constant
+    if isinstance(node, ast.BinOp):
+        left = _linear(node.left)
+        right = _linear(node.right)
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            op = operator.add if isinstance(node.op, ast.Add) else operator.sub
+            return op(left[0], right[0]), op(left[1], right[1])
+        if isinstance(node.op, ast.Mult):
+            if not left[0].any():
+                return left[1] * right[0], left[1] * right[1]
+            if not right[0].any():
+                return right[1] * left[0], right[1] * left[1]
+        if isinstance(node.op, ast.Div) and not right[0].any():
+            return left[0] / right[1], left[1] / right[1]
+    raise ValueError("Constraints must be linear in %s: %s" % (
+        ", ".join(COORDINATE_NAMES), ast.dump(node)))
+
+
+def parse_constraints(constraints):
+    """
+    Parses linear inequality constraints on the coordinates (a, b, c) of
+    points, such as "a < 0.3", "b > c", "0.2 <= a + b <= 0.5" or
+    "a < 0.3 and b > c".
+
+    Parameters
+    ----------
+    constraints: string or list of strings
+        The constraints, all of which must hold.
+
+    Returns
+    -------
+    list of (coefficients, constant, strict) half-planes, meaning that
+    coefficients . (a, b, c) + constant < 0 (<= 0 if not strict)
+    """
+
+    if isinstance(constraints, str):
+        constraints = [constraints]
+    half_planes = []
+    for constraint in constraints:
+        try:
+            tree = ast.parse(constraint, mode="eval").body
+        except SyntaxError:
+            raise ValueError("Invalid constraint: %r" % constraint)
+        if isinstance(tree, ast.BoolOp) and isinstance(tree.op, ast.And):
+            comparisons = tree.values
+        else:
+            comparisons = [tree]
+        for comparison in comparisons:
+            if not isinstance(comparison, ast.Compare):
+                raise ValueError("Invalid constraint: %r" % constraint)
+            operands = [comparison.left] + comparison.comparators
+            for op, left, right in zip(comparison.ops, operands[:-1], operands[1:]):
+                if type(op) not in _COMPARISONS:
+                    raise ValueError("Constraints must use <, <=, > or >=: %r" % constraint)
+                sign, strict = _COMPARISONS[type(op)]
+                left = _linear(left)
+                right = _linear(right)
+                half_planes.append((sign * (left[0] - right[0]),
+                                    sign * (left[1] - right[1]), strict))
+    return half_planes
+
+
+def constraint_mask(points, constraints, normalize=True):
+    """
+    Tests which points satisfy linear inequality constraints, see
+    `parse_constraints`, with one vectorized test per half-plane.
+
+    Parameters
+    ----------
+    points: array-like, shape (N, 3)
+        The points.
+    constraints: string or list of strings
+        The constraints on the coordinates a, b and c.
+    normalize: bool, True
+        Test the normalized coordinates, so that "a < 0.3" means a fraction
+        less than 0.3 for points at any scale.
+
+    Returns
+    -------
+    boolean numpy array of length N
+    """
+
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    if normalize:
+        # Multiply the constraints by the sums rather than dividing the
+        # points, which needs positive sums
+        sums = points.sum(axis=1)
+        mask = sums > 0
+    else:
+        sums = 1.
+        mask = np.ones(len(points), dtype=bool)
+    for coefficients, constant, strict in parse_constraints(constraints):
+        values = points.dot(coefficients) + constant * sums
+        if strict:
+            mask &= values < 0
+        else:
+            mask &= values <= 0
+    return mask
+
+
+## Selection ##
+
+def select_points(scatter_index, lasso=None, polygon=None, constraints=None,
+                  permutation=None, normalize=True):
+    """
+    Selects the points of an indexed scatter plot (see
+    `spatial.ScatterIndex`) inside a lasso or polygon and satisfying
+    constraints. All the given conditions must hold.
+
+    Parameters
+    ----------
+    scatter_index: spatial.ScatterIndex
+        The index of the scatter plot.
+    lasso: array-like, shape (M, 2), None
+        The vertices of a lasso in data coordinates, e.g. from a matplotlib
+        LassoSelector.
+    polygon: array-like, shape (M, 3), None
+        The vertices of a polygon in ternary coordinates.
+    constraints: string or list of strings, None
+        Linear inequality constraints, see `parse_constraints`.
+    permutation: string, None
+        The permutation the points were plotted with.
+    normalize: bool, True
+        Apply the constraints to the normalized coordinates.
+
+    Returns
+    -------
+    ScatterSelection (artist, indices, points) with the sorted indices of
+    the selected points in the plotted array
+    """
+
+    points = scatter_index.points
+    indices = None
+    for vertices, ternary in ((lasso, False), (polygon, True)):
+        if vertices is None:
+            continue
+        if ternary:
+            vertices = project_points(vertices, permutation=permutation)
+        found = scatter_index.index.query_polygon(vertices)
+        if indices is None:
+            indices = found
+        else:
+            indices = np.intersect1d(indices, found, assume_unique=True)
+    if constraints:
+        if indices is None:
+            indices = np.flatnonzero(constraint_mask(points, constraints,
+                                                     normalize=normalize))
+        else:
+            indices = indices[constraint_mask(points[indices], constraints,
+                                              normalize=normalize)]
+    if indices is None:
+        indices = np.arange(len(points))
+    return ScatterSelection(scatter_index.artist, indices, points[indices])
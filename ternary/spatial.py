@@ -0,0 +1,345 @@
+"""
+Spatial index of points in the projected plane for neighbour queries.
+"""
+
+from collections import namedtuple
+
+from matplotlib.path import Path
+import numpy as np
+
+from .helpers import project_points
+
+
+ScatterHits = namedtuple('ScatterHits', ['artist', 'indices', 'points', 'distances'])
+
+
+def _ranges(starts, stops):
+    """
+    Concatenates the ranges [starts[n], stops[n]) without a Python loop.
+
+    Returns
+    -------
+    owners, values: the index n of the range of each value, and the values
+    """
+
+    lengths = np.maximum(stops - starts, 0)
+    owners = np.repeat(np.arange(len(starts)), lengths)
+    first = np.cumsum(lengths) - lengths
+    values = np.arange(lengths.sum()) - np.repeat(first - starts, lengths)
+    return owners, values
+
+
+class GridIndex(object):
+    """
+    Grid hash of planar points: the points are bucketed into square cells
+    and sorted by cell, so the points of any cell are a contiguous slice.
+    Building the index is O(N log N) and queries only visit the cells near
+    each query point.
+
+    > index = GridIndex(project_points(points))
+    > distances, indices = index.nearest(xy, k=4)
+    """
+
+    def __init__(self, xy, cell_size=None):
+        """
+        Parameters
+        ----------
+        xy: array-like, shape (N, 2)
+            The planar points, e.g. from `helpers.project_points`.
+        cell_size: float, None
+            The side of the grid cells. By default about two points per cell
+            on average over the bounding box.
+        """
+        xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        self.xy = xy
+        if len(xy):
+            self.origin = xy.min(axis=0)
+            extent = xy.max(axis=0) - self.origin
+        else:
+            self.origin = np.zeros(2)
+            extent = np.zeros(2)
+        if cell_size is None:
+            size = extent.max()
+            if size > 0:
+                area = max(extent[0], size / 4096.) * max(extent[1], size / 4096.)
+                cell_size = max(np.sqrt(2. * area / len(xy)), size / 4096.)
+            else:
+                cell_size = 1.
+        self.cell_size = float(cell_size)
+        self.shape = (np.floor(extent / self.cell_size).astype(int) + 1)
+        cells = self._cells(*self._coordinates(xy))
+        if self.shape[0] * self.shape[1] < 2 ** 31:
+            # Sorting 32-bit integers is faster
+            cells = cells.astype(np.int32)
+        self.order = np.argsort(cells)
+        counts = np.bincount(cells, minlength=self.shape[0] * self.shape[1])
+        self.starts = np.concatenate([[0], np.cumsum(counts)])
+
+    def __len__(self):
+        return len(self.xy)
+
+    def __repr__(self):
+        return "GridIndex(%d points, %d x %d cells)" % (
+            len(self.xy), self.shape[0], self.shape[1])
+
+    def _coordinates(self, xy):
+        """Returns the (unclipped) integer grid coordinates of points."""
+        grid = np.floor((xy - self.origin) / self.cell_size)
+        # Far away points only need to be outside of the grid
+        grid = np.clip(grid, -1, self.shape + 1).astype(int)
+        return grid[:, 0], grid[:, 1]
+
+    def _cells(self, cx, cy):
+        return cx * self.shape[1] + cy
+
+    def _candidates(self, cx, cy):
+        """
+        Returns (owners, indices) pairs of the points in the cells (cx, cy),
+        one cell per owner, skipping cells outside of the grid.
+        """
+        inside = ((cx >= 0) & (cx < self.shape[0]) &
+                  (cy >= 0) & (cy < self.shape[1]))
+        owners = np.flatnonzero(inside)
+        cells = self._cells(cx[inside], cy[inside])
+        range_owners, positions = _ranges(self.starts[cells], self.starts[cells + 1])
+        return owners[range_owners], self.order[positions]
+
+    def _unsearched_distance(self, xy, cx, cy, ring):
+        """
+        Computes the distance from each query point to the nearest grid cell
+        outside of the block of cells within `ring` of its cell.
+        """
+        grid = (xy - self.origin) / self.cell_size
+        low = np.stack([cx, cy], axis=1) - ring
+        high = low + 2 * ring + 1
+        size = np.broadcast_to(self.shape, low.shape)
+        zero = np.zeros_like(low)
+        distance = np.full(len(xy), np.inf)
+        # The parts of the grid beyond each side of the block
+        for axis in (0, 1):
+            for start, stop in [(zero[:, axis], low[:, axis]),
+                                (high[:, axis], size[:, axis])]:
+                rect_low = zero.copy()
+                rect_high = size.copy()
+                rect_low[:, axis] = start
+                rect_high[:, axis] = stop
+                gap = np.maximum(np.maximum(rect_low - grid, grid - rect_high), 0)
+                side = np.hypot(gap[:, 0], gap[:, 1])
+                side[start >= stop] = np.inf
+                distance = np.minimum(distance, side)
+        return distance * self.cell_size
+
+    def query_radius(self, xy, radius):
+        """
+        Finds all the points within a distance of each query point.
+
+        Parameters
+        ----------
+        xy: array-like, shape (M, 2)
+            The query points.
+        radius: float
+            The search radius.
+
+        Returns
+        -------
+        queries, indices, distances: arrays of the matching pairs, sorted by
+        query and then by distance
+        """
+        xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        cx, cy = self._coordinates(xy)
+        # Query points are clipped to just outside of the grid
+        reach = min(int(np.ceil(radius / self.cell_size)), int(max(self.shape)) + 2)
+        queries = []
+        indices = []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                owners, found = self._candidates(cx + dx, cy + dy)
+                queries.append(owners)
+                indices.append(found)
+        queries = np.concatenate(queries)
+        indices = np.concatenate(indices)
+        distances = np.hypot(*(self.xy[indices] - xy[queries]).T)
+        close = distances <= radius
+        queries, indices, distances = queries[close], indices[close], distances[close]
+        order = np.lexsort((distances, queries))
+        return queries[order], indices[order], distances[order]
+
+    def query_polygon(self, vertices):
+        """
+        Finds the points inside a polygon. Grid cells well inside of the
+        polygon are taken as a whole, and only the points of the cells along
+        its edges are tested.
+
+        Parameters
+        ----------
+        vertices: array-like, shape (M, 2)
+            The vertices of the polygon, which is closed automatically.
+
+        Returns
+        -------
+        sorted integer numpy array of the indices of the points inside
+        """
+        vertices = np.asarray(vertices, dtype=float).reshape(-1, 2)
+        if len(vertices) < 3 or len(self.xy) == 0:
+            return np.zeros(0, dtype=int)
+        path = Path(np.concatenate([vertices, vertices[:1]]), closed=True)
+        low = np.maximum(self._coordinates(vertices.min(axis=0)[np.newaxis]), 0)
+        high = np.minimum(self._coordinates(vertices.max(axis=0)[np.newaxis]),
+                          (self.shape - 1)[:, np.newaxis])
+        cx, cy = np.meshgrid(np.arange(low[0, 0], high[0, 0] + 1),
+                             np.arange(low[1, 0], high[1, 0] + 1), indexing="ij")
+        if cx.size == 0:
+            return np.zeros(0, dtype=int)
+
+        # Cells touched by the edges, sampled finely, and their neighbours
+        edges = np.concatenate([vertices, vertices[:1]])
+        lengths = np.hypot(*np.diff(edges, axis=0).T)
+        steps = np.maximum(np.ceil(4 * lengths / self.cell_size).astype(int), 1)
+        owners, offsets = _ranges(np.zeros_like(steps), steps + 1)
+        t = (offsets / steps[owners])[:, np.newaxis]
+        samples = edges[owners] * (1 - t) + edges[owners + 1] * t
+        ex, ey = self._coordinates(samples)
+        on_edges = np.zeros((self.shape[0] + 2, self.shape[1] + 2), dtype=bool)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                on_edges[np.clip(ex + dx, -1, self.shape[0]) + 1,
+                         np.clip(ey + dy, -1, self.shape[1]) + 1] = True
+        boundary = on_edges[cx + 1, cy + 1]
+
+        # Cells not crossed by an edge are inside if their center is. Runs
+        # of such cells along a column are all inside or all outside, so
+        # only the first cell of each run is tested.
+        starts = ~boundary
+        starts[:, 1:] &= boundary[:, :-1]
+        runs = np.cumsum(starts.ravel()) - 1
+        first = np.column_stack([cx[starts], cy[starts]])
+        run_inside = path.contains_points(self.origin + (first + 0.5) * self.cell_size)
+        inner = ~boundary.ravel() & run_inside[np.maximum(runs, 0)]
+        cx = cx.ravel()
+        cy = cy.ravel()
+        boundary = boundary.ravel()
+        _, inner_positions = _ranges(self.starts[self._cells(cx[inner], cy[inner])],
+                                     self.starts[self._cells(cx[inner], cy[inner]) + 1])
+        _, candidates = self._candidates(cx[boundary], cy[boundary])
+        inside = candidates[path.contains_points(self.xy[candidates])]
+        return np.sort(np.concatenate([self.order[inner_positions], inside]))
+
+    def nearest(self, xy, k=1, max_distance=np.inf):
+        """
+        Finds the k nearest points of each query point by searching rings of
+        cells of increasing size around it.
+
+        Parameters
+        ----------
+        xy: array-like, shape (M, 2)
+            The query points.
+        k: int, 1
+            The number of neighbours.
+        max_distance: float, inf
+            Only points within this distance are returned.
+
+        Returns
+        -------
+        distances, indices: arrays of shape (M, k) sorted by distance, inf
+        and -1 where there are fewer than k points within max_distance
+        """
+        xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        m = len(xy)
+        distances = np.full((m, k), np.inf)
+        indices = np.full((m, k), -1)
+        cx, cy = self._coordinates(xy)
+        pending = np.arange(m)
+        ring = 0
+        max_ring = int(max(self.shape)) + 2
+        while len(pending) and ring <= max_ring:
+            # The cells at Chebyshev distance `ring` from the query cell
+            owners = []
+            found = []
+            for dx in range(-ring, ring + 1):
+                dys = range(-ring, ring + 1) if abs(dx) == ring else (-ring, ring)
+                for dy in dys:
+                    ring_owners, ring_found = self._candidates(
+                        cx[pending] + dx, cy[pending] + dy)
+                    owners.append(pending[ring_owners])
+                    found.append(ring_found)
+            owners = np.concatenate(owners)
+            found = np.concatenate(found)
+            if len(found):
+                new_distances = np.hypot(*(self.xy[found] - xy[owners]).T)
+                # Merge with the current best k of the pending queries
+                owners = np.concatenate([np.repeat(pending, k), owners])
+                found = np.concatenate([indices[pending].ravel(), found])
+                new_distances = np.concatenate([distances[pending].ravel(), new_distances])
+                order = np.lexsort((new_distances, owners))
+                owners, found, new_distances = owners[order], found[order], new_distances[order]
+                first = np.searchsorted(owners, owners)
+                rank = np.arange(len(owners)) - first
+                keep = rank < k
+                distances[owners[keep], rank[keep]] = new_distances[keep]
+                indices[owners[keep], rank[keep]] = found[keep]
+            # All the points closer than the nearest cell outside of the
+            # searched block have been seen
+            searched = self._unsearched_distance(xy[pending], cx[pending],
+                                                 cy[pending], ring)
+            done = (distances[pending, -1] <= searched) | (searched >= max_distance)
+            pending = pending[~done]
+            ring += 1
+        far = distances > max_distance
+        distances[far] = np.inf
+        indices[far] = -1
+        return distances, indices
+
+
+class ScatterIndex(object):
+    """
+    Spatial index of the points of a scatter plot, for hover and picking
+    queries in pixels that do not scan every point.
+    """
+
+    def __init__(self, artist, points, permutation=None):
+        """
+        Parameters
+        ----------
+        artist: matplotlib PathCollection
+            The scatter plot.
+        points: array-like, shape (N, 3)
+            The plotted points.
+        permutation: string, None
+            The permutation the points were plotted with.
+        """
+        self.artist = artist
+        self.points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self.index = GridIndex(project_points(self.points, permutation=permutation))
+
+    def __repr__(self):
+        return "ScatterIndex(%d points)" % len(self.points)
+
+    def query(self, ax, x, y, radius=5):
+        """
+        Finds the points within a distance in pixels of a display position.
+
+        Parameters
+        ----------
+        ax: Matplotlib AxesSubplot
+            The subplot of the scatter plot.
+        x, y: float
+            The display coordinates, e.g. event.x and event.y.
+        radius: float, 5
+            The search radius in pixels.
+
+        Returns
+        -------
+        ScatterHits of the points found, sorted by distance in pixels
+        """
+        transform = ax.transData
+        center = transform.inverted().transform([(x, y)])[0]
+        # Pixels per data unit along each axis, the aspect may not be equal
+        steps = transform.transform([center, center + (1, 0), center + (0, 1)])
+        scales = np.hypot(*(steps[1:] - steps[0]).T)
+        _, indices, _ = self.index.query_radius([center], radius / scales.min())
+        pixels = transform.transform(self.index.xy[indices])
+        distances = np.hypot(pixels[:, 0] - x, pixels[:, 1] - y)
+        order = np.argsort(distances, kind="stable")
+        order = order[distances[order] <= radius]
+        indices = indices[order]
+        return ScatterHits(self.artist, indices, self.points[indices], distances[order])
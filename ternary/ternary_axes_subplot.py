@@ -3,21 +3,34 @@ Wrapper class for all ternary plotting functions.
 """
 
 from collections import namedtuple
-from functools import partial
+from functools import partial, wraps
+import io
+import os
+import types
 
+import matplotlib
 import numpy as np
 from matplotlib import pyplot as plt
+from matplotlib.widgets import LassoSelector
 
+from . import contouring
 from . import heatmapping
 from . import lines
+from . import live
 from . import plotting
-from .helpers import project_point, convert_coordinates_sequence
+from . import progressive
+from . import scene
+from . import selection
+from .cache import RenderCache
+from .helpers import project_point, convert_coordinates_sequence, unproject_points
+from .spatial import ScatterIndex
 
 
 BackgroundParameters = namedtuple('BackgroundParameters', ['color', 'alpha', 'zorder'])
 
 
-def figure(ax=None, scale=None, permutation=None):
+def figure(ax=None, scale=None, permutation=None, render_cache=None,
+           deferred=False):
     """
     Wraps a Matplotlib AxesSubplot or generates a new one. Emulates matplotlib's
     > figure, ax = plt.subplots()
@@ -28,12 +41,50 @@ def figure(ax=None, scale=None, permutation=None):
         The matplotlib AxesSubplot to wrap
     scale: float, None
         The scale factor of the ternary plot
+    render_cache: RenderCache or string, None
+        A render cache (or its directory) used by savefig, see
+        TernaryAxesSubplot.set_render_cache
+    deferred: bool, False
+        Defer and merge plotting calls, see TernaryAxesSubplot.set_deferred
     """
 
-    ternary_ax = TernaryAxesSubplot(ax=ax, scale=scale, permutation=permutation)
+    ternary_ax = TernaryAxesSubplot(ax=ax, scale=scale, permutation=permutation,
+                                    render_cache=render_cache,
+                                    deferred=deferred)
     return ternary_ax.get_figure(), ternary_ax
 
 
+def recorded(lazy=True):
+    """
+    Decorator for TernaryAxesSubplot methods that records each call in the
+    scene of the plot. If `lazy`, the call draws artists and is only recorded
+    while the plot is deferred or has a render cache, in which case it is
+    only executed when the figure has to be rendered and returns None.
+    Otherwise the call is executed at once and returns its usual value.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self._executing:
+                # Called from another recorded method, e.g. set_custom_ticks
+                return method(self, *args, **kwargs)
+            if lazy and not (self._deferred or self._render_cache is not None):
+                # Not kept in the scene, which would hold on to all the data
+                self._scene_complete = False
+                return self._execute(method, args, kwargs)
+            # Generators can only be consumed once, by the hash or the plot
+            args = tuple(list(a) if isinstance(a, types.GeneratorType) else a
+                         for a in args)
+            self._scene.append((method.__name__, args, kwargs))
+            if lazy:
+                self._pending.append((method, args, kwargs))
+                return None
+            return self._execute(method, args, kwargs)
+        return wrapper
+    return decorator
+
+
 def mpl_redraw_callback(event, tax):
     """
     Callback to properly rotate and redraw text labels when the plot is drawn
@@ -57,16 +108,34 @@ class TernaryAxesSubplot(object):
     to ease the use of ternary plotting functions.
     """
 
-    def __init__(self, ax=None, scale=None, permutation=None):
+    def __init__(self, ax=None, scale=None, permutation=None,
+                 render_cache=None, deferred=False):
+        # The recorded calls, used to identify the plot in the render cache,
+        # and whether they are all the calls drawn
+        self._scene = []
+        self._scene_complete = True
+        # Calls deferred until the figure is rendered
+        self._pending = []
+        self._render_cache = None
+        self._deferred = False
+        self._executing = False
+        # Spatial indices of the scatter plots drawn with index=True
+        self._scatter_indices = []
+        self._tooltip = None
+        self._live_display = None
         if not scale:
             scale = 1.0
         if ax:
             self.ax = ax
         else:
             _, self.ax = plt.subplots()
+            # The cursor readout in ternary coordinates, only on axes created
+            # here since a given ax may be used for other plots
+            self.ax.format_coord = self.format_coord
         self.set_scale(scale=scale)
         self._permutation = permutation
         self._boundary_scale = scale
+        self._axis_limits = None
         # Container for the axis labels supplied by the user
         self._labels = dict()
         self._corner_labels = dict()
@@ -79,6 +148,10 @@ class TernaryAxesSubplot(object):
         # Cache for the background triangle object, so it can be removed and redrawn as needed.
         self._background_triangle = None
         self.set_background_color(color="whitesmoke", zorder=-1000, alpha=0.75)
+        # The default background is the same for every plot
+        self._scene_complete = True
+        self.set_render_cache(render_cache)
+        self.set_deferred(deferred)
 
     def _connect_callbacks(self):
         """Connect resize matplotlib callbacks."""
@@ -100,6 +173,7 @@ class TernaryAxesSubplot(object):
         ax = self.get_axes()
         return ax.get_figure()
 
+    @recorded(lazy=False)
     def set_scale(self, scale=None):
         self._scale = scale
         self.resize_drawing_canvas()
@@ -107,6 +181,96 @@ class TernaryAxesSubplot(object):
     def get_scale(self):
         return self._scale
 
+    # Scene recording and render cache
+
+    def set_render_cache(self, render_cache=None):
+        """
+        Sets a render cache for savefig. While a cache is set, the plotting
+        calls are recorded and only executed when savefig does not find an
+        image of the same scene in the cache, so an unchanged plot costs a
+        hash computation rather than a render. Only calls made through this
+        class are recorded, not direct changes to the matplotlib objects.
+        Plots drawn before the cache was set are not recorded, nor are
+        progressive heatmaps and live artists, so savefig then bypasses the
+        cache. While a cache is set the plotting methods return None, since
+        they are not executed yet.
+
+        Functions, e.g. of heatmapf, are identified by their code, defaults,
+        closure and the module level values they read, but not by the code
+        of the other functions they call.
+
+        Parameters
+        ----------
+        render_cache: RenderCache or string, None
+            The cache, or the directory of a new cache. None disables caching.
+        """
+        if isinstance(render_cache, (str, os.PathLike)):
+            render_cache = RenderCache(render_cache)
+        if render_cache is None:
+            self._flush()
+        self._render_cache = render_cache
+
+    def get_render_cache(self):
+        return self._render_cache
+
+    def set_deferred(self, deferred=True):
+        """
+        In deferred mode the plotting calls are recorded and only drawn at
+        savefig, show or flush, merged into as few matplotlib artists as
+        possible: lines and scatters with compatible styles become a single
+        collection each and heatmaps a single PolyCollection. This makes
+        plots with thousands of small lines or scatters much faster to draw.
+
+        Merged artists are drawn at the position of the first call of their
+        group. Lines with markers or labels, scatters with colorbars or
+        labels and plots or scatters without an explicit color are not merged.
+        The plotting methods return None in deferred mode.
+        """
+        if not deferred:
+            self._flush()
+        self._deferred = deferred
+
+    def flush(self):
+        """Draws any deferred calls now."""
+        self._flush()
+
+    def get_scene(self):
+        """Returns the recorded calls as a list of (name, args, kwargs)."""
+        return list(self._scene)
+
+    def _execute(self, method, args, kwargs):
+        """Executes a recorded method without recording nested calls."""
+        self._executing = True
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._executing = False
+
+    def _flush(self):
+        """Executes any calls deferred by the render cache."""
+        pending = self._pending
+        self._pending = []
+        if self._deferred:
+            scene.flush_calls(self, pending)
+            return
+        for method, args, kwargs in pending:
+            self._execute(method, args, kwargs)
+
+    def _scene_context(self, savefig_kwargs):
+        """Everything besides the scene that determines the saved image."""
+        fig = self.get_figure()
+        ax = self.get_axes()
+        return {
+            "matplotlib": matplotlib.__version__,
+            "scale": self._scale,
+            "boundary_scale": self._boundary_scale,
+            "permutation": self._permutation,
+            "figsize": tuple(fig.get_size_inches()),
+            "position": tuple(ax.get_position(original=True).bounds),
+            "savefig": savefig_kwargs,
+        }
+
+    @recorded(lazy=False)
     def set_axis_limits(self, axis_limits=None):
         """
         Set min and max data limits for each of the three axes.
@@ -123,11 +287,13 @@ class TernaryAxesSubplot(object):
 
     # Title and Axis Labels
 
+    @recorded()
     def set_title(self, title, **kwargs):
         """Sets the title on the underlying matplotlib AxesSubplot."""
         ax = self.get_axes()
         ax.set_title(title, **kwargs)
 
+    @recorded(lazy=False)
     def left_axis_label(self, label, position=None,  rotation=60, offset=0.08,
                         **kwargs):
         """
@@ -151,6 +317,7 @@ class TernaryAxesSubplot(object):
             position = (-offset, 3./5, 2./5)
         self._labels["left"] = (label, position, rotation, kwargs)
 
+    @recorded(lazy=False)
     def right_axis_label(self, label, position=None, rotation=-60, offset=0.08,
                          **kwargs):
 
@@ -175,6 +342,7 @@ class TernaryAxesSubplot(object):
             position = (2. / 5 + offset, 3. / 5, 0)
         self._labels["right"] = (label, position, rotation, kwargs)
 
+    @recorded(lazy=False)
     def bottom_axis_label(self, label, position=None, rotation=0, offset=0.02,
                           **kwargs):
         """
@@ -198,6 +366,7 @@ class TernaryAxesSubplot(object):
             position = (0.5, -offset / 2., 0.5)
         self._labels["bottom"] = (label, position, rotation, kwargs)
 
+    @recorded(lazy=False)
     def right_corner_label(self, label, position=None, rotation=0, offset=0.08,
                            **kwargs):
         """
@@ -221,6 +390,7 @@ class TernaryAxesSubplot(object):
             position = (1, offset / 2, 0)
         self._corner_labels["right"] = (label, position, rotation, kwargs)
 
+    @recorded(lazy=False)
     def left_corner_label(self, label, position=None, rotation=0, offset=0.08,
                           **kwargs):
         """
@@ -244,6 +414,7 @@ class TernaryAxesSubplot(object):
             position = (-offset / 2, offset / 2, 0)
         self._corner_labels["left"] = (label, position, rotation, kwargs)
 
+    @recorded(lazy=False)
     def top_corner_label(self, label, position=None, rotation=0, offset=0.2,
                          **kwargs):
         """
@@ -267,6 +438,7 @@ class TernaryAxesSubplot(object):
             position = (-offset / 2, 1 + offset, 0)
         self._corner_labels["top"] = (label, position, rotation, kwargs)
 
+    @recorded()
     def annotate(self, text, position, **kwargs):
         ax = self.get_axes()
         p = project_point(position)
@@ -274,6 +446,7 @@ class TernaryAxesSubplot(object):
 
     # Boundary and Gridlines
 
+    @recorded()
     def boundary(self, scale=None, axes_colors=None, **kwargs):
         # Sometimes you want to draw a bigger boundary
         if not scale:
@@ -282,6 +455,7 @@ class TernaryAxesSubplot(object):
         self.resize_drawing_canvas(scale)
         lines.boundary(scale=scale, ax=ax, axes_colors=axes_colors, **kwargs)
 
+    @recorded()
     def gridlines(self, multiple=None, horizontal_kwargs=None, left_kwargs=None,
                   right_kwargs=None, **kwargs):
         ax = self.get_axes()
@@ -293,20 +467,24 @@ class TernaryAxesSubplot(object):
 
     # Various Lines
 
+    @recorded()
     def line(self, p1, p2, **kwargs):
         ax = self.get_axes()
         lines.line(ax, p1, p2, **kwargs)
 
+    @recorded()
     def horizontal_line(self, i, **kwargs):
         ax = self.get_axes()
         scale = self.get_scale()
         lines.horizontal_line(ax, scale, i, **kwargs)
 
+    @recorded()
     def left_parallel_line(self, i, **kwargs):
         ax = self.get_axes()
         scale = self.get_scale()
         lines.left_parallel_line(ax, scale, i, **kwargs)
 
+    @recorded()
     def right_parallel_line(self, i, **kwargs):
         ax = self.get_axes()
         scale = self.get_scale()
@@ -318,28 +496,68 @@ class TernaryAxesSubplot(object):
         fig = self.get_figure()
         plt.close(fig)
 
+    @recorded()
     def legend(self, *args, **kwargs):
         ax = self.get_axes()
         ax.legend(*args, **kwargs)
 
-    def savefig(self, filename, **kwargs):
-        self._redraw_labels()
+    def savefig(self, filename=None, **kwargs):
+        """
+        Saves the figure, passing kwargs to matplotlib. If filename is None
+        the encoded image is returned as bytes. If a render cache is set, a
+        previously rendered image of the same scene is reused.
+        """
         fig = self.get_figure()
         if 'dpi' not in kwargs:
             kwargs['dpi'] = 200
-        fig.savefig(filename, **kwargs)
+        if filename is None or self._render_cache is not None:
+            if 'format' not in kwargs:
+                if isinstance(filename, (str, os.PathLike)):
+                    extension = os.path.splitext(str(filename))[1][1:]
+                else:
+                    extension = None
+                kwargs['format'] = (extension or
+                                    matplotlib.rcParams['savefig.format'])
+        data = None
+        use_cache = self._render_cache is not None and self._scene_complete
+        if use_cache:
+            key = self._render_cache.key(self._scene,
+                                         self._scene_context(kwargs))
+            data = self._render_cache.get(key)
+        if data is None:
+            self._flush()
+            self._redraw_labels()
+            if filename is not None and self._render_cache is None:
+                fig.savefig(filename, **kwargs)
+                return None
+            buffer = io.BytesIO()
+            fig.savefig(buffer, **kwargs)
+            data = buffer.getvalue()
+            if use_cache:
+                self._render_cache.put(key, data)
+        if filename is None:
+            return data
+        if isinstance(filename, (str, os.PathLike)):
+            with open(filename, 'wb') as f:
+                f.write(data)
+        else:
+            filename.write(data)
+        return None
 
     def show(self, *args, **kwargs):
+        self._flush()
         self._redraw_labels()
         plt.show(*args, **kwargs)
 
     # Axis ticks
 
+    @recorded()
     def clear_matplotlib_ticks(self, axis="both"):
         """Clears the default matplotlib ticks."""
         ax = self.get_axes()
         plotting.clear_matplotlib_ticks(ax=ax, axis=axis)
 
+    @recorded(lazy=False)
     def get_ticks_from_axis_limits(self, multiple=1):
         """
         Taking self._axis_limits and self._boundary_scale get the scaled
@@ -365,6 +583,7 @@ class TernaryAxesSubplot(object):
                        axes_colors=axes_colors, tick_formats=tick_formats,
                        **kwargs)
 
+    @recorded()
     def ticks(self, ticks=None, locations=None, multiple=1, axis='blr',
               clockwise=False, axes_colors=None, tick_formats=None, **kwargs):
         ax = self.get_axes()
@@ -413,30 +632,285 @@ class TernaryAxesSubplot(object):
         return convert_coordinates_sequence(points,self._boundary_scale,
                                             self._axis_limits, axisorder)
 
+    def unproject(self, xy, display=False, axisorder='blr'):
+        """
+        Converts planar points back to ternary coordinates, undoing the
+        permutation and any axis limits (see `helpers.unproject_points`).
+
+        Parameters
+        ----------
+        xy: array-like, shape (N, 2)
+            The points, in data coordinates of the matplotlib axes or in
+            display coordinates (pixels, as in mouse events) if display.
+        display: bool, False
+            The points are in display coordinates.
+        axisorder: String, 'blr'
+            The order of the axes for the coordinates, with axis limits.
+
+        Returns
+        -------
+        numpy array of shape (N, 3)
+        """
+        xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        if display:
+            xy = self.get_axes().transData.inverted().transform(xy)
+        # The scale of the data, the boundary of dual-triangular heatmaps
+        # being one larger, except that axis limits are converted with the
+        # boundary scale, as in convert_coordinates
+        if self._axis_limits:
+            scale = self._boundary_scale
+        else:
+            scale = self.get_scale()
+        points = unproject_points(xy, scale,
+                                  permutation=self._permutation,
+                                  limits=self._axis_limits, axisorder=axisorder)
+        return points
+
+    def format_coord(self, x, y):
+        """
+        The cursor readout in ternary coordinates, set on the matplotlib axes
+        created by this class. For axes given by the user, use
+        > ax.format_coord = tax.format_coord
+        """
+        return "(%.4g, %.4g, %.4g)" % tuple(self.unproject([(x, y)])[0])
+
     # Various Plots
 
-    def scatter(self, points, **kwargs):
+    @recorded()
+    def scatter(self, points, index=False, **kwargs):
         ax = self.get_axes()
         permutation = self._permutation
+        if index and not isinstance(points, np.ndarray):
+            # Used by the plot and the index
+            points = list(points)
         plot_ = plotting.scatter(points, ax=ax, permutation=permutation,
                                  **kwargs)
+        if index:
+            self._scatter_indices.append(
+                ScatterIndex(ax.collections[-1], points, permutation=permutation))
         return plot_
 
+    def nearest(self, event, radius=5):
+        """
+        Finds the points of the scatter plots drawn with index=True within a
+        distance in pixels of a mouse event.
+
+        Parameters
+        ----------
+        event: matplotlib MouseEvent
+            The event, e.g. of a motion_notify_event or button_press_event
+            callback.
+        radius: float, 5
+            The search radius in pixels.
+
+        Returns
+        -------
+        list of spatial.ScatterHits (artist, indices, points, distances), one
+        for each scatter plot with points within the radius, with the
+        indices of the points in the plotted arrays sorted by distance
+        """
+        ax = self.get_axes()
+        if event.inaxes is not ax or event.x is None:
+            return []
+        hits = []
+        for scatter_index in self._get_scatter_indices():
+            if not scatter_index.artist.get_visible():
+                continue
+            found = scatter_index.query(ax, event.x, event.y, radius=radius)
+            if len(found.indices):
+                hits.append(found)
+        return hits
+
+    def _get_scatter_indices(self):
+        """Returns the indices of the scatter plots still on the axes."""
+        ax = self.get_axes()
+        self._scatter_indices = [i for i in self._scatter_indices
+                                 if i.artist.axes is ax]
+        return self._scatter_indices
+
+    def select(self, lasso=None, polygon=None, constraints=None, normalize=True):
+        """
+        Selects the points of the scatter plots drawn with index=True inside
+        a lasso or polygon and satisfying linear inequality constraints on
+        their coordinates, e.g. constraints=["a < 0.3", "b > c"].
+
+        Parameters
+        ----------
+        lasso: array-like, shape (M, 2), None
+            The vertices of a lasso in data coordinates, e.g. from a
+            matplotlib LassoSelector.
+        polygon: array-like, shape (M, 3), None
+            The vertices of a polygon in ternary coordinates.
+        constraints: string or list of strings, None
+            Constraints on the coordinates a, b and c of the plotted points,
+            see `selection.parse_constraints`.
+        normalize: bool, True
+            Apply the constraints to the normalized coordinates.
+
+        Returns
+        -------
+        list of selection.ScatterSelection (artist, indices, points), one for
+        each indexed scatter plot
+        """
+        return [selection.select_points(scatter_index, lasso=lasso,
+                                        polygon=polygon, constraints=constraints,
+                                        permutation=self._permutation,
+                                        normalize=normalize)
+                for scatter_index in self._get_scatter_indices()]
+
+    def lasso(self, callback, constraints=None, **kwargs):
+        """
+        Starts a matplotlib LassoSelector that selects the points of the
+        indexed scatter plots, see `select`.
+
+        Parameters
+        ----------
+        callback: function
+            Called with the list of selections after each lasso.
+        constraints: string or list of strings, None
+            Constraints that the selected points must also satisfy.
+        kwargs:
+            Any kwargs to pass through to LassoSelector.
+
+        Returns
+        -------
+        The LassoSelector, which must be kept referenced to stay active
+        """
+        def on_select(vertices):
+            callback(self.select(lasso=vertices, constraints=constraints))
+
+        return LassoSelector(self.get_axes(), on_select, **kwargs)
+
+    def connect_hover(self, callback=None, radius=5):
+        """
+        Calls a function on mouse moves over the indexed scatter plots (see
+        `nearest`). By default a tooltip with the coordinates of the nearest
+        point is shown.
+
+        Parameters
+        ----------
+        callback: function, None
+            Called with the list of hits and the event on each mouse move.
+        radius: float, 5
+            The search radius in pixels.
+
+        Returns
+        -------
+        The matplotlib connection id, for mpl_disconnect
+        """
+        if callback is None:
+            callback = self._show_tooltip
+
+        def on_move(event):
+            callback(self.nearest(event, radius=radius), event)
+
+        return self.get_figure().canvas.mpl_connect('motion_notify_event', on_move)
+
+    def _show_tooltip(self, hits, event):
+        """Shows the coordinates of the nearest hovered point."""
+        ax = self.get_axes()
+        tooltip = self._tooltip
+        if tooltip is None or tooltip.axes is not ax:
+            tooltip = ax.annotate("", xy=(0, 0), xytext=(10, 10),
+                                  textcoords="offset points", zorder=1000,
+                                  bbox=dict(boxstyle="round", fc="w", alpha=0.9))
+            tooltip.set_visible(False)
+            self._tooltip = tooltip
+        if hits:
+            hit = min(hits, key=lambda h: h.distances[0])
+            point = hit.points[0]
+            tooltip.xy = project_point(point, permutation=self._permutation)
+            tooltip.set_text("(%g, %g, %g)" % tuple(point))
+            tooltip.set_visible(True)
+        elif not tooltip.get_visible():
+            return
+        else:
+            tooltip.set_visible(False)
+        self.get_figure().canvas.draw_idle()
+
+    def get_live_display(self):
+        """Returns the LiveDisplay redrawing the live artists by blitting."""
+        if self._live_display is None:
+            self._live_display = live.LiveDisplay(self)
+        return self._live_display
+
+    def live_scatter(self, capacity=10000, **kwargs):
+        """
+        Creates a scatter plot for streaming points, showing at most the
+        `capacity` most recent ones. Points are added with the append method
+        of the result, which redraws only the live artists.
+
+        Parameters
+        ----------
+        capacity: int, 10000
+            The maximum number of points shown.
+        kwargs:
+            Any kwargs to pass through to matplotlib's scatter.
+
+        Returns
+        -------
+        live.LiveScatter
+        """
+        ax = self.get_axes()
+        # Drawn outside of the scene, so savefig bypasses the render cache
+        self._scene_complete = False
+        display = self.get_live_display()
+        artist = ax.scatter(np.zeros(0), np.zeros(0), **kwargs)
+        display.add(artist)
+        return live.LiveScatter(display, artist, capacity,
+                                permutation=self._permutation)
+
+    def live_plot(self, capacity=10000, **kwargs):
+        """
+        Creates a trajectory for streaming points, through at most the
+        `capacity` most recent ones, see `live_scatter`.
+
+        Parameters
+        ----------
+        capacity: int, 10000
+            The maximum number of points of the line.
+        kwargs:
+            Any kwargs to pass through to matplotlib's plot.
+
+        Returns
+        -------
+        live.LiveTrajectory
+        """
+        ax = self.get_axes()
+        # Drawn outside of the scene, so savefig bypasses the render cache
+        self._scene_complete = False
+        display = self.get_live_display()
+        artist, = ax.plot([], [], **kwargs)
+        display.add(artist)
+        return live.LiveTrajectory(display, artist, capacity,
+                                   permutation=self._permutation)
+
+    @recorded()
     def plot(self, points, **kwargs):
         ax = self.get_axes()
         permutation = self._permutation
         plotting.plot(points, ax=ax, permutation=permutation,
                       **kwargs)
 
+    @recorded()
     def plot_colored_trajectory(self, points, cmap=None, **kwargs):
         ax = self.get_axes()
         permutation = self._permutation
         plotting.plot_colored_trajectory(points, cmap=cmap, ax=ax,
                                          permutation=permutation, **kwargs)
 
+    @recorded()
+    def plot_trajectories(self, trajectories, offsets=None, **kwargs):
+        ax = self.get_axes()
+        permutation = self._permutation
+        plotting.plot_trajectories(trajectories, offsets=offsets, ax=ax,
+                                   permutation=permutation, **kwargs)
+
+    @recorded()
     def heatmap(self, data, scale=None, cmap=None, scientific=False,
                 style='triangular', colorbar=True, use_rgba=False,
-                vmin=None, vmax=None, cbarlabel=None, cb_kwargs=None):
+                vmin=None, vmax=None, cbarlabel=None, cb_kwargs=None,
+                collection=False, coalesce=False, rasterized=False):
         permutation = self._permutation
         if not scale:
             scale = self.get_scale()
@@ -447,11 +921,15 @@ class TernaryAxesSubplot(object):
                             scientific=scientific, colorbar=colorbar,
                             permutation=permutation, use_rgba=use_rgba,
                             vmin=vmin, vmax=vmax, cbarlabel=cbarlabel,
-                            cb_kwargs=cb_kwargs)
+                            cb_kwargs=cb_kwargs, collection=collection,
+                            coalesce=coalesce, rasterized=rasterized)
 
+    @recorded()
     def heatmapf(self, func, scale=None, cmap=None, boundary=True,
                  style='triangular', colorbar=True, scientific=False,
-                 vmin=None, vmax=None, cbarlabel=None, cb_kwargs=None):
+                 vmin=None, vmax=None, cbarlabel=None, cb_kwargs=None,
+                 collection=False, symmetry=None, coalesce=False,
+                 rasterized=False):
         if not scale:
             scale = self.get_scale()
         if style.lower()[0] == 'd':
@@ -462,8 +940,72 @@ class TernaryAxesSubplot(object):
                              boundary=boundary, ax=ax, scientific=scientific,
                              colorbar=colorbar, permutation=permutation,
                              vmin=vmin, vmax=vmax, cbarlabel=cbarlabel,
-                             cb_kwargs=cb_kwargs)
+                             cb_kwargs=cb_kwargs, collection=collection,
+                             symmetry=symmetry, coalesce=coalesce,
+                             rasterized=rasterized)
+
+    def progressive_heatmapf(self, func, scale=None, levels=4, cmap=None,
+                             boundary=True, style='triangular', colorbar=True,
+                             vmin=None, vmax=None, symmetry=None,
+                             executor=None, interval=200):
+        """
+        Heatmaps a slow function progressively: it is evaluated in the
+        background at increasing scales (e.g. scale / 8, scale / 4, scale / 2
+        and scale), reusing the values of the coarser levels, and the
+        heatmap is redrawn in place after each level.
+
+        Parameters
+        ----------
+        func: Function or evaluation.LatticeEvaluator
+            A function of normalized 3-tuples, as in heatmapf.
+        scale: Integer, None
+            The final scale, the scale of the plot by default.
+        levels: int or list of Integers, 4
+            The number of levels, or their scales.
+        executor: concurrent.futures.Executor, None
+            A thread pool evaluating the function, a new thread by default.
+        interval: int, 200
+            The interval in milliseconds at which the heatmap is updated by
+            a timer of the canvas, for interactive backends. 0 for no timer,
+            in which case the update method of the result must be called.
+
+        Returns
+        -------
+        progressive.ProgressiveHeatmap, with cancel, wait and update methods
+        """
+        if not scale:
+            scale = self.get_scale()
+        if style.lower()[0] == 'd':
+            self._boundary_scale = scale + 1
+        # Drawn outside of the scene, so savefig bypasses the render cache
+        self._scene_complete = False
+        return progressive.ProgressiveHeatmap(
+            func, scale, self.get_axes(), levels=levels, boundary=boundary,
+            style=style, cmap=cmap, vmin=vmin, vmax=vmax,
+            permutation=self._permutation, symmetry=symmetry,
+            colorbar=colorbar, executor=executor, interval=interval)
+
+    @recorded()
+    def contour(self, data, levels=None, scale=None, boundary=True, **kwargs):
+        if not scale:
+            scale = self.get_scale()
+        permutation = self._permutation
+        ax = self.get_axes()
+        return contouring.contour(data, scale, levels=levels, ax=ax,
+                                  permutation=permutation, boundary=boundary,
+                                  **kwargs)
+
+    @recorded()
+    def contourf(self, data, levels=None, scale=None, boundary=True, **kwargs):
+        if not scale:
+            scale = self.get_scale()
+        permutation = self._permutation
+        ax = self.get_axes()
+        return contouring.contourf(data, scale, levels=levels, ax=ax,
+                                   permutation=permutation, boundary=boundary,
+                                   **kwargs)
 
+    @recorded()
     def set_background_color(self, color="whitesmoke", zorder=-1000, alpha=0.75):
         self._background_parameters = BackgroundParameters(color=color, alpha=alpha, zorder=zorder)
         self._draw_background()
@@ -0,0 +1,386 @@
+"""
+Export of heatmaps of very large lattices as z/x/y PNG tile pyramids, for
+zoomable viewers such as Leaflet or OpenLayers.
+
+The normalized simplex is projected into the unit square of the "world",
+horizontally filling it and vertically centered. At zoom z the world is
+split into 2^z x 2^z tiles, numbered from the top left corner, written to
+`directory/z/x/y.png`. The tiles of the deepest zoom are rasterized pixel by
+pixel from the lattice cells they overlap, located with
+`binning.locate_points`; coarser tiles are downsampled from their four
+children. Tiles entirely outside of the simplex are not written.
+
+A manifest of the hash of the source of every tile (its lattice window and
+the rendering parameters, or the hashes of its children) is kept in
+`directory/manifest.json`, so that exporting changed data again only
+rewrites the tiles whose source changed.
+"""
+
+from collections import namedtuple
+import hashlib
+import json
+import multiprocessing
+import os
+
+import numpy as np
+from matplotlib import image
+
+from .binning import locate_points
+from .colormapping import get_cmap
+from .helpers import SQRT3OVER2, dict_to_lattice, unproject_points
+
+
+TILE_STYLES = ("triangular", "hexagonal", "linear")
+
+MANIFEST = "manifest.json"
+
+# Vertical position of the simplex in the unit square of the world
+WORLD_OFFSET = (1 - SQRT3OVER2) / 2.
+
+TileStats = namedtuple('TileStats', ['written', 'unchanged', 'removed'])
+
+
+## Tile Geometry ##
+
+def default_max_zoom(scale, tile_size=256):
+    """The smallest zoom with at least one pixel per lattice cell."""
+    return max(0, int(np.ceil(np.log2(float(scale) / tile_size))))
+
+
+def tile_points(z, x, y, tile_size=256, permutation=None, corners=False):
+    """
+    Computes the normalized ternary coordinates of the pixel centers of a
+    tile, row by row from the top, or of its four corners.
+
+    Returns
+    -------
+    numpy array of shape (tile_size ** 2, 3), or (4, 3) for the corners
+    """
+
+    n = 2 ** z
+    if corners:
+        offsets = np.array([0., 1.])
+    else:
+        offsets = (np.arange(tile_size) + 0.5) / tile_size
+    rows, columns = np.meshgrid(offsets, offsets, indexing='ij')
+    xy = np.column_stack([(x + columns.ravel()) / n,
+                          1 - (y + rows.ravel()) / n - WORLD_OFFSET])
+    return unproject_points(xy, 1, permutation=permutation)
+
+
+def zoom_tiles(z, permutation=None):
+    """
+    Lists the tiles of a zoom level overlapping the simplex.
+
+    Returns
+    -------
+    list of (x, y) tiles
+    """
+
+    n = 2 ** z
+    top = int(np.floor((1 - WORLD_OFFSET - SQRT3OVER2) * n))
+    bottom = min(int(np.ceil((1 - WORLD_OFFSET) * n)), n)
+    tiles = []
+    for y in range(max(top, 0), bottom):
+        for x in range(n):
+            corners = tile_points(z, x, y, permutation=permutation, corners=True)
+            # The tile is outside if an edge of the simplex separates them
+            if not (corners < 0).all(axis=0).any():
+                tiles.append((x, y))
+    return tiles
+
+
+def lattice_window(corners, scale):
+    """
+    Computes the rows and columns of the lattice array covering the cells
+    overlapping a tile, given the ternary coordinates of its corners.
+
+    Returns
+    -------
+    (i0, i1, j0, j1): the window is array[i0:i1, j0:j1]
+    """
+
+    # Coordinates are linear in the plane, so their extremes are at corners
+    low = np.clip(np.floor(corners.min(axis=0) * scale) - 1, 0, scale)
+    high = np.clip(np.floor(corners.max(axis=0) * scale) + 2, 0, scale + 1)
+    return int(low[0]), int(high[0]), int(low[1]), int(high[1])
+
+
+## Tile Rendering ##
+
+def _tile_path(directory, z, x, y):
+    return os.path.join(directory, str(z), str(x), "%d.png" % y)
+
+
+def _save_tile(path, rgba):
+    folder = os.path.dirname(path)
+    if not os.path.isdir(folder):
+        os.makedirs(folder, exist_ok=True)
+    image.imsave(path, rgba, format="png")
+
+
+def rasterize_tile(window, offset, scale, z, x, y, style="triangular",
+                   cmap=None, vmin=0., vmax=1., permutation=None, tile_size=256):
+    """
+    Rasterizes a tile from a window of the lattice array.
+
+    Parameters
+    ----------
+    window: numpy array
+        The lattice values array[i0:i1, j0:j1] of the cells overlapping the
+        tile, see `lattice_window`, NaN where there is no data.
+    offset: (i0, j0)
+        The position of the window in the lattice array.
+    scale: Int
+        The scale of the lattice.
+    z, x, y: Int
+        The tile.
+    style: string, "triangular"
+        "triangular" fills the triangles of the lattice with the average of
+        their vertices as heatmap, "hexagonal" takes the value of the
+        nearest lattice point and "linear" interpolates linearly.
+
+    Returns
+    -------
+    numpy uint8 array of shape (tile_size, tile_size, 4), or None if the
+    tile is empty
+    """
+
+    points = tile_points(z, x, y, tile_size=tile_size, permutation=permutation)
+    cells, vertices, weights = locate_points(points, scale)
+    inside = (cells >= 0) & (weights >= -1e-9).all(axis=1)
+    vertices = vertices - np.asarray(offset)
+    vertices[..., 0] = np.clip(vertices[..., 0], 0, window.shape[0] - 1)
+    vertices[..., 1] = np.clip(vertices[..., 1], 0, window.shape[1] - 1)
+    corners = window[vertices[..., 0], vertices[..., 1]]
+    if style == "hexagonal":
+        values = corners[np.arange(len(corners)), weights.argmax(axis=1)]
+    elif style == "linear":
+        values = (weights * corners).sum(axis=1)
+    else:
+        values = corners.mean(axis=1)
+    values[~inside] = np.nan
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return None
+    span = float(vmax - vmin) or 1.
+    rgba = get_cmap(cmap)(np.where(valid, (values - vmin) / span, 0), bytes=True)
+    rgba[~valid] = 0
+    return rgba.reshape(tile_size, tile_size, 4)
+
+
+def downsample_tile(children, tile_size=256):
+    """
+    Combines the four children of a tile, given as ((top left, top right),
+    (bottom left, bottom right)) uint8 RGBA arrays or None if empty, into
+    the tile, averaging 2 x 2 pixels weighted by their opacity.
+
+    Returns
+    -------
+    numpy uint8 array of shape (tile_size, tile_size, 4), or None if empty
+    """
+
+    if all(child is None for row in children for child in row):
+        return None
+    empty = np.zeros((tile_size, tile_size, 4))
+    rows = [np.concatenate([empty if child is None else child for child in row], axis=1)
+            for row in children]
+    pixels = np.concatenate(rows, axis=0).astype(float)
+    blocks = pixels.reshape(tile_size, 2, tile_size, 2, 4)
+    alpha = blocks[..., 3].sum(axis=(1, 3))
+    rgba = np.zeros((tile_size, tile_size, 4))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for channel in range(3):
+            rgba[..., channel] = np.where(
+                alpha > 0,
+                (blocks[..., channel] * blocks[..., 3]).sum(axis=(1, 3)) / alpha, 0)
+    rgba[..., 3] = alpha / 4.
+    return np.round(rgba).astype(np.uint8)
+
+
+def _read_tile(path):
+    if not os.path.exists(path):
+        return None
+    return np.round(image.imread(path) * 255).astype(np.uint8)
+
+
+def _render_job(job):
+    """Renders a tile in a worker. Returns whether the tile was written."""
+
+    kind, path, arguments = job
+    if kind == "lattice":
+        rgba = rasterize_tile(*arguments[0], **arguments[1])
+    else:
+        children, tile_size = arguments
+        rgba = downsample_tile([[_read_tile(child) for child in row]
+                                for row in children], tile_size=tile_size)
+    if rgba is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+    _save_tile(path, rgba)
+    return True
+
+
+## Export ##
+
+def _hash(*parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(str(part.shape).encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(json.dumps(part).encode())
+    return digest.hexdigest()
+
+
+def read_manifest(directory):
+    """Reads the manifest of a tile pyramid, an empty one if absent."""
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {"tiles": {}}
+    with open(path) as manifest_file:
+        return json.load(manifest_file)
+
+
+def export_tiles(data, scale, directory, max_zoom=None, min_zoom=0,
+                 style="triangular", cmap=None, vmin=None, vmax=None,
+                 permutation=None, tile_size=256, processes=None, force=False):
+    """
+    Exports a heatmap as a z/x/y PNG tile pyramid, see the module
+    documentation. Only the tiles whose source changed since the last export
+    to the directory are rendered, across a pool of worker processes.
+
+    Parameters
+    ----------
+    data: dictionary or numpy array
+        Heatmap data mapping (i, j) to values, or a lattice array of shape
+        (scale + 1, scale + 1) as from `helpers.dict_to_lattice`, which is
+        much more compact for large scales.
+    scale: Int
+        The scale of the lattice.
+    directory: string
+        The root directory of the pyramid.
+    max_zoom: Int, None
+        The deepest zoom, by default the first with at least one pixel per
+        lattice cell.
+    min_zoom: Int, 0
+        The coarsest zoom.
+    style: string, "triangular"
+        "triangular", "hexagonal" or "linear", see `rasterize_tile`.
+    cmap: String or matplotlib.colors.Colormap, None
+        The name of the Matplotlib colormap to use.
+    vmin: float, None
+        The minimum color value, the minimum of the data by default.
+    vmax: float, None
+        The maximum color value, the maximum of the data by default.
+    permutation: string, None
+        A permutation of the coordinates
+    tile_size: Int, 256
+        The width and height of the tiles in pixels.
+    processes: int, None
+        The number of worker processes, defaults to the number of CPUs. If
+        1, the tiles are rendered in the current process.
+    force: bool, False
+        Render all the tiles, even if unchanged.
+
+    Returns
+    -------
+    TileStats (written, unchanged, removed): the numbers of tiles written,
+    kept from the previous export, and deleted because they became empty or
+    are no longer part of the pyramid
+    """
+
+    if style not in TILE_STYLES:
+        raise ValueError("style must be one of %s" % ", ".join(TILE_STYLES))
+    scale = int(scale)
+    if isinstance(data, dict):
+        array = dict_to_lattice(data, scale)
+    else:
+        array = np.asarray(data, dtype=float)
+        if array.shape != (scale + 1, scale + 1):
+            raise ValueError("The lattice array does not match the scale.")
+    if vmin is None:
+        vmin = float(np.nanmin(array))
+    if vmax is None:
+        vmax = float(np.nanmax(array))
+    if max_zoom is None:
+        max_zoom = default_max_zoom(scale, tile_size)
+    if min_zoom > max_zoom:
+        raise ValueError("min_zoom must not exceed max_zoom.")
+    cmap = get_cmap(cmap)
+    options = dict(style=style, cmap=cmap, vmin=vmin, vmax=vmax,
+                   permutation=permutation, tile_size=tile_size)
+    parameters = [scale, style, cmap.name, vmin, vmax, permutation, tile_size]
+
+    previous_tiles = read_manifest(directory)["tiles"]
+    old = dict() if force else previous_tiles
+    tiles = dict()
+    written = 0
+    unchanged = 0
+    removed = 0
+    pool = None
+    if processes != 1:
+        pool = multiprocessing.Pool(processes=processes)
+    try:
+        for z in range(max_zoom, min_zoom - 1, -1):
+            jobs = []
+            keys = []
+            for x, y in zoom_tiles(z, permutation=permutation):
+                key = "%d/%d/%d" % (z, x, y)
+                path = _tile_path(directory, z, x, y)
+                if z == max_zoom:
+                    corners = tile_points(z, x, y, permutation=permutation,
+                                          corners=True)
+                    i0, i1, j0, j1 = lattice_window(corners, scale)
+                    window = array[i0:i1, j0:j1]
+                    digest = _hash(parameters, [z, x, y, i0, j0], window)
+                    job = ("lattice", path,
+                           ((window, (i0, j0), scale, z, x, y), options))
+                else:
+                    children = [[(z + 1, 2 * x + dx, 2 * y + dy) for dx in (0, 1)]
+                                for dy in (0, 1)]
+                    digest = _hash([tiles.get("%d/%d/%d" % child, [None])[0]
+                                    for row in children for child in row])
+                    job = ("children", path,
+                           ([[_tile_path(directory, *child) for child in row]
+                             for row in children], tile_size))
+                previous = old.get(key)
+                if previous and previous[0] == digest and (
+                        not previous[1] or os.path.exists(path)):
+                    tiles[key] = previous
+                    unchanged += 1
+                    continue
+                jobs.append(job)
+                keys.append((key, digest))
+            if pool is None:
+                results = [_render_job(job) for job in jobs]
+            else:
+                results = pool.map(_render_job, jobs)
+            for (key, digest), result in zip(keys, results):
+                tiles[key] = [digest, result]
+                written += result
+                if not result and previous_tiles.get(key, [None, False])[1]:
+                    removed += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # Remove the tiles of the previous export that no longer exist
+    for key in set(previous_tiles).difference(tiles):
+        path = _tile_path(directory, *[int(n) for n in key.split("/")])
+        if os.path.exists(path):
+            os.remove(path)
+            removed += 1
+    manifest = {"scale": scale, "style": style, "cmap": cmap.name,
+                "vmin": vmin, "vmax": vmax, "permutation": permutation,
+                "tile_size": tile_size, "min_zoom": min_zoom,
+                "max_zoom": max_zoom, "world_offset": WORLD_OFFSET,
+                "tiles": tiles}
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(os.path.join(directory, MANIFEST), 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+    return TileStats(written, unchanged, removed)
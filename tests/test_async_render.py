@@ -0,0 +1,146 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import unittest
+
+from ternary.async_render import AsyncRenderer, _render_bytes, render_async
+from ternary.batch import render_spec
+
+
+def example_spec(**kwargs):
+    spec = {
+        "scale": 10,
+        "figsize": (4, 3),
+        "chrome": [("boundary", {"linewidth": 1.0})],
+        "plots": [("heatmapf", {"func": lambda p: p[0], "style": "t"})],
+        "savefig": {"dpi": 30},
+    }
+    spec.update(kwargs)
+    return spec
+
+
+class AsyncRenderCases(unittest.TestCase):
+
+    def test_render(self):
+        expected = render_spec(example_spec())
+        png = asyncio.run(render_async(example_spec()))
+        self.assertEqual(png, expected)
+        self.assertRaises(ValueError, asyncio.run,
+                          render_async(example_spec(filename="figure.png")))
+
+    def test_concurrency_and_stream(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def render(spec, format=None):
+            with lock:
+                active.append(spec)
+                peak.append(len(active))
+            try:
+                return _render_bytes(spec, format=format)
+            finally:
+                with lock:
+                    active.remove(spec)
+
+        class CountingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                return ThreadPoolExecutor.submit(
+                    self, render, *fn.args, **fn.keywords)
+
+        executor = CountingExecutor(max_workers=4)
+        renderer = AsyncRenderer(executor=executor, max_concurrency=2,
+                                 chunk_size=1000)
+
+        async def main():
+            specs = [example_spec(plots=[("scatter", {"points": [(i, 1, 9 - i)]})])
+                     for i in range(6)]
+            results = await renderer.render_many(specs)
+            chunks = [chunk async for chunk in renderer.stream(specs[0], format="svg")]
+            return results, chunks
+
+        results, chunks = asyncio.run(main())
+        executor.shutdown()
+        self.assertEqual(len(results), 6)
+        self.assertTrue(all(r.startswith(b"\x89PNG") for r in results))
+        self.assertLessEqual(max(peak), 2)
+        self.assertTrue(all(len(chunk) <= 1000 for chunk in chunks))
+        self.assertIn(b"<svg", b"".join(chunks))
+
+    def test_isolation(self):
+        # Figures reused by an executor thread keep nothing of other specs
+        scatter = ("scatter", {"points": [(1, 2, 7)]})
+        titled = [example_spec(plots=[("set_title", {"title": "Title"}), scatter]),
+                  example_spec(plots=[scatter])]
+        expected = [render_spec(spec, reuse=False) for spec in titled]
+        self.assertNotEqual(expected[0], expected[1])
+        # A single thread, so that both specs share its figure
+        executor = ThreadPoolExecutor(max_workers=1)
+        renderer = AsyncRenderer(executor=executor, max_concurrency=2)
+
+        async def main():
+            results = []
+            for _ in range(3):
+                results.append(await renderer.render_many(titled))
+            return results
+
+        results = asyncio.run(main())
+        executor.shutdown()
+        for result in results:
+            self.assertEqual(result, expected)
+
+    def test_cancel(self):
+        renderer = AsyncRenderer(max_concurrency=1)
+
+        async def main():
+            first = asyncio.ensure_future(renderer.render(example_spec()))
+            second = asyncio.ensure_future(renderer.render(example_spec()))
+            await asyncio.sleep(0)
+            second.cancel()
+            png = await first
+            with self.assertRaises(asyncio.CancelledError):
+                await second
+            # The semaphore was released
+            return png, await renderer.render(example_spec())
+
+        first, third = asyncio.run(main())
+        self.assertEqual(first, third)
+
+    def test_cancel_running(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def func(p):
+            started.set()
+            release.wait(timeout=10)
+            return p[0]
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        renderer = AsyncRenderer(executor=executor, max_concurrency=1)
+        blocking = example_spec(plots=[("heatmapf", {"func": func})])
+        counted = example_spec(plots=[("heatmapf", {"func": lambda p: calls.append(p) or p[0]})])
+
+        async def main():
+            first = asyncio.ensure_future(renderer.render(blocking))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            first.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+            # The cancelled render still runs and holds the only permit
+            second = asyncio.ensure_future(renderer.render(counted))
+            await asyncio.sleep(0.1)
+            waited = not calls
+            release.set()
+            return waited, await second
+
+        waited, png = asyncio.run(main())
+        executor.shutdown()
+        self.assertTrue(waited)
+        self.assertTrue(png.startswith(b"\x89PNG"))
+        self.assertTrue(calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
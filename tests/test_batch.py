@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from ternary.batch import chrome_key, normalize_calls, render_batch, render_spec
+
+
+def example_spec(**kwargs):
+    spec = {
+        "scale": 10,
+        "figsize": (4, 3),
+        "chrome": [("boundary", {"linewidth": 1.0}),
+                   ("gridlines", {"multiple": 2})],
+        "plots": [("heatmapf", {"func": lambda p: p[0], "style": "h"}),
+                  ("scatter", {"points": [(1, 2, 7), (3, 3, 4)]})],
+        "savefig": {"dpi": 30},
+    }
+    spec.update(kwargs)
+    return spec
+
+
+def first_coordinate(p):
+    return p[0]
+
+
+class FunctionCases(unittest.TestCase):
+
+    def test_normalize_calls(self):
+        calls = normalize_calls({"boundary": {"linewidth": 2},
+                                 "ticks": [{"axis": "l"}, {"axis": "b"}]})
+        expected = [("boundary", (), {"linewidth": 2}),
+                    ("ticks", (), {"axis": "l"}),
+                    ("ticks", (), {"axis": "b"})]
+        self.assertEqual(calls, expected)
+        self.assertEqual(normalize_calls(None), [])
+        self.assertRaises(ValueError, normalize_calls, [("boundary",)])
+
+    def test_render_spec_reuse(self):
+        # A reused figure renders identically to a fresh one
+        fresh = render_spec(example_spec(), reuse=False)
+        first = render_spec(example_spec())
+        second = render_spec(example_spec())
+        self.assertTrue(first.startswith(b"\x89PNG"))
+        self.assertEqual(first, second)
+        self.assertEqual(fresh, second)
+
+    def test_render_spec_reset(self):
+        # Labels, titles and backgrounds of a job do not carry over
+        decorated = example_spec(plots=[
+            ("left_axis_label", {"label": "X"}),
+            ("set_title", {"title": "T"}),
+            ("set_background_color", {"color": "red"}),
+            ("scatter", {"points": [(1, 2, 7)]})])
+        plain = example_spec(plots=[("scatter", {"points": [(3, 3, 4)]})])
+        expected = render_spec(plain, reuse=False)
+        for _ in range(2):
+            self.assertNotEqual(render_spec(decorated), expected)
+            self.assertEqual(render_spec(decorated), render_spec(decorated, reuse=False))
+            self.assertEqual(render_spec(plain), expected)
+
+    def test_render_batch_to_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filenames = [os.path.join(directory, "%d.png" % i) for i in range(3)]
+            specs = [{"scale": 10, "filename": f, "savefig": {"dpi": 30},
+                      "plots": [("scatter", {"points": [(i, 1, 9 - i)]})]}
+                     for i, f in enumerate(filenames)]
+            results = render_batch(specs, processes=1)
+            self.assertEqual(results, filenames)
+            for f in filenames:
+                self.assertTrue(os.path.exists(f))
+
+    def test_render_batch_processes(self):
+        # Picklable specs, rendered in worker processes
+        specs = [example_spec(plots=[("heatmapf", {"func": first_coordinate}),
+                                     ("scatter", {"points": [(i, 1, 9 - i)]})])
+                 for i in range(4)]
+        results = render_batch(specs, processes=2)
+        self.assertEqual(results, [render_spec(spec) for spec in specs])
+
+    def test_chrome_key(self):
+        # Chrome that cannot be pickled is hashed on its contents
+        spec = example_spec(chrome=[("ticks", {"tick_formats": lambda x: "%d" % x})])
+        same = example_spec(chrome=[("ticks", {"tick_formats": lambda x: "%d" % x})])
+        other = example_spec(chrome=[("ticks", {"tick_formats": lambda x: "%.1f" % x})])
+        self.assertEqual(chrome_key(spec), chrome_key(same))
+        self.assertNotEqual(chrome_key(spec), chrome_key(other))
+        self.assertNotEqual(chrome_key(spec), chrome_key(example_spec()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import io
+import unittest
+import warnings
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from ternary.binning import LatticeHistogram, LatticeStatistics, bin_points, lattice_indices, read_chunks
+from ternary.helpers import dict_to_lattice, lattice_to_dict, project_points, simplex_iterator
+
+
+class BinningCases(unittest.TestCase):
+
+    def test_lattice_indices(self):
+        scale = 4
+        # Lattice points map to themselves, at any scale of the input
+        lattice = np.array(list(simplex_iterator(scale)))
+        for factor in [1, 0.5, 3]:
+            i, j = lattice_indices(lattice * factor, scale)
+            assert_array_equal(i, lattice[:, 0])
+            assert_array_equal(j, lattice[:, 1])
+        # Random points map to their nearest lattice point
+        points = np.random.RandomState(0).dirichlet([1, 1, 1], size=2000)
+        i, j = lattice_indices(points, scale)
+        projected = project_points(points * scale)
+        lattice_projected = project_points(lattice)
+        distances = np.linalg.norm(projected[:, np.newaxis] - lattice_projected, axis=2)
+        nearest = lattice[np.argmin(distances, axis=1)]
+        assert_array_equal(i, nearest[:, 0])
+        assert_array_equal(j, nearest[:, 1])
+        # Points that cannot be normalized are marked
+        i, j = lattice_indices([(0, 0, 0)], scale)
+        assert_array_equal(i, [-1])
+
+    def test_histogram(self):
+        points = np.array([(1, 0, 0), (0.9, 0.1, 0), (0, 0, 1), (0, 0, 0)])
+        histogram = LatticeHistogram(scale=2)
+        histogram.add(points[:2]).add(points[2:])
+        self.assertEqual(histogram.total, 3)
+        data = histogram.data()
+        self.assertEqual(len(data), 6)
+        self.assertEqual(data[(2, 0)], 2)
+        self.assertEqual(data[(0, 0)], 1)
+        self.assertEqual(data[(1, 1)], 0)
+        self.assertEqual(histogram.data(density=True)[(2, 0)], 2. / 3)
+
+        other = LatticeHistogram(scale=2).add([(0, 1, 0)], weights=[2.5])
+        histogram.merge(other)
+        self.assertEqual(histogram.data()[(0, 2)], 2.5)
+        self.assertRaises(ValueError, histogram.merge, LatticeHistogram(scale=3))
+
+        chunks = [points[:2], points[2:]]
+        self.assertEqual(bin_points(chunks, 2), bin_points(points, 2))
+
+    def test_read_chunks(self):
+        text = "\n".join("%d 1 1" % i for i in range(7))
+        chunks = list(read_chunks(io.StringIO(text), chunk_size=3))
+        self.assertEqual([len(c) for c in chunks], [3, 3, 1])
+        # No warning when the last chunk ends the file
+        text = "\n".join("%d 1 1" % i for i in range(6))
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            chunks = list(read_chunks(io.StringIO(text), chunk_size=3))
+        self.assertEqual([len(c) for c in chunks], [3, 3])
+
+    def test_lattice_conversion(self):
+        data = {(0, 0): 1., (1, 0): 2., (0, 1): 3.}
+        array = dict_to_lattice(data, 2)
+        self.assertEqual(array.shape, (3, 3))
+        self.assertEqual(array[1, 0], 2.)
+        self.assertTrue(np.isnan(array[1, 1]))
+        self.assertEqual(lattice_to_dict(array), data)
+        self.assertEqual(list(lattice_to_dict(np.zeros((4, 4)))),
+                         [(i, j) for i, j, k in simplex_iterator(3)])
+        self.assertEqual(list(lattice_to_dict(np.zeros((4, 4)), boundary=False)),
+                         [(1, 1)])
+
+
+class StatisticsCases(unittest.TestCase):
+
+    def test_statistics(self):
+        random = np.random.RandomState(1)
+        points = random.dirichlet([1, 1, 1], size=1000)
+        values = random.normal(size=1000)
+        values[3] = np.nan
+        scale = 3
+
+        # Accumulate in chunks and in separate accumulators
+        statistics = LatticeStatistics(scale)
+        statistics.add_chunks([(points[:100], values[:100]),
+                               (points[100:400], values[100:400])])
+        other = LatticeStatistics(scale).add(points[400:], values[400:])
+        statistics.merge(other)
+
+        i, j = lattice_indices(points, scale)
+        for key in [(0, 0), (1, 1), (1, 2), (3, 0)]:
+            selected = values[(i == key[0]) & (j == key[1]) & ~np.isnan(values)]
+            self.assertEqual(statistics.data("count")[key], len(selected))
+            self.assertAlmostEqual(statistics.data("sum")[key], selected.sum())
+            self.assertAlmostEqual(statistics.data("mean")[key], selected.mean())
+            self.assertAlmostEqual(statistics.data("variance")[key], selected.var())
+            self.assertAlmostEqual(statistics.data("std", ddof=1)[key], selected.std(ddof=1))
+            self.assertEqual(statistics.data("min")[key], selected.min())
+            self.assertEqual(statistics.data("max")[key], selected.max())
+        self.assertRaises(ValueError, statistics.data, "median")
+        self.assertRaises(ValueError, statistics.merge, LatticeStatistics(4))
+
+    def test_empty_cells(self):
+        statistics = LatticeStatistics(2).add([(1, 0, 0), (1, 0, 0)], [1., 3.])
+        self.assertEqual(statistics.data("mean"), {(2, 0): 2.})
+        self.assertEqual(statistics.data("count")[(0, 0)], 0)
+        self.assertEqual(len(statistics.data("count")), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from ternary.batch import new_figure
+from ternary.cache import RenderCache, scene_hash
+
+
+def draw_scene(tax, points):
+    tax.boundary(linewidth=1.0)
+    tax.scatter(points, color="red")
+    tax.left_axis_label("Left")
+
+
+class SceneHashCases(unittest.TestCase):
+
+    def test_scene_hash(self):
+        points = np.array([(1, 2, 7), (3, 3, 4)])
+        scene = [("scatter", (points,), {"color": "red"})]
+        same = [("scatter", (points.copy(),), {"color": "red"})]
+        as_list = [("scatter", ([(1, 2, 7), (3, 3, 4)],), {"color": "red"})]
+        changed = [("scatter", (points + 1,), {"color": "red"})]
+        other_kwargs = [("scatter", (points,), {"color": "blue"})]
+        self.assertEqual(scene_hash(scene), scene_hash(same))
+        # Lists and arrays with the same contents plot the same
+        self.assertEqual(scene_hash(scene), scene_hash(as_list))
+        self.assertNotEqual(scene_hash(scene), scene_hash(changed))
+        self.assertNotEqual(scene_hash(scene), scene_hash(other_kwargs))
+        self.assertNotEqual(scene_hash(scene), scene_hash(scene, {"dpi": 10}))
+        # Dictionaries hash independently of their order
+        self.assertEqual(scene_hash([("heatmap", ({(0, 1): 1, (1, 0): 2},), {})]),
+                         scene_hash([("heatmap", ({(1, 0): 2, (0, 1): 1},), {})]))
+        # Functions hash on their code and closure
+        f = lambda a: (lambda p: p[0] * a)
+        self.assertEqual(scene_hash([("heatmapf", (f(1),), {})]),
+                         scene_hash([("heatmapf", (f(1),), {})]))
+        self.assertNotEqual(scene_hash([("heatmapf", (f(1),), {})]),
+                            scene_hash([("heatmapf", (f(2),), {})]))
+
+    def test_function_globals(self):
+        # Module level values read by a function are part of its hash
+        global WEIGHTS
+        f = lambda p: WEIGHTS.dot(p)
+        g = lambda p: sum(WEIGHTS[i] * x for i, x in enumerate(p))
+        WEIGHTS = np.array([1., 2., 3.])
+        hashes = [scene_hash([("heatmapf", (func,), {})]) for func in (f, g)]
+        WEIGHTS = np.array([3., 2., 1.])
+        for func, before in zip((f, g), hashes):
+            self.assertNotEqual(scene_hash([("heatmapf", (func,), {})]), before)
+
+    def test_function_hash_across_processes(self):
+        # Functions with nested code objects hash the same in every process
+        script = ("from ternary.cache import scene_hash\n"
+                  "def f(p):\n"
+                  "    g = lambda x: x * 2\n"
+                  "    return sum(g(x) for x in [c for c in p])\n"
+                  "print(scene_hash([('heatmapf', (f,), {})]))\n")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        digests = set(subprocess.check_output([sys.executable, "-c", script],
+                                              cwd=root).strip()
+                      for _ in range(2))
+        self.assertEqual(len(digests), 1)
+
+
+class RenderCacheCases(unittest.TestCase):
+
+    def test_store_and_evict(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RenderCache(directory, max_size=25)
+            self.assertIsNone(cache.get("a"))
+            cache.put("a", b"0123456789")
+            cache.put("b", b"0123456789")
+            self.assertEqual(cache.get("a"), b"0123456789")
+            os.utime(os.path.join(directory, "a"), (1, 1))
+            cache.put("c", b"0123456789")
+            # The least recently used entry was evicted
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(cache.size(), 20)
+            cache.clear()
+            self.assertEqual(cache.size(), 0)
+
+    def test_savefig(self):
+        points = [(1, 2, 7), (3, 3, 4)]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RenderCache(directory)
+            tax = new_figure(scale=10, figsize=(3, 3))
+            tax.set_render_cache(cache)
+            draw_scene(tax, points)
+            first = tax.savefig(dpi=30)
+            self.assertTrue(first.startswith(b"\x89PNG"))
+            self.assertEqual(len(cache.entries()), 1)
+
+            # An identical scene is served from the cache without drawing
+            tax = new_figure(scale=10, figsize=(3, 3))
+            tax.set_render_cache(cache)
+            draw_scene(tax, points)
+            with tempfile.TemporaryDirectory() as output_directory:
+                filename = os.path.join(output_directory, "out.png")
+                tax.savefig(filename, dpi=30)
+                with open(filename, 'rb') as f:
+                    self.assertEqual(f.read(), first)
+            self.assertEqual(len(tax.get_axes().collections), 0)
+
+            # A changed scene is rendered
+            tax = new_figure(scale=10, figsize=(3, 3))
+            tax.set_render_cache(cache)
+            draw_scene(tax, [(1, 2, 7)])
+            self.assertNotEqual(tax.savefig(dpi=30), first)
+            self.assertEqual(len(tax.get_axes().collections), 1)
+            self.assertEqual(len(cache.entries()), 2)
+
+
+    def test_recording(self):
+        points = [(1, 2, 7), (3, 3, 4)]
+        # Without a cache plots are drawn at once, return their usual value
+        # and are not kept in the scene
+        tax = new_figure(scale=10, figsize=(3, 3))
+        ax = tax.scatter(points, color="red")
+        self.assertIs(ax, tax.get_axes())
+        self.assertEqual(len(ax.collections), 1)
+        self.assertNotIn("scatter", [name for name, _, _ in tax.get_scene()])
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RenderCache(directory)
+            # The scatter above is not in the scene, so the cache is bypassed
+            tax.set_render_cache(cache)
+            self.assertTrue(tax.savefig(dpi=30).startswith(b"\x89PNG"))
+            self.assertEqual(len(cache.entries()), 0)
+
+            # With a cache, plots are recorded and return None until drawn
+            tax = new_figure(scale=10, figsize=(3, 3))
+            tax.set_render_cache(cache)
+            self.assertIsNone(tax.scatter(points, color="red"))
+            self.assertIn("scatter", [name for name, _, _ in tax.get_scene()])
+            tax.savefig(dpi=30)
+            self.assertEqual(len(cache.entries()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
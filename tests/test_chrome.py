@@ -0,0 +1,50 @@
+import pickle
+import unittest
+
+from ternary.batch import normalize_calls, render_spec
+from ternary.chrome import ChromeTemplate
+
+
+def example_template():
+    template = ChromeTemplate(scale=10)
+    template.boundary(linewidth=1.0).gridlines(multiple=2, color="blue")
+    template.left_axis_label("Left").axes_call("axis", "off")
+    return template
+
+
+class ChromeTemplateCases(unittest.TestCase):
+
+    def test_recording(self):
+        template = example_template()
+        expected = [("boundary", (), {"linewidth": 1.0}),
+                    ("gridlines", (), {"multiple": 2, "color": "blue"}),
+                    ("left_axis_label", ("Left",), {}),
+                    ("ax.axis", ("off",), {})]
+        self.assertEqual(list(template), expected)
+        self.assertEqual(normalize_calls(template), expected)
+        copy = pickle.loads(pickle.dumps(template))
+        self.assertEqual(list(copy), expected)
+
+    def test_figure(self):
+        fig, tax = example_template().figure(figsize=(3, 3))
+        self.assertIn("left", tax._labels)
+        self.assertFalse(tax.get_axes().axison)
+        spec = {"scale": 10, "chrome": example_template(),
+                "plots": [("scatter", {"points": [(1, 2, 7)]})]}
+        self.assertTrue(render_spec(spec).startswith(b"\x89PNG"))
+
+    def test_blitter(self):
+        blitter = example_template().blitter(figsize=(3, 3), dpi=40)
+        plots = [("scatter", {"points": [(1, 2, 7), (5, 5, 0)]})]
+        first = blitter.render(plots)
+        second = blitter.render(lambda tax: tax.scatter([(1, 2, 7), (5, 5, 0)]))
+        empty = blitter.render([])
+        self.assertTrue(first.startswith(b"\x89PNG"))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, empty)
+        # Data artists are removed after each render
+        self.assertEqual(blitter.render([]), empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+
+import math
+import unittest
+
+import numpy as np
+
+from ternary.evaluation import (LatticeEvaluator, canonical_points, evaluate_lattice,
+                                symmetry_group)
+from ternary.helpers import simplex_iterator
+
+
+def entropy(p):
+    return -sum(x * math.log(x) for x in p if x > 0)
+
+
+class SymmetryCases(unittest.TestCase):
+
+    def test_symmetry_group(self):
+        self.assertEqual(len(symmetry_group(None)), 1)
+        self.assertEqual(len(symmetry_group("full")), 6)
+        self.assertEqual(len(symmetry_group("S3")), 6)
+        self.assertEqual(len(symmetry_group("cyclic")), 3)
+        self.assertEqual(symmetry_group("02").tolist(), [[0, 1, 2], [2, 1, 0]])
+        # A rotation generates the cyclic group, two transpositions all
+        self.assertEqual(len(symmetry_group("120")), 3)
+        self.assertEqual(len(symmetry_group(["01", "12"])), 6)
+        self.assertRaises(ValueError, symmetry_group, "00")
+
+    def test_canonical_points(self):
+        points = np.array(list(simplex_iterator(6)))
+        canonical = canonical_points(points, "full")
+        self.assertTrue((canonical[:, 0] >= canonical[:, 1]).all())
+        self.assertTrue((canonical[:, 1] >= canonical[:, 2]).all())
+        np.testing.assert_array_equal(np.sort(canonical, axis=1), np.sort(points, axis=1))
+        canonical = canonical_points(points, "01")
+        self.assertTrue((canonical[:, 0] >= canonical[:, 1]).all())
+        np.testing.assert_array_equal(canonical[:, 2], points[:, 2])
+
+    def test_evaluate_lattice(self):
+        scale = 20
+        for symmetry in [None, "full", "cyclic", "12"]:
+            calls = []
+
+            def func(p):
+                calls.append(p)
+                return entropy(p)
+
+            data = evaluate_lattice(func, scale, symmetry=symmetry)
+            expected = dict(((i, j), entropy([i / 20., j / 20., k / 20.]))
+                            for i, j, k in simplex_iterator(scale))
+            self.assertEqual(list(data.keys()), list(expected.keys()))
+            for key, value in expected.items():
+                self.assertAlmostEqual(data[key], value)
+            if symmetry == "full":
+                # One evaluation per multiset {i, j, k}
+                self.assertEqual(len(calls), 44)
+        data = evaluate_lattice(entropy, scale, boundary=False, symmetry="full")
+        self.assertEqual(len(data), 171)
+
+
+class LatticeEvaluatorCases(unittest.TestCase):
+
+    def test_refinement(self):
+        evaluator = LatticeEvaluator(entropy)
+        data = evaluator.evaluate(50)
+        self.assertEqual(evaluator.evaluations, 1326)
+        self.assertEqual(evaluator.missing(100), 5151 - 1326)
+        fine = evaluate_lattice(evaluator, 100)
+        self.assertEqual(evaluator.evaluations, 5151)
+        self.assertEqual(fine, evaluate_lattice(entropy, 100))
+        for (i, j), value in data.items():
+            self.assertEqual(fine[(2 * i, 2 * j)], value)
+        # Divisors of evaluated scales are free
+        self.assertEqual(evaluator.missing(25), 0)
+        self.assertEqual(evaluator.missing(20), 0)
+        self.assertEqual(evaluator.missing(30), 496 - 66)
+
+        evaluator = LatticeEvaluator(entropy, symmetry="full")
+        data = evaluator.evaluate(20)
+        for key, value in evaluate_lattice(entropy, 20).items():
+            self.assertAlmostEqual(data[key], value)
+        self.assertEqual(evaluator.evaluations, 44)
+
+    def test_downsample(self):
+        evaluator = LatticeEvaluator(lambda p: p[0] + 2 * p[1])
+        self.assertRaises(ValueError, evaluator.downsample, 5)
+        evaluator.evaluate(12)
+        for scale in [4, 5]:
+            data = evaluator.downsample(scale)
+            self.assertEqual(list(data.keys()),
+                             [(i, j) for i, j, k in simplex_iterator(scale)])
+            for (i, j), value in data.items():
+                # Linear functions are interpolated exactly
+                self.assertAlmostEqual(value, (i + 2. * j) / scale)
+        self.assertEqual(evaluator.evaluations, 91)
+
+
+if __name__ == "__main__":
+    unittest.main()
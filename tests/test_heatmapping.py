@@ -1,10 +1,17 @@
 
+import os
+import tempfile
 import unittest
 
+from matplotlib.figure import Figure
+import numpy as np
 from numpy.testing import assert_array_almost_equal
 
+from ternary.contouring import contour, contourf
 from ternary.heatmapping import triangle_coordinates, alt_triangle_coordinates, hexagon_coordinates
-from ternary.helpers import SQRT3OVER2
+from ternary.heatmapping import heatmap, lattice_triangulation, lattice_values
+from ternary.heatmapping import coalesce_polygons, polygon_generator, svg_heatmap
+from ternary.helpers import SQRT3OVER2, simplex_iterator, project_point
 
 class FunctionCases(unittest.TestCase):
 
@@ -23,6 +30,126 @@ class FunctionCases(unittest.TestCase):
                     (4./3, 1./3, 1.0), (2./3, 2./3, 1.), (1./3, 4./3, 1.0)]
         assert_array_almost_equal(coords, expected)
 
+    def test_lattice_triangulation(self):
+        scale = 4
+        triangulation = lattice_triangulation(scale, "120")
+        self.assertIs(triangulation, lattice_triangulation(scale, "120"))
+        points = list(simplex_iterator(scale))
+        expected = [project_point(p, permutation="120") for p in points]
+        assert_array_almost_equal(np.column_stack([triangulation.x, triangulation.y]), expected)
+        # scale ** 2 triangles of equal area
+        triangles = triangulation.triangles
+        self.assertEqual(len(triangles), scale ** 2)
+        for triangle in triangles:
+            vertices = np.array([points[v] for v in triangle])
+            self.assertEqual(np.abs(np.diff(vertices, axis=0)).sum(), 4)
+
+    def test_lattice_values(self):
+        values = lattice_values(lambda p: p[0], 4, boundary=False)
+        self.assertEqual(len(values), 15)
+        self.assertEqual(np.count_nonzero(np.isnan(values)), 12)
+        assert_array_almost_equal(lattice_values({(1, 1): 2., (0, 4, 0): 3.}, 4)[[6, 4]], [2., 3.])
+
+    def test_contour(self):
+        ax = Figure().add_subplot()
+        contours = contour(lambda p: p[0], 10, levels=[0.25, 0.5], ax=ax)
+        self.assertEqual(len(ax.collections), 1)
+        # Lines of constant first coordinate are vertical when projected
+        for path in contours.get_paths():
+            assert_array_almost_equal(np.ptp(path.vertices[:, 0] - path.vertices[:, 1] / np.sqrt(3)), 0)
+        contourf(lambda p: p[0], 10, levels=4, ax=ax, boundary=False)
+        self.assertEqual(len(ax.collections), 2)
+
+    def test_gouraud_heatmap(self):
+        ax = Figure().add_subplot()
+        data = {(i, j): float(i) for i, j, k in simplex_iterator(6, boundary=False)}
+        heatmap(data, 6, ax=ax, style="gouraud", colorbar=False)
+        self.assertEqual(len(ax.collections), 1)
+        collection = ax.collections[0]
+        self.assertEqual(collection.get_array().shape, (28,))
+        # Only the triangles of the interior points are drawn
+        self.assertEqual(len(collection._triangulation.get_masked_triangles()), 9)
+        self.assertRaises(ValueError, heatmap, data, 6, ax=ax, style="gouraud",
+                          use_rgba=True)
+
+    def test_coalesce_polygons(self):
+        # A hexagon of one color around a point of another color
+        scale = 6
+        data = {(i, j): 1. if (i, j) == (2, 2) else 0. for i, j, k in simplex_iterator(scale)}
+        for style, permutation in [("t", None), ("h", "120")]:
+            generated = [(np.array(list(v)), value) for v, value
+                         in polygon_generator(data, scale, style, permutation=permutation)]
+            polygons = [v for v, value in generated]
+            colors = [value > 0.3 for v, value in generated]
+            regions = coalesce_polygons(polygons, colors)
+            self.assertEqual(sorted(len(loops) for color, loops in regions), [1, 2])
+            # The areas of the regions (outlines minus holes) are preserved
+            for color, loops in regions:
+                area = sum(0.5 * np.sum(l[:, 0] * np.roll(l[:, 1], -1) -
+                                        np.roll(l[:, 0], -1) * l[:, 1]) for l in loops)
+                expected = sum(0.5 * abs(np.sum(v[:, 0] * np.roll(v[:, 1], -1) -
+                                                np.roll(v[:, 0], -1) * v[:, 1]))
+                               for v, c in zip(polygons, colors) if c == color)
+                self.assertAlmostEqual(area, expected)
+        # Random colorings, including the boundary cells
+        def area(vertices):
+            return 0.5 * np.sum(vertices[:, 0] * np.roll(vertices[:, 1], -1) -
+                                np.roll(vertices[:, 0], -1) * vertices[:, 1])
+
+        random_state = np.random.RandomState(3)
+        scale = 12
+        data = {(i, j): float(random_state.randint(3)) for i, j, k in simplex_iterator(scale)}
+        for style in ["t", "h", "d"]:
+            for permutation in [None, "201"]:
+                generated = [(np.array(list(v)), value) for v, value
+                             in polygon_generator(data, scale, style, permutation=permutation)]
+                polygons = [v for v, value in generated]
+                colors = [round(value, 6) for v, value in generated]
+                corners = set(tuple(np.round(vertex, 9)) for v in polygons for vertex in v)
+                totals = dict()
+                for color, loops in coalesce_polygons(polygons, colors):
+                    totals[color] = totals.get(color, 0) + sum(area(l) for l in loops)
+                    for loop in loops:
+                        for vertex in loop:
+                            self.assertIn(tuple(np.round(vertex, 9)), corners)
+                for color in set(colors):
+                    expected = sum(abs(area(v)) for v, c in zip(polygons, colors) if c == color)
+                    self.assertAlmostEqual(totals[color], expected)
+
+        ax = Figure().add_subplot()
+        scale = 6
+        data = {(i, j): 1. if (i, j) == (2, 2) else 0. for i, j, k in simplex_iterator(scale)}
+        heatmap(data, scale, ax=ax, style="h", colorbar=False, coalesce=True,
+                cmap="Greys")
+        self.assertEqual(len(ax.collections), 1)
+        self.assertEqual(len(ax.collections[0].get_paths()), 2)
+
+    def test_svg_heatmap_coalesce(self):
+        data = {(i, j): float(i > 3) for i, j, k in simplex_iterator(8)}
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "heatmap.svg")
+            svg_heatmap(data, 8, filename, style="h", coalesce=True)
+            with open(filename) as svg_file:
+                svg = svg_file.read()
+        self.assertEqual(svg.count("<path"), 2)
+        self.assertEqual(svg.count("{fill:"), 2)
+        self.assertNotIn("<polygon", svg)
+
+    def test_rasterized_heatmap(self):
+        data = {(i, j): float(i) for i, j, k in simplex_iterator(10)}
+        for style in ["triangular", "hexagonal", "dual-triangular", "gouraud"]:
+            ax = Figure().add_subplot()
+            heatmap(data, 10, ax=ax, style=style, colorbar=False, rasterized=True)
+            self.assertEqual(len(ax.collections), 1)
+            collection = ax.collections[0]
+            self.assertTrue(collection.get_rasterized())
+            # Clipped to the simplex
+            side = 11 if style == "dual-triangular" else 10
+            path, transform = collection.get_clip_path().get_transformed_path_and_affine()
+            vertices = ax.transData.inverted().transform(transform.transform(path.vertices))
+            assert_array_almost_equal(vertices[:3], [project_point(p) for p in
+                                      [(side, 0, 0), (0, side, 0), (0, 0, side)]])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,16 @@
 import random
 import unittest
 
+from matplotlib import pyplot as plt
+from matplotlib.figure import Figure
+import numpy as np
+
 from numpy.testing import assert_array_equal, assert_array_almost_equal
 
+import ternary
 from ternary.helpers import normalize, project_point, planar_to_coordinates, simplex_iterator, SQRT3OVER2
+from ternary.helpers import douglas_peucker, project_points, unproject_points
+from ternary.helpers import convert_coordinates_sequence
 
 
 class FunctionCases(unittest.TestCase):
@@ -129,6 +136,73 @@ class FunctionCases(unittest.TestCase):
             p2 = planar_to_coordinates(projected, scale=scale)
             assert_array_almost_equal(p, p2)
 
+    @staticmethod
+    def test_project_points():
+        points = [(0, 0, 0), (1, 0, 0), (0, 1, 0), (1, 2, 3), (0.5, 0.25, 0.25)]
+        for permutation in [None, "012", "120", "201", "021"]:
+            expected = [project_point(p, permutation=permutation) for p in points]
+            projected = project_points(points, permutation=permutation)
+            assert_array_almost_equal(projected, expected)
+
+    def test_unproject_points(self):
+        points = np.random.RandomState(0).dirichlet([1, 1, 1], size=20) * 10
+        for permutation in [None, "012", "120", "201", "021"]:
+            xy = project_points(points, permutation=permutation)
+            assert_array_almost_equal(unproject_points(xy, 10, permutation=permutation), points)
+
+        limits = {'b': [67, 76], 'l': [24, 33], 'r': [0, 9]}
+        data = [(70, 25, 5), (67, 33, 0), (72.5, 27.5, 0)]
+        converted = convert_coordinates_sequence(data, 10, limits, 'blr')
+        xy = project_points(converted, permutation="120")
+        assert_array_almost_equal(unproject_points(xy, 10, permutation="120", limits=limits), data)
+
+    def test_axes_unproject(self):
+        points = [(2, 3, 5), (0, 10, 0), (4.5, 1, 4.5)]
+        fig, tax = ternary.figure(scale=10, permutation="120")
+        # The data scale, not the larger boundary of a dual heatmap
+        tax.heatmapf(lambda p: p[0], style="dual-triangular", colorbar=False)
+        xy = project_points(points, permutation="120")
+        assert_array_almost_equal(tax.unproject(xy), points)
+        # The cursor readout is set on the axes created by the wrapper only
+        self.assertEqual(tax.get_axes().format_coord(*xy[0]), "(2, 3, 5)")
+        # Axis limits are converted with the boundary scale
+        tax.set_axis_limits({'b': [0, 1], 'l': [0, 1], 'r': [0, 1]})
+        data = [(0.2, 0.3, 0.5), (0.6, 0.1, 0.3)]
+        xy = project_points(tax.convert_coordinates(data), permutation="120")
+        assert_array_almost_equal(tax.unproject(xy), data)
+        plt.close(fig)
+        ax = Figure().add_subplot()
+        tax = ternary.TernaryAxesSubplot(ax=ax, scale=10)
+        self.assertNotEqual(ax.format_coord, tax.format_coord)
+
+    def test_douglas_peucker(self):
+        # Collinear points are removed
+        xy = [(0, 0), (1, 0), (2, 0), (3, 0)]
+        assert_array_equal(douglas_peucker(xy, 0.1), [0, 3])
+        # Corners are kept
+        xy = [(0, 0), (1, 0.01), (2, 0), (2, 1), (2, 2)]
+        assert_array_equal(douglas_peucker(xy, 0.1), [0, 2, 4])
+        assert_array_equal(douglas_peucker(xy, 0.001), [0, 1, 2, 4])
+        # A curve doubling back on itself is preserved
+        xy = [(0, 0), (2, 0), (1, 0)]
+        assert_array_equal(douglas_peucker(xy, 0.1), [0, 1, 2])
+        # No tolerance keeps everything
+        assert_array_equal(douglas_peucker(xy, None), [0, 1, 2])
+        # Every removed point is within the tolerance of the simplified curve
+        t = np.linspace(0, 10, 2000)
+        xy = np.column_stack([np.cos(t) * t, np.sin(t) * t])
+        kept = douglas_peucker(xy, 0.05)
+        self.assertLess(len(kept), 500)
+        # Distance of each dropped point to the kept segment spanning it
+        dropped = np.setdiff1d(np.arange(len(xy)), kept)
+        end = np.searchsorted(kept, dropped)
+        p0, p1 = xy[kept[end - 1]], xy[kept[end]]
+        d = p1 - p0
+        t = np.clip(np.einsum('ij,ij->i', xy[dropped] - p0, d) /
+                    np.einsum('ij,ij->i', d, d), 0, 1)
+        distances = np.hypot(*(xy[dropped] - p0 - t[:, np.newaxis] * d).T)
+        self.assertLessEqual(distances.max(), 0.05)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,58 @@
+import base64
+import json
+import os
+import re
+import tempfile
+import unittest
+
+import numpy as np
+
+from ternary.heatmapping import svg_heatmap
+from ternary.helpers import simplex_iterator
+from ternary.html_export import export_html
+
+
+def embedded_plot(page):
+    return json.loads(re.search(r"var PLOT = (.*);\n", page).group(1))
+
+
+def decode(text, dtype):
+    return np.frombuffer(base64.b64decode(text), dtype=dtype)
+
+
+class HTMLExportCases(unittest.TestCase):
+
+    def test_heatmap(self):
+        scale = 60
+        data = dict(((i, j), float(i)) for i, j, k in simplex_iterator(scale))
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "heatmap.html")
+            page = export_html(filename, data=data, scale=scale, permutation="120",
+                               cmap="viridis", title="<heat>")
+            with open(filename) as html_file:
+                self.assertEqual(html_file.read(), page)
+            svg_filename = os.path.join(directory, "heatmap.svg")
+            svg_heatmap(data, scale, svg_filename, style="t")
+            self.assertLess(len(page), os.path.getsize(svg_filename) / 5)
+        self.assertIn("&lt;heat&gt;", page)
+        plot = embedded_plot(page)
+        self.assertEqual(plot["permutation"], [1, 2, 0])
+        self.assertEqual((plot["vmin"], plot["vmax"]), (0, scale))
+        values = decode(plot["values"], "<f4")
+        self.assertEqual(values.tolist(), [float(i) for i, j, k in simplex_iterator(scale)])
+        self.assertEqual(decode(plot["lut"], np.uint8).shape, (1024,))
+        self.assertRaises(ValueError, export_html, data=data)
+        self.assertRaises(ValueError, export_html, data=data, scale=scale, style="x")
+
+    def test_scatter(self):
+        points = [(1, 2, 7), (5, 5, 0)]
+        plot = embedded_plot(export_html(points=points, values=[1, 3], vmin=0))
+        np.testing.assert_array_almost_equal(decode(plot["points"], "<f4"),
+                                             [0.1, 0.2, 0.5, 0.5])
+        self.assertEqual((plot["vmin"], plot["vmax"]), (0, 3))
+        self.assertIsNone(plot["values"])
+        self.assertRaises(ValueError, export_html)
+
+
+if __name__ == "__main__":
+    unittest.main()
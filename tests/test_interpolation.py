@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from ternary.binning import locate_points
+from ternary.heatmapping import lattice_triangulation
+from ternary.helpers import project_points, simplex_iterator
+from ternary.interpolation import interpolate, resample
+
+
+class InterpolationCases(unittest.TestCase):
+
+    def test_locate_points(self):
+        scale = 7
+        points = np.random.RandomState(0).dirichlet([1, 1, 1], size=1000)
+        cells, vertices, weights = locate_points(points, scale)
+        # Same triangles as matplotlib's point location
+        triangulation = lattice_triangulation(scale)
+        xy = project_points(points * scale)
+        finder = triangulation.get_trifinder()
+        assert_array_equal(cells, finder(xy[:, 0], xy[:, 1]))
+        assert_array_almost_equal((weights[:, :, np.newaxis] * vertices).sum(axis=1),
+                                  points[:, :2] * scale)
+        assert_array_almost_equal(weights.sum(axis=1), 1)
+
+    def test_interpolate(self):
+        # Linear functions are interpolated exactly
+        scale = 5
+        data = dict(((i, j), 2. * i - j + 1) for i, j, k in simplex_iterator(scale))
+        points = np.random.RandomState(1).dirichlet([1, 1, 1], size=100)
+        points = np.concatenate([points, [(1, 0, 0), (0, 0, 1), (2, 2, 6), (0, 0, 0), (0.5, 0.6, -0.1)]])
+        expected = 2. * scale * points[:, 0] - scale * points[:, 1] + 1
+        expected[-3:-1] = [2. * 1 - 1 + 1, np.nan]
+        expected[-1] = np.nan
+        values, cells = interpolate(points, data, scale=scale, return_cells=True)
+        assert_array_almost_equal(values, expected)
+        assert_array_equal(cells[-2:], [-1, -1])
+        array = np.full((scale + 1, scale + 1), np.nan)
+        for (i, j), value in data.items():
+            array[i, j] = value
+        assert_array_almost_equal(interpolate(points, array), expected)
+        self.assertRaises(ValueError, interpolate, points, data)
+
+    def test_missing_data(self):
+        data = {(0, 0): 1., (1, 0): 2., (0, 1): 3.}
+        values = interpolate([(0.2, 0.2, 0.6), (0.6, 0.3, 0.1)], data, scale=2)
+        self.assertAlmostEqual(values[0], 0.2 * 1 + 0.4 * 2 + 0.4 * 3)
+        self.assertTrue(np.isnan(values[1]))
+
+    def test_resample(self):
+        points = np.random.RandomState(2).dirichlet([1, 1, 1], size=500)
+        points = np.concatenate([points, [(1, 0, 0), (0, 1, 0), (0, 0, 1)], points[:5]])
+        values = 2. * points[:, 0] - points[:, 1]
+        scale = 10
+        data = resample(points, values, scale, method="linear")
+        # Linear data is reproduced exactly inside the convex hull
+        self.assertGreater(len(data), 60)
+        for (i, j), value in data.items():
+            self.assertAlmostEqual(value, (2. * i - j) / scale)
+        for method in ("nearest", "idw"):
+            data = resample(points, values, scale, method=method)
+            self.assertEqual(len(data), 66)
+            self.assertAlmostEqual(data[(scale, 0)], 2.)
+            errors = [abs(value - (2. * i - j) / scale) for (i, j), value in data.items()]
+            self.assertLess(max(errors), 0.2)
+        data = resample(points[:3], values[:3], scale, method="nearest", max_distance=0.05)
+        self.assertLess(len(data), 10)
+        self.assertRaises(ValueError, resample, points, values, scale, method="cubic")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from ternary.binning import LatticeHistogram
+from ternary.helpers import dict_to_lattice, project_points
+from ternary.kde import simplex_kde, smooth_lattice
+
+
+class KDECases(unittest.TestCase):
+
+    def test_uniform_density(self):
+        # The density of uniform samples is 1 / area everywhere, including
+        # at the edges thanks to the reflection
+        points = np.random.RandomState(0).dirichlet([1, 1, 1], size=200000)
+        scale = 40
+        density = dict_to_lattice(simplex_kde(points, scale, bandwidth=0.08), scale)
+        expected = 4 / np.sqrt(3)
+        self.assertLess(np.nanmax(np.abs(density - expected)), 0.1 * expected)
+
+        unreflected = dict_to_lattice(
+            simplex_kde(points, scale, bandwidth=0.08, reflect=False), scale)
+        self.assertAlmostEqual(unreflected[0, 0] / expected, 1. / 6, places=1)
+        self.assertAlmostEqual(unreflected[0, scale // 2] / expected, 1. / 2, places=1)
+
+    def test_direct_evaluation(self):
+        # Compare with a direct evaluation of the kernel sum for samples on
+        # lattice points, far from the edges
+        scale = 30
+        bandwidth = 0.05
+        samples = np.array([(10, 10, 10), (12, 9, 9), (15, 10, 5)])
+        histogram = LatticeHistogram(scale).add(samples)
+        density = smooth_lattice(histogram.array(), bandwidth)
+        for key in [(10, 10), (13, 9), (11, 11)]:
+            point = project_points([(key[0], key[1], scale - sum(key))]) / scale
+            d2 = ((project_points(samples) / scale - point) ** 2).sum(axis=1)
+            expected = np.sum(np.exp(-d2 / (2 * bandwidth ** 2))) / (2 * np.pi * bandwidth ** 2)
+            self.assertAlmostEqual(density[key], expected, places=6)
+        self.assertTrue(np.isnan(density[20, 20]))
+
+    def test_inputs(self):
+        points = np.random.RandomState(1).dirichlet([2, 1, 1], size=500)
+        histogram = LatticeHistogram(10).add(points)
+        expected = simplex_kde(points, 10)
+        self.assertEqual(simplex_kde(histogram, 10), expected)
+        self.assertEqual(simplex_kde([points[:200], points[200:]], 10), expected)
+        self.assertRaises(ValueError, simplex_kde, histogram, 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import io
+import tempfile
+import unittest
+
+import numpy as np
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from ternary.batch import new_figure
+from ternary.cache import RenderCache
+from ternary.helpers import project_points
+from ternary.live import RingBuffer
+
+
+class RingBufferCases(unittest.TestCase):
+
+    def test_append(self):
+        buffer = RingBuffer(5, width=1)
+        buffer.append([1, 2, 3])
+        assert_array_equal(buffer.array().ravel(), [1, 2, 3])
+        buffer.append([4, 5, 6, 7])
+        self.assertEqual(len(buffer), 5)
+        assert_array_equal(buffer.array().ravel(), [3, 4, 5, 6, 7])
+        buffer.append(np.arange(8, 20))
+        assert_array_equal(buffer.array().ravel(), [15, 16, 17, 18, 19])
+        buffer.clear()
+        self.assertEqual(len(buffer.array()), 0)
+
+
+class LiveCases(unittest.TestCase):
+
+    def test_live_scatter(self):
+        tax = new_figure(scale=1, permutation="120")
+        tax.boundary()
+        scatter = tax.live_scatter(capacity=100, c="b")
+        trajectory = tax.live_plot(capacity=10, color="r")
+        canvas = tax.get_figure().canvas
+        points = np.random.RandomState(0).dirichlet([1, 1, 1], size=250)
+        for chunk in np.split(points, 5):
+            scatter.append(chunk)
+            trajectory.append(chunk[:4])
+        self.assertEqual(len(scatter), 100)
+        assert_array_equal(scatter.points(), points[-100:])
+        assert_array_almost_equal(scatter.artist.get_offsets(),
+                                  project_points(points[-100:], permutation="120"))
+        self.assertEqual(len(trajectory.artist.get_xdata()), 10)
+        self.assertIsNotNone(tax.get_live_display()._background)
+
+        # Updates only redraw the live artists over the background
+        before = np.array(canvas.buffer_rgba())
+        scatter.clear()
+        trajectory.clear()
+        canvas.restore_region(tax.get_live_display()._background)
+        background = np.array(canvas.buffer_rgba())
+        self.assertFalse((before == background).all())
+        tax.get_live_display().update()
+        assert_array_equal(np.array(canvas.buffer_rgba()), background)
+
+    def test_live_scatter_values(self):
+        tax = new_figure(scale=1)
+        scatter = tax.live_scatter(capacity=10)
+        points = np.random.RandomState(1).dirichlet([1, 1, 1], size=20)
+        scatter.append(points[:3])
+        # Values first given with more points than the capacity
+        scatter.append(points[3:], values=np.arange(17))
+        assert_array_equal(scatter.artist.get_array(), np.arange(7, 17))
+        scatter = tax.live_scatter(capacity=10)
+        scatter.append(points[:4])
+        scatter.append(points[4:6], values=[1, 2])
+        # Points without values are masked
+        array = scatter.artist.get_array()
+        assert_array_equal(np.ma.getmaskarray(array), [True] * 4 + [False] * 2)
+        assert_array_equal(array[4:], [1, 2])
+        self.assertRaises(ValueError, scatter.append, points[:2], values=[1])
+        self.assertEqual(len(scatter), 6)
+
+    def test_render_cache(self):
+        # Live artists are not in the scene, so they are not cached
+        with tempfile.TemporaryDirectory() as directory:
+            for make in (lambda tax: tax.live_scatter(), lambda tax: tax.live_plot()):
+                tax = new_figure(scale=1)
+                tax.set_render_cache(RenderCache(directory))
+                make(tax).append([(0.2, 0.3, 0.5), (0.5, 0.5, 0)])
+                tax.savefig(dpi=30)
+            self.assertEqual(len(RenderCache(directory).entries()), 0)
+
+    def test_savefig_vector(self):
+        tax = new_figure(scale=1)
+        tax.boundary()
+        scatter = tax.live_scatter(capacity=10)
+        scatter.append([(0.2, 0.3, 0.5)])
+        tax.live_plot(capacity=10).append([(0.2, 0.3, 0.5), (0.5, 0.5, 0)])
+        for format in ["pdf", "svg"]:
+            buffer = io.BytesIO()
+            tax.savefig(buffer, format=format)
+            self.assertGreater(len(buffer.getvalue()), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+
+from matplotlib.figure import Figure
+import numpy as np
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from ternary.helpers import project_points
+from ternary.ternary_axes_subplot import TernaryAxesSubplot
+from ternary.plotting import (plot, plot_colored_trajectory, plot_trajectories,
+                              scatter, trajectory_offsets)
+
+
+def example_trajectories():
+    return [np.array([(0, 0, 1), (0.5, 0, 0.5), (1, 0, 0)]),
+            np.array([(0, 1, 0), (0, 0.5, 0.5)]),
+            np.array([(0.2, 0.2, 0.6), (0.3, 0.3, 0.4), (0.4, 0.4, 0.2), (0.5, 0.5, 0)])]
+
+
+class TrajectoryCases(unittest.TestCase):
+
+    def test_trajectory_offsets(self):
+        trajectories = example_trajectories()
+        points, bounds = trajectory_offsets(trajectories)
+        assert_array_equal(bounds, [0, 3, 5, 9])
+        self.assertEqual(points.shape, (9, 3))
+        for offsets in ([0, 3, 5], [0, 3, 5, 9]):
+            same_points, same_bounds = trajectory_offsets(points, offsets=offsets)
+            assert_array_equal(same_points, points)
+            assert_array_equal(same_bounds, bounds)
+        self.assertRaises(ValueError, trajectory_offsets, points, [0, 5, 3])
+
+    def test_plot_trajectories(self):
+        trajectories = example_trajectories()
+        ax = Figure().add_subplot()
+        plot_trajectories(trajectories, ax=ax, colors=["r", "g", "b"])
+        collection = ax.collections[-1]
+        paths = collection.get_paths()
+        self.assertEqual(len(paths), 3)
+        for path, trajectory in zip(paths, trajectories):
+            assert_array_almost_equal(path.vertices, project_points(trajectory))
+        assert_array_almost_equal(collection.get_colors()[:, :3],
+                                  [(1, 0, 0), (0, 0.5, 0), (0, 0, 1)])
+
+        # Per-segment coloring never joins different trajectories
+        plot_trajectories(trajectories, ax=ax, values="step", cmap="viridis")
+        collection = ax.collections[-1]
+        self.assertEqual(len(collection.get_segments()), 6)
+        assert_array_equal(collection.get_array(), [0, 1, 0, 0, 1, 2])
+
+        values = np.arange(6)
+        plot_trajectories(trajectories, ax=ax, values=values)
+        assert_array_equal(ax.collections[-1].get_array(), values)
+        plot_trajectories(trajectories, ax=ax, values=[1, 2, 3])
+        assert_array_equal(ax.collections[-1].get_array(), [1, 2, 3])
+        self.assertRaises(ValueError, plot_trajectories, trajectories, ax=ax,
+                          values=[1, 2])
+
+        # Collinear points are removed by the decimation
+        plot_trajectories(trajectories, ax=ax, tolerance=1e-6, values="step")
+        collection = ax.collections[-1]
+        assert_array_equal(collection.get_array(), [0, 0, 0])
+
+    def test_plot_trajectories_empty(self):
+        trajectories = example_trajectories()
+        with_empty = [trajectories[0], np.empty((0, 3)), trajectories[1],
+                      trajectories[2], np.empty((0, 3))]
+        ax = Figure().add_subplot()
+        plot_trajectories(with_empty, ax=ax, values="step")
+        collection = ax.collections[-1]
+        self.assertEqual(len(collection.get_segments()), 6)
+        assert_array_equal(collection.get_array(), [0, 1, 0, 0, 1, 2])
+        # Per-trajectory values and colors include the empty trajectories
+        plot_trajectories(with_empty, ax=ax, values=np.arange(5))
+        self.assertEqual(len(ax.collections[-1].get_paths()), 3)
+        assert_array_equal(ax.collections[-1].get_array(), [0, 2, 3])
+        plot_trajectories(with_empty, ax=ax, colors=["r", "k", "g", "b", "k"])
+        assert_array_almost_equal(ax.collections[-1].get_colors()[:, :3],
+                                  [(1, 0, 0), (0, 0.5, 0), (0, 0, 1)])
+        plot_trajectories(with_empty, ax=ax, values=np.arange(6))
+        assert_array_equal(ax.collections[-1].get_array(), np.arange(6))
+
+        # As many trajectories as segments
+        ambiguous = [np.array([(0, 0, 1)]), np.array([(0, 1, 0), (0, 0.5, 0.5)]),
+                     trajectories[0]]
+        self.assertRaises(ValueError, plot_trajectories, ambiguous, ax=ax,
+                          values=[1, 2, 3])
+        pairs = [np.array([(0, 1, 0), (0, 0.5, 0.5)])] * 3
+        plot_trajectories(pairs, ax=ax, values=[1, 2, 3])
+        assert_array_equal(ax.collections[-1].get_array(), [1, 2, 3])
+
+    def test_plot_generators(self):
+        points = [(0, 0, 10), (5, 0, 5), (2, 6, 2)]
+        ax = Figure().add_subplot()
+        plot((p for p in points), ax=ax)
+        assert_array_almost_equal(ax.lines[-1].get_xydata(), project_points(points))
+        plot(iter(points), ax=ax, permutation="120")
+        assert_array_almost_equal(ax.lines[-1].get_xydata(),
+                                  project_points(points, permutation="120"))
+        plot_colored_trajectory((p for p in points), ax=ax)
+        segments = ax.collections[-1].get_segments()
+        self.assertEqual(len(segments), 2)
+        assert_array_almost_equal(segments[1], project_points(points[1:]))
+        scatter((p for p in points), ax=ax)
+        assert_array_almost_equal(ax.collections[-1].get_offsets(),
+                                  project_points(points))
+        # The points of an indexed scatter are used twice
+        tax = TernaryAxesSubplot(ax=Figure().add_subplot(), scale=10)
+        tax.scatter((p for p in points), index=True)
+        assert_array_almost_equal(tax.get_axes().collections[-1].get_offsets(),
+                                  project_points(points))
+        self.assertEqual(len(tax._scatter_indices[-1].points), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
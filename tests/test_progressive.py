@@ -0,0 +1,80 @@
+import io
+import tempfile
+import threading
+import unittest
+
+from ternary.batch import new_figure
+from ternary.cache import RenderCache
+from ternary.progressive import refinement_levels
+
+
+class ProgressiveCases(unittest.TestCase):
+
+    def test_refinement_levels(self):
+        self.assertEqual(refinement_levels(100), [10, 25, 50, 100])
+        self.assertEqual(refinement_levels(36), [4, 9, 18, 36])
+        # Prime scales fall back to halving the scale
+        self.assertEqual(refinement_levels(101), [12, 25, 50, 101])
+        self.assertEqual(refinement_levels(127, 3), [31, 63, 127])
+        self.assertEqual(refinement_levels(10, 8), [1, 2, 5, 10])
+        self.assertEqual(refinement_levels(10, [5, 20]), [5, 10])
+        self.assertRaises(ValueError, refinement_levels, 10, 0)
+
+    def test_progressive_heatmapf(self):
+        calls = []
+        tax = new_figure(scale=16)
+        progress = tax.progressive_heatmapf(lambda p: calls.append(p) or p[0],
+                                            levels=3, interval=0)
+        self.assertTrue(progress.wait(timeout=10))
+        # The coarser lattices are contained in the finest one
+        self.assertEqual(len(calls), 153)
+        self.assertEqual(progress.update(), 16)
+        collection = progress.collection
+        self.assertEqual(len(collection.get_paths()), 16 ** 2)
+        self.assertEqual(collection.get_clim(), (0, 1))
+        tax.savefig(io.BytesIO(), format="png")
+
+    def test_reuse(self):
+        # Every level divides the scale, so only the points of the final
+        # lattice are evaluated
+        tax = new_figure(scale=60)
+        progress = tax.progressive_heatmapf(lambda p: p[0], levels=4, interval=0)
+        self.assertTrue(progress.wait(timeout=10))
+        self.assertEqual(progress.levels, [6, 15, 30, 60])
+        self.assertEqual(progress.evaluator.evaluations, 61 * 62 // 2)
+
+    def test_render_cache(self):
+        # Progressive heatmaps are not in the scene, so they are not cached
+        with tempfile.TemporaryDirectory() as directory:
+            images = []
+            for func in (lambda p: p[0], lambda p: p[1]):
+                tax = new_figure(scale=8)
+                tax.set_render_cache(RenderCache(directory))
+                progress = tax.progressive_heatmapf(func, levels=1, interval=0)
+                self.assertTrue(progress.wait(timeout=10))
+                progress.update(draw=False)
+                images.append(tax.savefig(dpi=30))
+            self.assertNotEqual(images[0], images[1])
+            self.assertEqual(len(RenderCache(directory).entries()), 0)
+
+    def test_cancel(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def func(p):
+            started.set()
+            release.wait(timeout=10)
+            return p[1]
+
+        tax = new_figure(scale=40)
+        progress = tax.progressive_heatmapf(func, style="hexagonal", interval=0)
+        self.assertTrue(started.wait(timeout=10))
+        progress.cancel()
+        release.set()
+        self.assertFalse(progress.wait(timeout=10))
+        self.assertIsNone(progress.update())
+        self.assertLess(progress.evaluator.evaluations, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from matplotlib.collections import LineCollection, PathCollection, PolyCollection
+import numpy as np
+
+from ternary.batch import new_figure
+
+
+class DeferredCases(unittest.TestCase):
+
+    def test_merging(self):
+        tax = new_figure(scale=10)
+        tax.set_deferred(True)
+        for i in range(50):
+            tax.line((i / 5., 0, 10 - i / 5.), (0, 10, 0), color="green")
+            tax.horizontal_line(i / 5., color="green")
+            tax.scatter([(i / 5., 1, 9 - i / 5.)], c=[i], vmin=0, vmax=50)
+        tax.scatter([(1, 1, 8)], color="red")
+        tax.plot([(0, 0, 10), (5, 5, 0)], color="k", marker="o", label="a")
+        tax.heatmapf(lambda p: p[0], scale=10, colorbar=False)
+        tax.legend()
+        ax = tax.get_axes()
+        # Nothing is drawn until flushed
+        self.assertEqual(len(ax.collections), 0)
+        # All the calls but the default background of the constructor
+        self.assertEqual(len(tax.get_scene()), 155)
+
+        tax.flush()
+        lines = [c for c in ax.collections if isinstance(c, LineCollection)]
+        scatters = [c for c in ax.collections if isinstance(c, PathCollection)]
+        heatmaps = [c for c in ax.collections if isinstance(c, PolyCollection)
+                    and not isinstance(c, (LineCollection, PathCollection))]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(len(lines[0].get_segments()), 100)
+        self.assertEqual(len(scatters), 2)
+        self.assertEqual(sorted(len(c.get_offsets()) for c in scatters), [1, 50])
+        np.testing.assert_array_equal(scatters[0].get_array(), np.arange(50))
+        self.assertEqual(len(heatmaps), 1)
+        # The line with markers and a label is not merged
+        self.assertEqual(len(ax.lines), 1)
+        self.assertIsNotNone(ax.get_legend())
+
+    def test_scatter_color_limits(self):
+        tax = new_figure(scale=10)
+        tax.set_deferred(True)
+        # Each scatter scales its own values to the colormap
+        tax.scatter([(1, 1, 8), (2, 2, 6)], c=[0, 1], vmin=None, vmax=None)
+        tax.scatter([(3, 3, 4), (4, 4, 2)], c=[10, 20], vmin=None, vmax=None)
+        # Fixed limits, or the defaults of plotting.scatter, can be merged
+        tax.scatter([(1, 2, 7)], c=[0.5], vmin=0, vmax=20)
+        tax.scatter([(2, 1, 7)], c=[5], vmin=0, vmax=20)
+        tax.scatter([(1, 3, 6)], c=[0.5])
+        tax.scatter([(3, 1, 6)], c=[0.2])
+        tax.flush()
+        ax = tax.get_axes()
+        sizes = [len(c.get_offsets()) for c in ax.collections
+                 if isinstance(c, PathCollection)]
+        self.assertEqual(sizes, [2, 2, 2, 2])
+        self.assertEqual(ax.collections[0].get_clim(), (0, 1))
+        self.assertEqual(ax.collections[1].get_clim(), (10, 20))
+
+    def test_gridlines(self):
+        tax = new_figure(scale=10)
+        tax.set_deferred(True)
+        tax.gridlines(multiple=2, color="blue", left_kwargs={"color": "red"})
+        tax.savefig(dpi=10)
+        ax = tax.get_axes()
+        counts = sorted(len(c.get_segments()) for c in ax.collections)
+        self.assertEqual(counts, [6, 11])
+        self.assertEqual(len(ax.lines), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
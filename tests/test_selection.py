@@ -0,0 +1,64 @@
+import unittest
+
+from matplotlib.figure import Figure
+import numpy as np
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from ternary.helpers import project_points
+from ternary.selection import constraint_mask, parse_constraints
+from ternary.ternary_axes_subplot import TernaryAxesSubplot
+
+
+class ConstraintCases(unittest.TestCase):
+
+    def test_parse_constraints(self):
+        (coefficients, constant, strict), = parse_constraints("a < 0.3")
+        assert_array_almost_equal(coefficients, [1, 0, 0])
+        self.assertAlmostEqual(constant, -0.3)
+        self.assertTrue(strict)
+        (coefficients, constant, strict), = parse_constraints("b >= 2 * c")
+        assert_array_almost_equal(coefficients, [0, -1, 2])
+        self.assertFalse(strict)
+        self.assertEqual(len(parse_constraints("0.2 <= a + b <= 0.5 and c > a / 2")), 3)
+        for invalid in ["a * b < 1", "a == 0.5", "d < 1", "a <", "a"]:
+            self.assertRaises(ValueError, parse_constraints, invalid)
+
+    def test_constraint_mask(self):
+        points = np.array([(1, 2, 7), (3, 3, 4), (5, 2, 3), (2, 5, 3)])
+        assert_array_equal(constraint_mask(points, ["a < 0.3", "b > c"]),
+                           [False, False, False, True])
+        assert_array_equal(constraint_mask(points, "0.25 <= a + b <= 0.65"),
+                           [True, True, False, False])
+        assert_array_equal(constraint_mask(points, "a >= 3", normalize=False),
+                           [False, True, True, False])
+
+
+class SelectionCases(unittest.TestCase):
+
+    def test_select(self):
+        tax = TernaryAxesSubplot(ax=Figure().add_subplot(), scale=1, permutation="201")
+        points = np.random.RandomState(0).dirichlet([1, 1, 1], size=20000)
+        tax.scatter(points, index=True, c="k")
+        tax.scatter(points[:100], c="r")
+
+        selections = tax.select(constraints=["a < 0.3", "b > c"])
+        self.assertEqual(len(selections), 1)
+        expected = np.flatnonzero((points[:, 0] < 0.3) & (points[:, 1] > points[:, 2]))
+        assert_array_equal(selections[0].indices, expected)
+        assert_array_equal(selections[0].points, points[expected])
+
+        # The same region as a polygon: a < 0.3 and b > c
+        polygon = [(0, 0.5, 0.5), (0.3, 0.35, 0.35), (0.3, 0.7, 0), (0, 1, 0)]
+        selection, = tax.select(polygon=polygon)
+        same = np.setxor1d(selection.indices, expected)
+        self.assertLess(len(same), 5)
+
+        # A lasso in data coordinates
+        lasso = project_points(polygon, permutation="201")
+        assert_array_equal(tax.select(lasso=lasso)[0].indices, selection.indices)
+        combined, = tax.select(lasso=lasso, constraints="a > 0.1")
+        assert_array_equal(combined.indices, selection.indices[points[selection.indices, 0] > 0.1])
+
+
+if __name__ == "__main__":
+    unittest.main()
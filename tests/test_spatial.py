@@ -0,0 +1,87 @@
+import unittest
+
+from matplotlib.backend_bases import MouseEvent
+from matplotlib.figure import Figure
+import numpy as np
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from ternary.helpers import project_points
+from ternary.spatial import GridIndex
+from ternary.ternary_axes_subplot import TernaryAxesSubplot
+
+
+def brute_force(xy, queries):
+    return np.hypot(*(queries[:, np.newaxis, :] - xy[np.newaxis]).transpose(2, 0, 1))
+
+
+class GridIndexCases(unittest.TestCase):
+
+    def test_nearest(self):
+        rs = np.random.RandomState(0)
+        # Clustered points and queries far outside of the grid
+        xy = np.concatenate([rs.rand(500, 2) * 0.1, rs.rand(50, 2) + [2, 0]])
+        queries = rs.rand(200, 2) * 6 - 2
+        index = GridIndex(xy)
+        distances, indices = index.nearest(queries, k=3)
+        expected = np.sort(brute_force(xy, queries), axis=1)[:, :3]
+        assert_array_almost_equal(distances, expected)
+        assert_array_almost_equal(np.hypot(*(xy[indices] - queries[:, np.newaxis]).T).T,
+                                  expected)
+
+        distances, indices = index.nearest(queries, k=2, max_distance=0.5)
+        expected[expected > 0.5] = np.inf
+        assert_array_almost_equal(distances, expected[:, :2])
+        assert_array_equal(indices == -1, np.isinf(expected[:, :2]))
+
+    def test_small(self):
+        index = GridIndex([(1, 1)])
+        distances, indices = index.nearest([(1, 2), (4, 5)], k=2)
+        assert_array_almost_equal(distances, [(1, np.inf), (5, np.inf)])
+        assert_array_equal(indices, [(0, -1), (0, -1)])
+        distances, indices = GridIndex(np.zeros((0, 2))).nearest([(0, 0)])
+        assert_array_equal(indices, [[-1]])
+
+    def test_query_radius(self):
+        rs = np.random.RandomState(1)
+        xy = rs.rand(1000, 2)
+        queries = rs.rand(50, 2)
+        queries_found, indices, distances = GridIndex(xy).query_radius(queries, 0.1)
+        expected = brute_force(xy, queries)
+        self.assertEqual(len(indices), np.count_nonzero(expected <= 0.1))
+        assert_array_almost_equal(distances, expected[queries_found, indices])
+        self.assertTrue((np.diff(queries_found) >= 0).all())
+
+
+class ScatterIndexCases(unittest.TestCase):
+
+    def test_nearest(self):
+        tax = TernaryAxesSubplot(ax=Figure().add_subplot(), scale=10, permutation="120")
+        points = np.random.RandomState(2).dirichlet([1, 1, 1], size=5000) * 10
+        tax.scatter(points, index=True, c="k")
+        tax.scatter(points[:10], c="r")
+        fig = tax.get_figure()
+        fig.canvas.draw()
+        ax = tax.get_axes()
+        pixels = ax.transData.transform(project_points(points, permutation="120"))
+        x, y = np.round(pixels[7])
+        event = MouseEvent("motion_notify_event", fig.canvas, x, y)
+        hits = tax.nearest(event, radius=4)
+        self.assertEqual(len(hits), 1)
+        hit = hits[0]
+        self.assertIs(hit.artist, ax.collections[0])
+        distances = np.hypot(pixels[:, 0] - x, pixels[:, 1] - y)
+        expected = np.flatnonzero(distances <= 4)
+        assert_array_equal(np.sort(hit.indices), expected)
+        self.assertEqual(hit.indices[0], np.argmin(distances))
+        assert_array_almost_equal(hit.points, points[hit.indices])
+
+        found = []
+        tax.connect_hover(lambda hits, event: found.append(hits))
+        fig.canvas.callbacks.process("motion_notify_event", event)
+        self.assertEqual(len(found), 1)
+        ax.collections[0].remove()
+        self.assertEqual(tax.nearest(event), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from matplotlib import image
+
+from ternary.helpers import lattice_to_dict
+from ternary.tiles import (export_tiles, lattice_window, rasterize_tile, tile_points,
+                           zoom_tiles)
+
+
+def lattice(scale):
+    i, j = np.indices((scale + 1, scale + 1))
+    return np.where(i + j <= scale, i / float(scale), np.nan)
+
+
+class TileCases(unittest.TestCase):
+
+    def test_zoom_tiles(self):
+        self.assertEqual(zoom_tiles(0), [(0, 0)])
+        tiles = zoom_tiles(2)
+        # The corner tiles of the top row are outside of the simplex
+        self.assertNotIn((0, 0), tiles)
+        self.assertIn((1, 0), tiles)
+        self.assertEqual(len([t for t in tiles if t[1] == 3]), 4)
+
+    def test_rasterize_window(self):
+        # A window gives the same tile as the whole lattice
+        scale = 40
+        array = lattice(scale)
+        corners = tile_points(2, 1, 2, corners=True)
+        i0, i1, j0, j1 = lattice_window(corners, scale)
+        self.assertLess((i1 - i0) * (j1 - j0), array.size / 4)
+        for style in ["triangular", "hexagonal", "linear"]:
+            whole = rasterize_tile(array, (0, 0), scale, 2, 1, 2, style=style,
+                                   tile_size=32)
+            window = rasterize_tile(array[i0:i1, j0:j1], (i0, j0), scale, 2, 1, 2,
+                                    style=style, tile_size=32)
+            np.testing.assert_array_equal(whole, window)
+
+    def test_export_tiles(self):
+        scale = 40
+        array = lattice(scale)
+        with tempfile.TemporaryDirectory() as directory:
+            stats = export_tiles(lattice_to_dict(array), scale, directory,
+                                 max_zoom=2, tile_size=32, vmin=0, vmax=2,
+                                 processes=1)
+            self.assertEqual(stats.unchanged, 0)
+            with open(os.path.join(directory, "manifest.json")) as manifest_file:
+                manifest = json.load(manifest_file)
+            self.assertEqual(len(manifest["tiles"]), 1 + 4 + len(zoom_tiles(2)))
+            root = image.imread(os.path.join(directory, "0", "0", "0.png"))
+            self.assertEqual(root.shape, (32, 32, 4))
+            # Transparent outside of the simplex
+            self.assertEqual(root[0, 0, 3], 0)
+            self.assertEqual(root[20, 16, 3], 1)
+
+            # Changing a corner only rewrites its tiles and their parents
+            array[38, 1] = 2
+            stats = export_tiles(array, scale, directory, max_zoom=2, tile_size=32,
+                                 vmin=0, vmax=2, processes=2)
+            self.assertEqual(stats.written, 3)
+            deepest = [name for _, _, names in os.walk(os.path.join(directory, "2"))
+                       for name in names]
+            stats = export_tiles(array, scale, directory, max_zoom=1, tile_size=32,
+                                 vmin=0, vmax=2, processes=1)
+            self.assertEqual(stats.removed, len(deepest))
+            self.assertFalse([name for _, _, names in os.walk(os.path.join(directory, "2"))
+                              for name in names])
+
+
+if __name__ == "__main__":
+    unittest.main()